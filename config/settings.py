@@ -78,6 +78,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL: Lesen (PDF, Listen) blockiert nicht während Zählungen geschrieben werden
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+        },
         #'ENGINE': 'mssql',
         #'NAME': 'InventurDB',          # deine eigene Inventur-DB (später)
         #'USER': 'sharepoint',
@@ -26,6 +26,16 @@ urlpatterns = [
     path("inventur_uebersicht/", views.inventur_pdf_view, name="inventur_uebersicht"),
     path("neue_inventur/", views.inventur_pdf_view, name="neue_inventur"),
     path("inventur_bearbeiten/", views.inventur_pdf_view, name="inventur_bearbeiten"),
+    path("inventur_pdf_teil/", views.inventur_pdf_teil_view, name="inventur_pdf_teil"),
+    path("inventur_pdf_alle/", views.inventur_pdf_alle_view, name="inventur_pdf_alle"),
+    path("inventur_pdf_async/", views.inventur_pdf_async_view, name="inventur_pdf_async"),
+    path("artikel/", views.artikel_liste_view, name="artikel_liste"),
+    path("artikel/suche/", views.artikel_suche_view, name="artikel_suche"),
+    path("inventuren/<int:inventur_id>/zaehlungen/", views.zaehlungen_view, name="zaehlungen"),
+    path("intern/messwerte/", views.messwerte_view, name="messwerte"),
+    path("pdf_auftraege/", views.pdf_auftrag_anlegen_view, name="pdf_auftrag_anlegen"),
+    path("pdf_auftraege/<str:auftrag_id>/", views.pdf_auftrag_status_view, name="pdf_auftrag_status"),
+    path("pdf_auftraege/<str:auftrag_id>/pdf/", views.pdf_auftrag_pdf_view, name="pdf_auftrag_pdf"),
     #path('', views.startseite, name='startseite'),
     #path('test-artikel/', test_firma_view),
     #path('invi_tabelle/', lager_artikel_view)
@@ -1,6 +1,23 @@
-import pyodbc
+import atexit
+import csv
+import hashlib
+import logging
+import os
+import pickle
 import re
-from collections import defaultdict
+import sqlite3
+import string
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+import messung
+
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================================
@@ -19,6 +36,177 @@ CONNECTION_STRING = (
 )
 
 
+class OdbcVerbindungsPool:
+    """
+    Kleiner, thread-sicherer Pool wiederverwendbarer ODBC-Verbindungen.
+
+    - höchstens max_groesse Verbindungen gleichzeitig
+    - Verbindungen, die länger als leerlauf_timeout ungenutzt sind, werden geschlossen
+    - nach pruef_intervall ohne Nutzung wird vor der Ausgabe mit 'SELECT 1' geprüft
+    - bei Fehlern während der Nutzung wird die Verbindung verworfen statt zurückgegeben
+    """
+
+    def __init__(self, connection_string, max_groesse=4, leerlauf_timeout=300,
+                 pruef_intervall=30, verbinden=None):
+        self.connection_string = connection_string
+        self.max_groesse = max_groesse
+        self.leerlauf_timeout = leerlauf_timeout
+        self.pruef_intervall = pruef_intervall
+        self._verbinden = verbinden or self._pyodbc_verbinden
+
+        self._bedingung = threading.Condition()
+        self._frei = []       # [(verbindung, zuletzt_benutzt)]
+        self._ausgeliehen = 0
+
+    @contextmanager
+    def verbindung(self, timeout=30):
+        """
+        Leiht eine Verbindung aus:
+
+            with pool.verbindung() as conn:
+                conn.cursor().execute(...)
+        """
+        conn = self._ausleihen(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self._verwerfen(conn)
+            raise
+        else:
+            self._zurueckgeben(conn)
+
+    def schliessen(self):
+        """
+        Schließt alle freien Verbindungen (z. B. beim Beenden).
+        """
+        with self._bedingung:
+            frei, self._frei = self._frei, []
+
+        for conn, _ in frei:
+            self._still_schliessen(conn)
+
+    def kennzahlen(self):
+        with self._bedingung:
+            return {"frei": len(self._frei), "ausgeliehen": self._ausgeliehen}
+
+    # -------- intern --------
+
+    def _pyodbc_verbinden(self):
+        # Erst hier importieren, damit Quellen ohne ODBC-Treiber funktionieren
+        import pyodbc
+
+        # Nur lesende Abfragen: autocommit vermeidet offene Transaktionen
+        return pyodbc.connect(self.connection_string, autocommit=True)
+
+    def _ausleihen(self, timeout):
+        frist = time.monotonic() + timeout
+
+        with self._bedingung:
+            while True:
+                self._leerlauf_raeumen()
+
+                if self._frei:
+                    conn, zuletzt = self._frei.pop()
+                    self._ausgeliehen += 1
+                    break
+
+                if self._ausgeliehen < self.max_groesse:
+                    conn, zuletzt = None, None
+                    self._ausgeliehen += 1
+                    break
+
+                rest = frist - time.monotonic()
+                if rest <= 0:
+                    raise TimeoutError(
+                        f"Keine freie Datenbankverbindung nach {timeout}s "
+                        f"(max. {self.max_groesse})"
+                    )
+                self._bedingung.wait(rest)
+
+        # Verbindungsaufbau und Prüfung außerhalb der Sperre
+        try:
+            if conn is not None and time.monotonic() - zuletzt > self.pruef_intervall:
+                if not self._ist_gesund(conn):
+                    self._still_schliessen(conn)
+                    conn = None
+
+            if conn is None:
+                conn = self._verbinden()
+        except BaseException:
+            self._platz_freigeben()
+            raise
+
+        return conn
+
+    def _zurueckgeben(self, conn):
+        with self._bedingung:
+            self._ausgeliehen -= 1
+            self._frei.append((conn, time.monotonic()))
+            self._bedingung.notify()
+
+    def _verwerfen(self, conn):
+        self._still_schliessen(conn)
+        self._platz_freigeben()
+
+    def _platz_freigeben(self):
+        with self._bedingung:
+            self._ausgeliehen -= 1
+            self._bedingung.notify()
+
+    def _leerlauf_raeumen(self):
+        # Aufruf nur mit gehaltener Sperre
+        grenze = time.monotonic() - self.leerlauf_timeout
+        abgelaufen = [conn for conn, zuletzt in self._frei if zuletzt < grenze]
+        if abgelaufen:
+            self._frei = [(conn, zuletzt) for conn, zuletzt in self._frei if zuletzt >= grenze]
+            for conn in abgelaufen:
+                self._still_schliessen(conn)
+
+    @staticmethod
+    def _ist_gesund(conn):
+        try:
+            conn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _still_schliessen(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def verbindungs_pool(connection_string=None):
+    """
+    Liefert den (prozessweiten) Pool für einen Connection-String.
+    Größe per ENV-Variable INVENTUR_POOL_GROESSE einstellbar.
+    """
+    connection_string = connection_string or CONNECTION_STRING
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(connection_string)
+        if pool is None:
+            pool = OdbcVerbindungsPool(
+                connection_string,
+                max_groesse=int(os.environ.get("INVENTUR_POOL_GROESSE", 4)),
+            )
+            _POOLS[connection_string] = pool
+
+    return pool
+
+
+@atexit.register
+def _pools_schliessen():
+    for pool in list(_POOLS.values()):
+        pool.schliessen()
+
+
 # ============================================================
 # Fachliche Konfiguration
 # ============================================================
@@ -96,6 +284,39 @@ def gruppen_fuer_standort_filtern(gruppen_namen, gruppen_daten, auszuschliessend
     return gefilterte_namen, gefilterte_daten
 
 
+def daten_fuer_standort(daten, standort):
+    """
+    Leitet aus einem Ergebnis von artikel_lager_laden über alle Gruppen
+    das Ergebnis für einen Standort ab – gleich dem, was
+    artikel_lager_laden(standort=standort) liefern würde.
+    """
+    _, _, gruppen_namen, gruppen = daten
+    gruppen_namen, gruppen = gruppen_fuer_standort_filtern(
+        gruppen_namen, gruppen, STANDORTE[standort]["skip_groups"]
+    )
+
+    return (
+        sum(len(gruppen[g]) for g in gruppen_namen),
+        len(gruppen_namen),
+        gruppen_namen,
+        gruppen,
+    )
+
+
+def wg_ausschluss_fuer_standort(standort=None):
+    """
+    Alle WG-Nummern, die für einen Standort nicht geladen werden müssen:
+    grundsätzlich ausgeschlossene WGs plus die WGs der übersprungenen Gruppen.
+    """
+    ausschluss = set(GRUPPIERUNG.ausgeschlossene_wg)
+
+    if standort is not None:
+        for gruppenname in STANDORTE[standort]["skip_groups"]:
+            ausschluss |= GRUPPIERUNG.wg_nummern(gruppenname)
+
+    return frozenset(ausschluss)
+
+
 def wg_nummer_fuer_sortierung(gruppenname):
     """
     Extrahiert die WG-Nummer aus einem Gruppennamen wie 'WG 12'.
@@ -109,98 +330,1049 @@ def wg_nummer_fuer_sortierung(gruppenname):
 # Gruppierungslogik
 # ============================================================
 
+class GruppierungsIndex:
+    """
+    Vorkompilierte, unveränderliche Zuordnung WG_NR -> Warengruppe.
+
+    Jede Gruppe hat eine ganzzahlige ID, die zugleich ihr Sortierrang ist:
+    - Übergruppen: 0 .. n-1 in der Reihenfolge von UEBERGRUPPEN
+    - Restgruppen ('WG 12'): n + WG_NR
+
+    Dadurch läuft die Gruppierung in einem Durchgang mit Integer-Schlüsseln,
+    und die Gruppenreihenfolge ergibt sich direkt aus den IDs.
+    """
+
+    __slots__ = ("uebergruppen_namen", "ausgeschlossene_wg", "_wg_zu_id", "_name_zu_id", "_wg_je_gruppe")
+
+    def __init__(self, uebergruppen, ausgeschlossene_wg):
+        wg_zu_id = {}
+        wg_zu_name = {}
+
+        for gruppen_id, (gruppenname, wg_set) in enumerate(uebergruppen.items()):
+            for wg_nr in wg_set:
+                if wg_nr in wg_zu_id:
+                    raise ValueError(
+                        f"WG_NR {wg_nr} ist mehreren Übergruppen zugeordnet: "
+                        f"{wg_zu_name[wg_nr]!r} und {gruppenname!r}"
+                    )
+                wg_zu_id[wg_nr] = gruppen_id
+                wg_zu_name[wg_nr] = gruppenname
+
+        self.uebergruppen_namen = tuple(uebergruppen)
+        self.ausgeschlossene_wg = frozenset(ausgeschlossene_wg)
+        self._wg_zu_id = MappingProxyType(wg_zu_id)
+        self._name_zu_id = MappingProxyType({name: i for i, name in enumerate(self.uebergruppen_namen)})
+        self._wg_je_gruppe = MappingProxyType(
+            {name: frozenset(wg_set) for name, wg_set in uebergruppen.items()}
+        )
+
+    def gruppen_id(self, wg_nr):
+        """
+        ID (= Sortierrang) der Gruppe für eine WG_NR.
+        """
+        gruppen_id = self._wg_zu_id.get(wg_nr)
+        if gruppen_id is None:
+            gruppen_id = len(self.uebergruppen_namen) + wg_nr
+        return gruppen_id
+
+    def gruppen_name(self, gruppen_id):
+        if gruppen_id < len(self.uebergruppen_namen):
+            return self.uebergruppen_namen[gruppen_id]
+        return f"WG {gruppen_id - len(self.uebergruppen_namen)}"
+
+    def rang(self, gruppenname):
+        """
+        Sortierrang eines Gruppennamens (Übergruppe oder 'WG 12').
+        """
+        gruppen_id = self._name_zu_id.get(gruppenname)
+        if gruppen_id is None:
+            gruppen_id = len(self.uebergruppen_namen) + wg_nummer_fuer_sortierung(gruppenname)
+        return gruppen_id
+
+    def wg_nummern(self, gruppenname):
+        """
+        Alle WG-Nummern einer Gruppe (für Restgruppen genau eine).
+        """
+        wg_set = self._wg_je_gruppe.get(gruppenname)
+        if wg_set is not None:
+            return wg_set
+
+        wg_nr = wg_nummer_fuer_sortierung(gruppenname)
+        return frozenset() if wg_nr == 10**9 else frozenset({wg_nr})
+
+    def gruppieren(self, artikel_liste):
+        """
+        Gruppiert Artikel in einem Durchgang.
+        Liefert (sortierte_gruppen_namen, {gruppenname: [artikel]}).
+        """
+        ausgeschlossen = self.ausgeschlossene_wg
+        wg_zu_id = self._wg_zu_id
+        rest_basis = len(self.uebergruppen_namen)
+        gruppen = {}
+
+        for artikel in artikel_liste:
+            wg_nr = artikel.get("WG_NR")
+
+            # Ungültige oder explizit ausgeschlossene WG überspringen
+            if wg_nr is None or wg_nr in ausgeschlossen:
+                continue
+
+            gruppen_id = wg_zu_id.get(wg_nr)
+            if gruppen_id is None:
+                gruppen_id = rest_basis + wg_nr
+
+            liste = gruppen.get(gruppen_id)
+            if liste is None:
+                liste = gruppen[gruppen_id] = []
+            liste.append(artikel)
+
+        sortiert = {self.gruppen_name(i): gruppen[i] for i in sorted(gruppen)}
+        return list(sortiert), sortiert
+
+
+# Einmal beim Import aufgebaut; doppelte WG-Zuordnungen fallen sofort auf
+GRUPPIERUNG = GruppierungsIndex(UEBERGRUPPEN, AUSGESCHLOSSENE_WG_NUMMERN)
+
+
 def artikel_nach_warengruppen_gruppieren(artikel_liste, uebergruppen, ausgeschlossene_wg):
     """
     Gruppiert Artikel anhand ihrer WG_NR in fachliche Warengruppen.
     """
-    # Mapping: WG_NR -> Übergruppenname
-    wg_zu_gruppe = {}
+    index = GRUPPIERUNG
+    if uebergruppen is not UEBERGRUPPEN or ausgeschlossene_wg is not AUSGESCHLOSSENE_WG_NUMMERN:
+        index = GruppierungsIndex(uebergruppen, ausgeschlossene_wg)
+
+    _, gruppen = index.gruppieren(artikel_liste)
+    return gruppen
+
+
+# ============================================================
+# Artikel-Quellen
+# ============================================================
+
+# Spalten der Artikelabfrage (Reihenfolge wie im SELECT)
+ARTIKEL_SPALTEN = (
+    "ART_NR",
+    "HERST_NAME",
+    "HERST_ART_NR",
+    "ART_NAME",
+    "WG_NR",
+    "WOG_NR",
+    "WG_NAME",
+    "EK",
+    "EINH",
+    "EINH_BEST",
+    "EINH_UMR",
+    "Lager",
+)
+
+# Typumwandlung für Quellen ohne eigene Datentypen (CSV)
+_SPALTEN_TYPEN = {
+    "ART_NR": int,
+    "WG_NR": int,
+    "WOG_NR": int,
+    "EK": float,
+    "EINH_UMR": float,
+    "Lager": float,
+    "Aktiv": int,
+}
+
+# Entspricht der Sortierung "ORDER BY WG_NR, HERST_ART_NR" mit
+# case-insensitiver Sortierung (SQL Server / SQLite NOCASE)
+_ASCII_KLEIN = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Spalten, die in der PDF tatsächlich gedruckt bzw. zum Gruppieren gebraucht werden
+PDF_SPALTEN = ("ART_NR", "HERST_NAME", "HERST_ART_NR", "ART_NAME", "WG_NR")
+
+# Standard-Batchgröße für fetchmany
+BATCH_GROESSE = 5000
+
+ARTIKEL_SQL = """
+    SELECT {spalten}
+    FROM {tabelle}
+    WHERE Aktiv = 1
+      AND WOG_NR > 3
+      AND WG_NR IS NOT NULL{wg_filter}
+    ORDER BY WG_NR ASC, HERST_ART_NR {sortierung}ASC
+"""
+
+# Günstige Prüfabfrage: ändert sich, sobald Artikel hinzukommen,
+# wegfallen oder sich druckrelevante Felder ändern
+AENDERUNGS_SQL = """
+    SELECT COUNT(*),
+           CHECKSUM_AGG(BINARY_CHECKSUM(ART_NR, HERST_NAME, HERST_ART_NR, ART_NAME, WG_NR))
+    FROM dbo.ART_STAMM_VW
+    WHERE Aktiv = 1
+      AND WOG_NR > 3
+"""
+
+# Anzahl und Prüfsumme je ART_NR-Block (für den Abgleich des lokalen Spiegels)
+BLOCK_PRUEFSUMMEN_SQL = """
+    SELECT ART_NR / {blockgroesse},
+           COUNT(*),
+           CHECKSUM_AGG(BINARY_CHECKSUM({spalten}))
+    FROM dbo.ART_STAMM_VW
+    WHERE Aktiv = 1
+      AND WOG_NR > 3
+      AND WG_NR IS NOT NULL
+    GROUP BY ART_NR / {blockgroesse}
+"""
+
+# Alle Zeilen eines ART_NR-Bereichs [von, bis), ungeordnet
+BEREICH_SQL = """
+    SELECT {spalten}
+    FROM {tabelle}
+    WHERE Aktiv = 1
+      AND WOG_NR > 3
+      AND WG_NR IS NOT NULL
+      AND ART_NR >= ? AND ART_NR < ?
+"""
+
+
+def spalten_pruefen(spalten):
+    """
+    Stellt sicher, dass nur bekannte Spalten abgefragt werden
+    (die Namen landen direkt im SQL) und WG_NR zum Gruppieren dabei ist.
+    """
+    spalten = tuple(spalten)
+
+    unbekannt = [s for s in spalten if s not in ARTIKEL_SPALTEN]
+    if unbekannt:
+        raise ValueError(f"Unbekannte Artikelspalten: {unbekannt}")
+
+    if "WG_NR" not in spalten:
+        spalten += ("WG_NR",)
+
+    return spalten
+
+
+def artikel_sql(tabelle, spalten, ausgeschlossene_wg=(), sortierung=""):
+    """
+    Baut die Artikelabfrage für die gewünschten Spalten.
+    Ausgeschlossene WGs werden als Parameter übergeben.
+
+    Liefert (sql, parameter).
+    """
+    parameter = sorted(ausgeschlossene_wg)
+
+    wg_filter = ""
+    if parameter:
+        wg_filter = f"\n      AND WG_NR NOT IN ({', '.join('?' * len(parameter))})"
+
+    sql = ARTIKEL_SQL.format(
+        spalten=",\n           ".join(spalten),
+        tabelle=tabelle,
+        wg_filter=wg_filter,
+        sortierung=sortierung,
+    )
 
-    for gruppenname, wg_set in uebergruppen.items():
-        for wg_nr in wg_set:
-            if wg_nr in wg_zu_gruppe:
-                # Sollte eigentlich nicht passieren,
-                # hilft aber beim Debuggen von Datenfehlern
-                print("WARNUNG: doppelte WG_NR-Zuordnung:", wg_nr)
+    return sql, parameter
 
-            wg_zu_gruppe[wg_nr] = gruppenname
 
-    gruppen = defaultdict(list)
+_ARTIKEL_TYPEN = {}
+
+
+def artikel_typ(spalten):
+    """
+    Liefert einen kompakten Datensatz-Typ (namedtuple) für die Spalten.
+    Zugriff per Attribut (art.ART_NR) oder wie bisher per art.get("ART_NR").
+    """
+    spalten = tuple(spalten)
+
+    typ = _ARTIKEL_TYPEN.get(spalten)
+    if typ is None:
+        basis = namedtuple("ArtikelBasis", spalten)
 
-    for artikel in artikel_liste:
-        wg_nr = artikel.get("WG_NR")
+        class Artikel(basis):
+            __slots__ = ()
+
+            def get(self, spalte, standard=None):
+                return getattr(self, spalte, standard)
+
+            def __reduce__(self):
+                # Typen werden dynamisch erzeugt – über die Spalten wiederherstellen
+                return _artikel_wiederherstellen, (self._fields, tuple(self))
+
+        typ = _ARTIKEL_TYPEN[spalten] = Artikel
+
+    return typ
+
+
+def _artikel_wiederherstellen(spalten, werte):
+    return artikel_typ(spalten)._make(werte)
+
+
+def artikel_sortierschluessel(artikel):
+    """
+    Sortierschlüssel analog zu 'ORDER BY WG_NR, HERST_ART_NR'.
+    NULL-Werte stehen – wie in der Datenbank – vorne.
+    """
+    wg_nr = artikel.get("WG_NR")
+    herst_art_nr = artikel.get("HERST_ART_NR")
 
-        # Ungültige oder explizit ausgeschlossene WG überspringen
+    return (
+        wg_nr is not None,
+        wg_nr if wg_nr is not None else 0,
+        herst_art_nr is not None,
+        str(herst_art_nr or "").translate(_ASCII_KLEIN),
+    )
+
+
+def _wert_umwandeln(spalte, wert):
+    """
+    Wandelt Textwerte aus Dateien in die Datentypen der Datenbank um.
+    Leere Felder werden zu None.
+    """
+    if wert is None or wert == "":
+        return None
+
+    typ = _SPALTEN_TYPEN.get(spalte)
+    if typ is None or not isinstance(wert, str):
+        return wert
+
+    try:
+        return typ(float(wert)) if typ is int else typ(wert)
+    except ValueError:
+        return wert
+
+
+def zeilen_pruefsumme(zeile):
+    """
+    64-Bit-Prüfsumme einer Zeile; je Block addiert, damit die
+    Reihenfolge der Zeilen keine Rolle spielt.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(tuple(zeile)).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def block_bereiche(bloecke, blockgroesse):
+    """
+    Fasst aufeinanderfolgende Blöcke zu ART_NR-Bereichen [von, bis) zusammen.
+    """
+    bereiche = []
+    for block in sorted(bloecke):
+        von, bis = block * blockgroesse, (block + 1) * blockgroesse
+        if bereiche and bereiche[-1][1] == von:
+            bereiche[-1] = (bereiche[-1][0], bis)
+        else:
+            bereiche.append((von, bis))
+    return bereiche
+
+
+def _bereiche_abfragen(conn, tabelle, bereiche, batch_groesse):
+    """
+    Zeilen (ARTIKEL_SPALTEN) der ART_NR-Bereiche über eine DB-API-Verbindung.
+    """
+    sql = BEREICH_SQL.format(spalten=",\n           ".join(ARTIKEL_SPALTEN), tabelle=tabelle)
+    cursor = conn.cursor()
+    try:
+        for von, bis in bereiche:
+            cursor.execute(sql, (von, bis))
+            while True:
+                zeilen = cursor.fetchmany(batch_groesse)
+                if not zeilen:
+                    break
+                yield [tuple(zeile) for zeile in zeilen]
+    finally:
+        cursor.close()
+
+
+def _zeilen_filtern_und_sortieren(datensaetze, spalten, batch_groesse, ausgeschlossene_wg):
+    """
+    Wendet Filter und Sortierung der Artikelabfrage auf
+    Datensätze an, die nicht aus einer Datenbank kommen,
+    und liefert sie in Batches.
+    """
+    gefiltert = []
+
+    for datensatz in datensaetze:
+        if "Aktiv" in datensatz and datensatz["Aktiv"] != 1:
+            continue
+
+        wog_nr = datensatz.get("WOG_NR")
+        if wog_nr is None or wog_nr <= 3:
+            continue
+
+        wg_nr = datensatz.get("WG_NR")
         if wg_nr is None or wg_nr in ausgeschlossene_wg:
             continue
 
-        zielgruppe = wg_zu_gruppe.get(wg_nr, f"WG {wg_nr}")
-        gruppen[zielgruppe].append(artikel)
+        gefiltert.append(datensatz)
+
+    gefiltert.sort(key=artikel_sortierschluessel)
+
+    for start in range(0, len(gefiltert), batch_groesse):
+        yield [
+            tuple(d.get(spalte) for spalte in spalten)
+            for d in gefiltert[start:start + batch_groesse]
+        ]
+
+
+class ArtikelQuelle:
+    """
+    Basisklasse für alle Artikel-Quellen.
+
+    Jede Quelle liefert die Artikelabfrage auf dbo.ART_STAMM_VW
+    mit gleichen Spalten, gleichem Filter und gleicher Sortierung,
+    damit Gruppierung und PDF unabhängig von der Quelle sind.
+    """
+
+    name = "basis"
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        """
+        Liefert die Zeilen als Tupel (Reihenfolge wie spalten)
+        in Listen von höchstens batch_groesse Zeilen.
+        Artikel ohne WG_NR oder mit ausgeschlossener WG_NR
+        werden bereits in der Quelle herausgefiltert.
+        """
+        raise NotImplementedError
+
+    def zeilen_laden(self, spalten=ARTIKEL_SPALTEN):
+        """
+        Liefert (spalten, zeilen) mit allen Zeilen auf einmal.
+        """
+        spalten = tuple(spalten)
+        zeilen = []
+        for batch in self.zeilen_iterieren(spalten):
+            zeilen.extend(batch)
+
+        return list(spalten), zeilen
 
-    return dict(gruppen)
+    def schluessel(self):
+        """
+        Eindeutige Kennung der Quelle (z. B. für Caches).
+        """
+        return (self.name,)
+
+    def aenderungsmarke(self):
+        """
+        Günstige Prüfung, ob sich die Daten geändert haben.
+        Liefert einen vergleichbaren Wert oder None (= unbekannt).
+        """
+        return None
+
+    def block_pruefsummen(self, blockgroesse):
+        """
+        {block: (anzahl, pruefsumme)} über alle Spalten der aktiven
+        Artikel, Block = ART_NR // blockgroesse.
+        Standard: in Python über alle Zeilen; Datenbanken rechnen selbst.
+        """
+        bloecke = {}
+        for batch in self.zeilen_iterieren(ARTIKEL_SPALTEN):
+            for zeile in batch:
+                # ART_NR ist die erste Spalte
+                block = zeile[0] // blockgroesse
+                anzahl, summe = bloecke.get(block, (0, 0))
+                bloecke[block] = (anzahl + 1, (summe + zeilen_pruefsumme(zeile)) % 2**64)
+        return bloecke
+
+    def zeilen_fuer_bloecke(self, bloecke, blockgroesse, batch_groesse=BATCH_GROESSE):
+        """
+        Alle Zeilen (ARTIKEL_SPALTEN) der Blöcke in Batches, ungeordnet.
+        Standard: Filter über alle Zeilen.
+        """
+        bloecke = set(bloecke)
+        for batch in self.zeilen_iterieren(ARTIKEL_SPALTEN, batch_groesse):
+            treffer = [zeile for zeile in batch if zeile[0] // blockgroesse in bloecke]
+            if treffer:
+                yield treffer
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class PyodbcQuelle(ArtikelQuelle):
+    """
+    Live-Abfrage gegen das ERP (Cortex SQL Server).
+    """
+
+    name = "pyodbc"
+
+    def __init__(self, connection_string=None):
+        self.connection_string = connection_string or CONNECTION_STRING
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        with verbindungs_pool(self.connection_string).verbindung() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = batch_groesse
+
+            sql, parameter = artikel_sql("dbo.ART_STAMM_VW", spalten, ausgeschlossene_wg)
+            cursor.execute(sql, parameter)
+
+            while True:
+                rows = cursor.fetchmany(batch_groesse)
+                if not rows:
+                    break
+                yield [tuple(row) for row in rows]
+
+            cursor.close()
+
+    def schluessel(self):
+        return (self.name, self.connection_string)
+
+    def aenderungsmarke(self):
+        with verbindungs_pool(self.connection_string).verbindung() as conn:
+            return tuple(conn.cursor().execute(AENDERUNGS_SQL).fetchone())
+
+    def block_pruefsummen(self, blockgroesse):
+        sql = BLOCK_PRUEFSUMMEN_SQL.format(blockgroesse=int(blockgroesse), spalten=", ".join(ARTIKEL_SPALTEN))
+        with verbindungs_pool(self.connection_string).verbindung() as conn:
+            zeilen = conn.cursor().execute(sql).fetchall()
+        return {block: (anzahl, pruefsumme) for block, anzahl, pruefsumme in zeilen}
+
+    def zeilen_fuer_bloecke(self, bloecke, blockgroesse, batch_groesse=BATCH_GROESSE):
+        with verbindungs_pool(self.connection_string).verbindung() as conn:
+            yield from _bereiche_abfragen(
+                conn, "dbo.ART_STAMM_VW", block_bereiche(bloecke, blockgroesse), batch_groesse
+            )
+
+
+def _datei_marke(pfad):
+    """
+    Änderungsmarke für dateibasierte Quellen (Änderungszeit + Größe).
+    """
+    info = os.stat(pfad)
+    return info.st_mtime_ns, info.st_size
+
+
+class SqliteQuelle(ArtikelQuelle):
+    """
+    Lokaler SQLite-Spiegel mit einer Tabelle ART_STAMM_VW
+    (Spalten wie ARTIKEL_SPALTEN plus Aktiv).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, pfad):
+        self.pfad = str(pfad)
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        conn = sqlite3.connect(self.pfad)
+        try:
+            sql, parameter = artikel_sql(
+                "ART_STAMM_VW", spalten, ausgeschlossene_wg, sortierung="COLLATE NOCASE "
+            )
+            cursor = conn.execute(sql, parameter)
+
+            while True:
+                zeilen = cursor.fetchmany(batch_groesse)
+                if not zeilen:
+                    break
+                yield zeilen
+        finally:
+            conn.close()
+
+    def schluessel(self):
+        return (self.name, os.path.abspath(self.pfad))
+
+    def aenderungsmarke(self):
+        return _datei_marke(self.pfad)
+
+    def zeilen_fuer_bloecke(self, bloecke, blockgroesse, batch_groesse=BATCH_GROESSE):
+        conn = sqlite3.connect(self.pfad)
+        try:
+            yield from _bereiche_abfragen(
+                conn, "ART_STAMM_VW", block_bereiche(bloecke, blockgroesse), batch_groesse
+            )
+        finally:
+            conn.close()
+
+
+class CsvQuelle(ArtikelQuelle):
+    """
+    CSV-Fixture (Kopfzeile mit den Spaltennamen, Trennzeichen ';').
+    """
+
+    name = "csv"
+
+    def __init__(self, pfad, trennzeichen=";"):
+        self.pfad = str(pfad)
+        self.trennzeichen = trennzeichen
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        with open(self.pfad, newline="", encoding="utf-8") as datei:
+            leser = csv.DictReader(datei, delimiter=self.trennzeichen)
+            datensaetze = [
+                {spalte: _wert_umwandeln(spalte, wert) for spalte, wert in zeile.items()}
+                for zeile in leser
+            ]
+
+        return _zeilen_filtern_und_sortieren(datensaetze, spalten, batch_groesse, ausgeschlossene_wg)
+
+    def schluessel(self):
+        return (self.name, os.path.abspath(self.pfad))
+
+    def aenderungsmarke(self):
+        return _datei_marke(self.pfad)
+
+
+class ParquetQuelle(ArtikelQuelle):
+    """
+    Parquet-Fixture (benötigt pyarrow).
+    """
+
+    name = "parquet"
+
+    def __init__(self, pfad):
+        self.pfad = str(pfad)
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Für Parquet-Fixtures wird 'pyarrow' benötigt.") from exc
+
+        datensaetze = pq.read_table(self.pfad).to_pylist()
+        return _zeilen_filtern_und_sortieren(datensaetze, spalten, batch_groesse, ausgeschlossene_wg)
+
+    def schluessel(self):
+        return (self.name, os.path.abspath(self.pfad))
+
+    def aenderungsmarke(self):
+        return _datei_marke(self.pfad)
+
+
+# Verfügbare Quellentypen: Name -> Fabrik(argument)
+QUELLEN_TYPEN = {
+    "pyodbc": lambda argument: PyodbcQuelle(argument or None),
+    "sqlite": SqliteQuelle,
+    "csv": CsvQuelle,
+    "parquet": ParquetQuelle,
+}
+
+_aktive_quelle = None
+
+
+def artikel_quelle_aus_text(text):
+    """
+    Erzeugt eine Quelle aus einer Angabe wie
+    'pyodbc', 'sqlite:/pfad/artikel.sqlite' oder 'csv:/pfad/artikel.csv'.
+    """
+    typ, _, argument = (text or "pyodbc").partition(":")
+
+    fabrik = QUELLEN_TYPEN.get(typ.strip().lower())
+    if fabrik is None:
+        raise ValueError(f"Unbekannte Artikel-Quelle: {typ!r}")
+
+    return fabrik(argument.strip())
+
+
+def artikel_quelle():
+    """
+    Liefert die aktive Artikel-Quelle.
+    Standard ist das ERP, per ENV-Variable INVENTUR_ARTIKEL_QUELLE umstellbar.
+    """
+    global _aktive_quelle
+
+    if _aktive_quelle is None:
+        _aktive_quelle = artikel_quelle_aus_text(os.environ.get("INVENTUR_ARTIKEL_QUELLE"))
+
+    return _aktive_quelle
+
+
+def artikel_quelle_setzen(quelle):
+    """
+    Setzt die aktive Artikel-Quelle (z. B. für Benchmarks).
+    Akzeptiert eine ArtikelQuelle oder eine Textangabe.
+    """
+    global _aktive_quelle
+
+    if isinstance(quelle, str):
+        quelle = artikel_quelle_aus_text(quelle)
+
+    _aktive_quelle = quelle
+    return quelle
+
+
+def fixture_schreiben(ziel, spalten, zeilen):
+    """
+    Schreibt Artikelzeilen als SQLite-Spiegel, CSV- oder Parquet-Fixture,
+    z. B. um einen Export aus dem ERP offline weiterzuverwenden.
+    Ziel wie bei artikel_quelle_aus_text ('sqlite:/pfad/...').
+    """
+    typ, _, pfad = ziel.partition(":")
+    typ = typ.strip().lower()
+
+    spalten = list(spalten)
+    if "Aktiv" not in spalten:
+        spalten.append("Aktiv")
+        zeilen = (tuple(zeile) + (1,) for zeile in zeilen)
+
+    if typ == "sqlite":
+        conn = sqlite3.connect(pfad)
+        try:
+            conn.execute("DROP TABLE IF EXISTS ART_STAMM_VW")
+            conn.execute(f"CREATE TABLE ART_STAMM_VW ({', '.join(spalten)})")
+            platzhalter = ", ".join("?" * len(spalten))
+            conn.executemany(f"INSERT INTO ART_STAMM_VW VALUES ({platzhalter})", zeilen)
+            conn.commit()
+        finally:
+            conn.close()
+
+    elif typ == "csv":
+        with open(pfad, "w", newline="", encoding="utf-8") as datei:
+            schreiber = csv.writer(datei, delimiter=";")
+            schreiber.writerow(spalten)
+            schreiber.writerows(zeilen)
+
+    elif typ == "parquet":
+        try:
+            import pyarrow
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Für Parquet-Fixtures wird 'pyarrow' benötigt.") from exc
+
+        datensaetze = [dict(zip(spalten, zeile)) for zeile in zeilen]
+        pq.write_table(pyarrow.Table.from_pylist(datensaetze), pfad)
+
+    else:
+        raise ValueError(f"Unbekanntes Fixture-Ziel: {typ!r}")
 
 
 # ============================================================
 # Datenbank-Zugriff
 # ============================================================
 
-def artikel_lager_laden():
+def artikel_lager_laden(quelle=None, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, standort=None):
     """
     Lädt alle relevanten Artikel aus der Datenbank,
     gruppiert sie fachlich und liefert die Daten
     strukturiert für die PDF-Erstellung zurück.
+
+    Die Zeilen werden in Batches gelesen und direkt gruppiert;
+    jeder Artikel ist ein kompakter Datensatz (siehe artikel_typ)
+    mit nur den angeforderten Spalten.
+
+    Mit standort (Schlüssel aus STANDORTE) werden die übersprungenen
+    Gruppen bereits in der Abfrage ausgeschlossen – das Ergebnis
+    entspricht dann gruppen_fuer_standort_filtern auf allen Daten.
+
+    Ohne Angabe wird die aktive Quelle (siehe artikel_quelle) verwendet.
     """
-    conn = pyodbc.connect(CONNECTION_STRING)
-    cursor = conn.cursor()
+    quelle = quelle or artikel_quelle()
+    spalten = spalten_pruefen(spalten)
+    typ = artikel_typ(spalten)
+    ausgeschlossene_wg = wg_ausschluss_fuer_standort(standort)
 
-    sql = """
-        SELECT ART_NR,
-               HERST_NAME,
-               HERST_ART_NR,
-               ART_NAME,
-               WG_NR,
-               WOG_NR,
-               WG_NAME,
-               EK,
-               EINH,
-               EINH_BEST,
-               EINH_UMR,
-               Lager
-        FROM dbo.ART_STAMM_VW
-        WHERE Aktiv = 1
-          AND WOG_NR > 3
-        ORDER BY WG_NR ASC, HERST_ART_NR ASC
-    """
-
-    cursor.execute(sql)
-    rows = cursor.fetchall()
-
-    spalten = [col[0] for col in cursor.description]
-    daten = [dict(zip(spalten, row)) for row in rows]
-
-    conn.close()
-
-    # Artikel fachlich gruppieren
-    gruppen = artikel_nach_warengruppen_gruppieren(
-        artikel_liste=daten,
-        uebergruppen=UEBERGRUPPEN,
-        ausgeschlossene_wg=AUSGESCHLOSSENE_WG_NUMMERN,
-    )
+    anzahl = 0
+    abfrage_s = 0.0
+
+    def artikel_strom():
+        nonlocal anzahl, abfrage_s
+        batches = iter(quelle.zeilen_iterieren(spalten, batch_groesse, ausgeschlossene_wg))
+        while True:
+            # Nur die Zeit in der Quelle (Abfrage/fetchmany) zählt als Abfrage
+            start = time.perf_counter()
+            batch = next(batches, None)
+            abfrage_s += time.perf_counter() - start
+            if batch is None:
+                return
+            anzahl += len(batch)
+            yield from map(typ._make, batch)
 
-    # Reihenfolge:
+    # Artikel fachlich gruppieren. Reihenfolge:
     # 1. definierte Übergruppen
     # 2. restliche WG-Gruppen sortiert nach Nummer
-    uebergruppen_reihenfolge = list(UEBERGRUPPEN.keys())
-    restgruppen = [g for g in gruppen.keys() if g not in UEBERGRUPPEN]
+    start = time.perf_counter()
+    sortierte_gruppen, gruppen = GRUPPIERUNG.gruppieren(artikel_strom())
+    gesamt_s = time.perf_counter() - start
 
-    sortierte_gruppen = (
-        [g for g in uebergruppen_reihenfolge if g in gruppen]
-        + sorted(restgruppen, key=wg_nummer_fuer_sortierung)
-    )
+    messung.erfassen("abfrage", abfrage_s * 1000, quelle=quelle.name, zeilen=anzahl)
+    messung.erfassen("gruppieren", (gesamt_s - abfrage_s) * 1000, gruppen=len(sortierte_gruppen))
 
     return (
-        len(rows),                 # Anzahl Artikel
+        anzahl,                    # Anzahl Artikel
         len(sortierte_gruppen),    # Anzahl Gruppen
         sortierte_gruppen,         # Gruppenreihenfolge
         gruppen,                   # Gruppierte Artikeldaten
     )
+
+
+# ============================================================
+# Snapshot-Cache
+# ============================================================
+
+def daten_fingerabdruck(daten):
+    """
+    Inhalts-Hash über ein Ergebnis von artikel_lager_laden
+    (Gruppenreihenfolge und alle Artikelwerte).
+    """
+    _, _, sortierte_gruppen, gruppen = daten
+    h = hashlib.sha256()
+
+    for gruppenname in sortierte_gruppen:
+        h.update(gruppenname.encode("utf-8"))
+        h.update(b"\0")
+        h.update(repr([tuple(artikel) for artikel in gruppen[gruppenname]]).encode("utf-8"))
+        h.update(b"\0")
+
+    return h.hexdigest()
+
+
+class _Snapshot:
+    """
+    Ein zwischengespeichertes Ergebnis von artikel_lager_laden
+    samt Inhalts-Hash (fingerabdruck).
+    """
+
+    __slots__ = ("daten", "marke", "geladen_um", "geprueft_um", "fingerabdruck")
+
+    def __init__(self, daten, marke, geladen_um):
+        self.daten = daten
+        self.marke = marke
+        self.geladen_um = geladen_um
+        self.geprueft_um = geladen_um
+        self.fingerabdruck = daten_fingerabdruck(daten)
+
+
+class ArtikelSnapshotCache:
+    """
+    Prozessweiter Cache für das gruppierte Ergebnis von artikel_lager_laden.
+
+    - Innerhalb der TTL wird der Snapshot ohne Datenbankzugriff geliefert.
+    - Nach Ablauf der TTL prüft die Änderungsmarke der Quelle
+      (z. B. COUNT/CHECKSUM), ob neu geladen werden muss.
+    - Optional wird der Snapshot in einem Verzeichnis abgelegt,
+      damit mehrere Worker-Prozesse ihn teilen.
+
+    Das gelieferte Ergebnis wird zwischen Aufrufern geteilt
+    und darf nicht verändert werden.
+    """
+
+    def __init__(self, ttl=300, verzeichnis=None, lader=None):
+        self.ttl = ttl
+        self.verzeichnis = verzeichnis
+        self._lader = lader or artikel_lager_laden
+        self._lock = threading.Lock()
+        self._lade_locks = {}
+        self._snapshots = {}
+        self._statistik = {
+            "treffer": 0,
+            "revalidiert": 0,
+            "neu_geladen": 0,
+            "ladezeit_letzte_s": 0.0,
+            "ladezeit_gesamt_s": 0.0,
+        }
+
+    def laden(self, quelle=None, spalten=ARTIKEL_SPALTEN, standort=None):
+        """
+        Liefert das Ergebnis wie artikel_lager_laden,
+        wenn möglich aus dem Cache.
+        """
+        return self.snapshot(quelle, spalten, standort).daten
+
+    def snapshot(self, quelle=None, spalten=ARTIKEL_SPALTEN, standort=None):
+        """
+        Wie laden, liefert aber den Snapshot selbst
+        (daten, fingerabdruck, geladen_um).
+
+        Der Cache-Lock schützt nur das dict; Prüfen und Laden laufen unter
+        einem Lock je Schlüssel. Gleichzeitige Anfragen für denselben
+        Schlüssel warten auf ein gemeinsames Laden, alle anderen werden
+        weiter aus dem Cache bedient.
+        """
+        quelle = quelle or artikel_quelle()
+        spalten = spalten_pruefen(spalten)
+
+        if self.ttl <= 0:
+            return self._neu_laden(quelle, spalten, standort)
+
+        schluessel = (quelle.schluessel(), spalten, standort)
+
+        snapshot = self._frisch(schluessel)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            lade_lock = self._lade_locks.setdefault(schluessel, threading.Lock())
+
+        with lade_lock:
+            # Wer vorher den Lock hatte, hat evtl. schon geladen
+            snapshot = self._frisch(schluessel)
+            if snapshot is not None:
+                return snapshot
+
+            with self._lock:
+                snapshot = self._snapshots.get(schluessel)
+
+            # Abgelaufen oder unbekannt: evtl. hat ein anderer Prozess
+            # bereits einen neueren Snapshot abgelegt
+            aus_datei = self._datei_lesen(schluessel)
+            if aus_datei is not None and (snapshot is None or aus_datei.geprueft_um > snapshot.geprueft_um):
+                snapshot = aus_datei
+                if time.time() - snapshot.geprueft_um < self.ttl:
+                    with self._lock:
+                        self._snapshots[schluessel] = snapshot
+                        self._statistik["treffer"] += 1
+                    return snapshot
+
+            if snapshot is not None:
+                marke = quelle.aenderungsmarke()
+                if marke is not None and marke == snapshot.marke:
+                    snapshot.geprueft_um = time.time()
+                    with self._lock:
+                        self._snapshots[schluessel] = snapshot
+                        self._statistik["revalidiert"] += 1
+                    self._datei_schreiben(schluessel, snapshot)
+                    return snapshot
+
+            snapshot = self._neu_laden(quelle, spalten, standort)
+            with self._lock:
+                self._snapshots[schluessel] = snapshot
+            self._datei_schreiben(schluessel, snapshot)
+
+            return snapshot
+
+    def standort_snapshots(self, quelle=None, spalten=ARTIKEL_SPALTEN, standorte=None):
+        """
+        Snapshots mehrerer Standorte aus einer einzigen Abfrage:
+        lädt (bzw. prüft) den Snapshot über alle Gruppen und leitet je
+        Standort die gefilterten Daten ab. Die abgeleiteten Snapshots
+        landen unter ihrem Standort im Cache, spätere Aufrufe mit
+        standort=... gehen dann ebenfalls nicht mehr zur Datenbank.
+
+        Liefert {standort: snapshot} in der Reihenfolge von standorte.
+        """
+        quelle = quelle or artikel_quelle()
+        spalten = spalten_pruefen(spalten)
+        gesamt = self.snapshot(quelle, spalten)
+
+        ergebnis = {}
+        for standort in standorte or STANDORTE:
+            schluessel = (quelle.schluessel(), spalten, standort)
+            with self._lock:
+                snapshot = self._snapshots.get(schluessel)
+                if snapshot is not None and snapshot.geladen_um >= gesamt.geladen_um:
+                    snapshot.geprueft_um = max(snapshot.geprueft_um, gesamt.geprueft_um)
+                    ergebnis[standort] = snapshot
+                    continue
+
+            # Ableiten und Ablegen ohne den Cache-Lock
+            snapshot = _Snapshot(daten_fuer_standort(gesamt.daten, standort), gesamt.marke, gesamt.geladen_um)
+            snapshot.geprueft_um = gesamt.geprueft_um
+            if self.ttl > 0:
+                with self._lock:
+                    self._snapshots[schluessel] = snapshot
+                self._datei_schreiben(schluessel, snapshot)
+
+            ergebnis[standort] = snapshot
+
+        return ergebnis
+
+    def invalidieren(self):
+        """
+        Verwirft alle Snapshots (auch die abgelegten Dateien).
+        """
+        with self._lock:
+            for schluessel in self._snapshots:
+                pfad = self._datei_pfad(schluessel)
+                if pfad and os.path.exists(pfad):
+                    os.remove(pfad)
+            self._snapshots.clear()
+
+    def kennzahlen(self):
+        """
+        Treffer, Revalidierungen und Neuladen für Monitoring.
+        """
+        with self._lock:
+            kennzahlen = dict(self._statistik)
+            kennzahlen["snapshots"] = len(self._snapshots)
+
+        return kennzahlen
+
+    # -------- intern --------
+
+    def _frisch(self, schluessel):
+        """
+        Snapshot aus dem Speicher, solange er innerhalb der TTL geprüft wurde.
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(schluessel)
+            if snapshot is not None and time.time() - snapshot.geprueft_um < self.ttl:
+                self._statistik["treffer"] += 1
+                return snapshot
+        return None
+
+    def _neu_laden(self, quelle, spalten, standort):
+        # Marke vor dem Laden abfragen: ändert sich zwischendurch etwas,
+        # fällt es bei der nächsten Prüfung auf
+        marke = quelle.aenderungsmarke()
+
+        start = time.perf_counter()
+        daten = self._lader(quelle, spalten, standort=standort)
+        dauer = time.perf_counter() - start
+
+        with self._lock:
+            self._statistik["neu_geladen"] += 1
+            self._statistik["ladezeit_letzte_s"] = dauer
+            self._statistik["ladezeit_gesamt_s"] += dauer
+
+        logger.info("Artikel-Snapshot aus %s geladen: %s Artikel in %.2fs", quelle.name, daten[0], dauer)
+
+        return _Snapshot(daten, marke, time.time())
+
+    def _datei_pfad(self, schluessel):
+        if not self.verzeichnis:
+            return None
+
+        name = hashlib.sha1(repr(schluessel).encode("utf-8")).hexdigest()
+        return os.path.join(self.verzeichnis, f"artikel_snapshot_{name}.pickle")
+
+    def _datei_lesen(self, schluessel):
+        pfad = self._datei_pfad(schluessel)
+        if not pfad or not os.path.exists(pfad):
+            return None
+
+        try:
+            with open(pfad, "rb") as datei:
+                snapshot = pickle.load(datei)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            logger.warning("Artikel-Snapshot %s nicht lesbar, wird neu geladen", pfad)
+            return None
+
+        # Dateien älterer Versionen ohne Fingerabdruck verwerfen
+        if getattr(snapshot, "fingerabdruck", None) is None:
+            return None
+
+        return snapshot
+
+    def _datei_schreiben(self, schluessel, snapshot):
+        pfad = self._datei_pfad(schluessel)
+        if not pfad:
+            return
+
+        # Atomar ersetzen, damit andere Prozesse nie eine halbe Datei lesen
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        fd, tmp_pfad = tempfile.mkstemp(dir=self.verzeichnis, suffix=".tmp")
+        with os.fdopen(fd, "wb") as datei:
+            pickle.dump(snapshot, datei, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_pfad, pfad)
+
+
+SNAPSHOT_CACHE = ArtikelSnapshotCache(
+    ttl=float(os.environ.get("INVENTUR_SNAPSHOT_TTL", 300)),
+    verzeichnis=os.environ.get("INVENTUR_SNAPSHOT_VERZEICHNIS") or None,
+)
+
+
+def artikel_snapshot_laden(quelle=None, spalten=ARTIKEL_SPALTEN, standort=None):
+    """
+    Wie artikel_lager_laden, aber über den prozessweiten Snapshot-Cache.
+    """
+    return SNAPSHOT_CACHE.laden(quelle, spalten, standort)
+
+
+def artikel_snapshot_holen(quelle=None, spalten=ARTIKEL_SPALTEN, standort=None):
+    """
+    Wie artikel_snapshot_laden, liefert aber den Snapshot
+    mit Inhalts-Hash (z. B. als Schlüssel für gerenderte PDFs).
+    """
+    return SNAPSHOT_CACHE.snapshot(quelle, spalten, standort)
+
+
+def standort_snapshots_holen(quelle=None, spalten=ARTIKEL_SPALTEN, standorte=None):
+    """
+    Snapshots aller (bzw. der angegebenen) Standorte mit nur einer
+    Abfrage und einer Gruppierung (siehe ArtikelSnapshotCache.standort_snapshots).
+    """
+    return SNAPSHOT_CACHE.standort_snapshots(quelle, spalten, standorte)
@@ -1,5 +1,24 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class InventurConfig(AppConfig):
     name = 'inventur'
+
+    def ready(self):
+        # Quellen auf Basis der Django-Datenbank wählbar machen
+        from firma_db import QUELLEN_TYPEN
+        from inventur.quellen import InventurQuelle, SpiegelQuelle
+        QUELLEN_TYPEN["inventur"] = InventurQuelle
+        QUELLEN_TYPEN["spiegel"] = SpiegelQuelle
+
+        # Planer nur im Server-Prozess, nicht bei migrate & Co.
+        # und nicht im Überwachungsprozess des Autoreloaders
+        if os.path.basename(sys.argv[0]) == "manage.py":
+            if sys.argv[1:2] != ["runserver"] or os.environ.get("RUN_MAIN") != "true":
+                return
+
+        from inventur.vorrendern import planer_starten
+        planer_starten()
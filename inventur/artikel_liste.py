@@ -0,0 +1,198 @@
+"""
+Seitenweise, filterbare Artikelliste über einen Artikel-Snapshot.
+
+Statt alle Gruppen und Artikel in eine HTML-Seite zu schreiben, wird je
+Snapshot (Fingerabdruck) einmal ein flacher Index aufgebaut:
+Artikel in PDF-Reihenfolge, Bereiche je Gruppe, Positionen je WG_NR und
+kleingeschriebener Suchtext (ART_NAME + HERST_ART_NR).
+
+Geblättert wird per Keyset: der Cursor ist die Position des letzten
+angezeigten Artikels, die nächste Seite beginnt direkt dahinter – ohne
+OFFSET und ohne die vorherigen Treffer erneut zu prüfen.
+"""
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from firma_db import GRUPPIERUNG, artikel_snapshot_holen
+
+
+# Spalten für die Liste (Snapshot wird getrennt von der PDF gecacht)
+LISTE_SPALTEN = ("ART_NR", "HERST_NAME", "HERST_ART_NR", "ART_NAME", "WG_NR", "WG_NAME", "EK", "Lager")
+
+SEITEN_GROESSE = 100
+MAX_SEITEN_GROESSE = 500
+
+# Anzahl gehaltener Indizes (je Standort/Quelle einer)
+MAX_INDIZES = 8
+
+
+# ============================================================
+# Index je Snapshot
+# ============================================================
+
+class ArtikelListenIndex:
+    """
+    Unveränderlicher Index über die gruppierten Daten eines Snapshots.
+    """
+
+    __slots__ = (
+        "fingerabdruck", "artikel", "gruppen_namen", "gruppen_bereiche",
+        "_wg_positionen", "_suchtexte", "_suchblock", "_anfaenge",
+    )
+
+    def __init__(self, daten, fingerabdruck):
+        _, _, sortierte_gruppen, gruppen = daten
+
+        artikel = []
+        bereiche = {}
+        wg_positionen = {}
+
+        for gruppenname in sortierte_gruppen:
+            start = len(artikel)
+            for art in gruppen[gruppenname]:
+                wg_positionen.setdefault(art.WG_NR, []).append(len(artikel))
+                artikel.append(art)
+            bereiche[gruppenname] = (start, len(artikel))
+
+        self.fingerabdruck = fingerabdruck
+        self.artikel = tuple(artikel)
+        self.gruppen_namen = tuple(sortierte_gruppen)
+        self.gruppen_bereiche = bereiche
+        self._wg_positionen = {wg_nr: tuple(pos) for wg_nr, pos in wg_positionen.items()}
+        self._suchtexte = tuple(
+            f"{art.ART_NAME or ''}\0{art.HERST_ART_NR or ''}".lower().replace("\n", " ") for art in artikel
+        )
+
+        # Alle Suchtexte in einem String: str.find springt in C zum nächsten
+        # Treffer, statt jeden Artikel einzeln in Python zu prüfen
+        self._suchblock = "\n".join(self._suchtexte)
+        anfaenge = []
+        offset = 0
+        for text in self._suchtexte:
+            anfaenge.append(offset)
+            offset += len(text) + 1
+        self._anfaenge = anfaenge
+
+    def cursor(self, position):
+        return f"{self.fingerabdruck[:12]}-{position}"
+
+    def cursor_lesen(self, cursor):
+        """
+        Position aus einem Cursor; -1 (Anfang), wenn er fehlt, kaputt ist
+        oder zu einem älteren Snapshot gehört.
+        """
+        if not cursor:
+            return -1
+
+        marke, _, position = cursor.rpartition("-")
+        if marke != self.fingerabdruck[:12] or not position.isdigit():
+            return -1
+        return int(position)
+
+    def _kandidaten(self, uebergruppe, wg_nr, nach):
+        """
+        Positionen hinter nach, eingeschränkt auf Gruppe und/oder WG.
+        """
+        von, bis = 0, len(self.artikel)
+        if uebergruppe is not None:
+            von, bis = self.gruppen_bereiche.get(uebergruppe, (0, 0))
+
+        if wg_nr is not None:
+            positionen = self._wg_positionen.get(wg_nr, ())
+            start = bisect_right(positionen, max(nach, von - 1))
+            for position in positionen[start:]:
+                if position >= bis:
+                    return
+                yield position
+            return
+
+        yield from range(max(nach + 1, von), bis)
+
+    def _wort_positionen(self, wort, von, bis):
+        """
+        Positionen in [von, bis), deren Suchtext wort enthält.
+        """
+        block, anfaenge = self._suchblock, self._anfaenge
+        ende = anfaenge[bis - 1] + len(self._suchtexte[bis - 1]) if bis > von else 0
+        fund = block.find(wort, anfaenge[von], ende) if bis > von else -1
+
+        while fund != -1:
+            position = bisect_right(anfaenge, fund) - 1
+            yield position
+            # Weiter ab dem nächsten Artikel
+            if position + 1 >= bis:
+                return
+            fund = block.find(wort, anfaenge[position + 1], ende)
+
+    def seite(self, uebergruppe=None, wg_nr=None, suche="", nach=-1, groesse=SEITEN_GROESSE):
+        """
+        Eine Seite Treffer hinter Position nach.
+        Liefert (treffer, naechste_position oder None), treffer als
+        Liste von (gruppenname, artikel).
+        """
+        woerter = suche.lower().split()
+        suchtexte = self._suchtexte
+
+        if woerter and wg_nr is None:
+            # Ohne WG-Filter direkt über den Suchblock zum nächsten Treffer springen
+            von, bis = 0, len(self.artikel)
+            if uebergruppe is not None:
+                von, bis = self.gruppen_bereiche.get(uebergruppe, (0, 0))
+            kandidaten = self._wort_positionen(woerter[0], max(nach + 1, von), bis)
+        else:
+            kandidaten = self._kandidaten(uebergruppe, wg_nr, nach)
+
+        positionen = []
+        for position in kandidaten:
+            if woerter and not all(wort in suchtexte[position] for wort in woerter):
+                continue
+            positionen.append(position)
+            # Ein Treffer mehr als nötig zeigt an, ob es weitergeht
+            if len(positionen) > groesse:
+                break
+
+        weiter = None
+        if len(positionen) > groesse:
+            positionen = positionen[:groesse]
+            weiter = positionen[-1]
+
+        gruppen_id = GRUPPIERUNG.gruppen_id
+        treffer = [
+            (GRUPPIERUNG.gruppen_name(gruppen_id(self.artikel[p].WG_NR)), self.artikel[p])
+            for p in positionen
+        ]
+        return treffer, weiter
+
+
+# ============================================================
+# Cache der Indizes
+# ============================================================
+
+_INDIZES = OrderedDict()
+_INDIZES_LOCK = threading.Lock()
+
+
+def artikel_listen_index(quelle=None, standort=None):
+    """
+    Index zum aktuellen Snapshot (siehe artikel_snapshot_holen).
+    Wird nur neu aufgebaut, wenn sich der Fingerabdruck ändert.
+    """
+    snapshot = artikel_snapshot_holen(quelle, spalten=LISTE_SPALTEN, standort=standort)
+    schluessel = (snapshot.fingerabdruck, standort)
+
+    with _INDIZES_LOCK:
+        index = _INDIZES.get(schluessel)
+        if index is not None:
+            _INDIZES.move_to_end(schluessel)
+            return index
+
+    index = ArtikelListenIndex(snapshot.daten, snapshot.fingerabdruck)
+
+    with _INDIZES_LOCK:
+        _INDIZES[schluessel] = index
+        while len(_INDIZES) > MAX_INDIZES:
+            _INDIZES.popitem(last=False)
+
+    return index
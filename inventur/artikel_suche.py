@@ -0,0 +1,354 @@
+"""
+Suchindex im Speicher: auf welcher Listenseite steht ein Artikel?
+
+Gesucht wird nach Cortexnr (ART_NR), HERST_ART_NR (auch Anfang) oder
+Teilen von ART_NAME. Jeder Treffer wird auf Gruppe und Seite aufgelöst –
+mit derselben Aufteilung wie die PDF (zeilen_pro_seite_berechnen,
+seiten_aufteilen), also passend zur ausgedruckten Liste.
+
+Der Index hängt an einem Artikel-Snapshot. Ändert sich dessen
+Fingerabdruck, werden nur neue, geänderte und entfernte Artikel
+nachgetragen; neu berechnet wird dann nur die Seitenlage.
+"""
+
+import heapq
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from time import perf_counter
+
+from firma_db import PDF_SPALTEN, artikel_quelle, artikel_snapshot_holen
+from inventur.pdf import LAYOUT, zeilen_pro_seite_berechnen
+
+
+logger = logging.getLogger(__name__)
+
+MAX_TREFFER = 20
+
+# Ab so vielen Änderungen werden die Präfixlisten neu sortiert statt einzeln gepflegt
+NACHSORTIEREN_AB = 5000
+
+# Kandidaten aus den Trigrammen, die ohne weiteres Schneiden direkt geprüft werden
+DIREKT_PRUEFEN_BIS = 256
+
+# Anzahl gehaltener Indizes (je Standort/Quelle einer)
+MAX_INDIZES = 8
+
+_WORT = re.compile(r"[0-9a-zäöüß]+")
+
+
+def _woerter(text):
+    return _WORT.findall((text or "").lower())
+
+
+def _herst_nr_normalisieren(text):
+    # "AB-12 34" und "ab1234" sollen sich finden
+    return "".join(_woerter(text))
+
+
+def _wort_passt(suchname, wort):
+    # Ab 3 Zeichen Teilwort, kürzer nur als Wortanfang
+    if len(wort) >= 3:
+        return wort in suchname
+    return f" {wort}" in f" {suchname}"
+
+
+def _trigramme(wort):
+    return {wort[i:i + 3] for i in range(len(wort) - 2)}
+
+
+class ArtikelTreffer:
+    """
+    Ein Suchtreffer samt Lage in der PDF.
+    """
+
+    __slots__ = ("artikel", "gruppe", "seite", "seiten_gruppe", "pdf_seite")
+
+    def __init__(self, artikel, gruppe, seite, seiten_gruppe, pdf_seite):
+        self.artikel = artikel
+        self.gruppe = gruppe
+        self.seite = seite
+        self.seiten_gruppe = seiten_gruppe
+        self.pdf_seite = pdf_seite
+
+    def als_dict(self):
+        return {
+            "ART_NR": self.artikel.ART_NR,
+            "HERST_ART_NR": self.artikel.HERST_ART_NR,
+            "ART_NAME": self.artikel.ART_NAME,
+            "gruppe": self.gruppe,
+            "seite": self.seite,
+            "seiten_gruppe": self.seiten_gruppe,
+            "pdf_seite": self.pdf_seite,
+        }
+
+
+# ============================================================
+# Suchindex
+# ============================================================
+
+class ArtikelSuchIndex:
+    """
+    Token-, Präfix- und Trigramm-Index über ART_NR, HERST_ART_NR und
+    ART_NAME der gruppierten Daten (artikel_lager_laden).
+    Alle Postings enthalten ART_NR.
+    """
+
+    def __init__(self, deckblatt=True):
+        self.deckblatt = deckblatt
+        self.fingerabdruck = None
+
+        self._artikel = {}          # ART_NR -> Artikel
+        self._suchnamen = {}        # ART_NR -> Wörter des Namens, mit " " verbunden
+        self._woerter = {}          # Wort -> {ART_NR}
+        self._vokabular = []        # alle Wörter sortiert (Präfixsuche)
+        self._trigramme = {}        # Trigramm -> {ART_NR}
+        self._herst_nr = {}         # normalisierte HERST_ART_NR -> {ART_NR}
+        self._herst_sortiert = []   # normalisierte HERST_ART_NR sortiert (Präfixsuche)
+        self._lage = {}             # ART_NR -> (Rang, Gruppe, Seite, Seiten der Gruppe, PDF-Seite)
+
+        self._lock = threading.Lock()
+
+    # ---------------- Aufbau ----------------
+
+    def aktualisieren(self, snapshot):
+        """
+        Bringt den Index auf den Stand des Snapshots.
+        Liefert (neu, geaendert, entfernt) oder None, wenn er schon aktuell war.
+        """
+        if snapshot.fingerabdruck == self.fingerabdruck:
+            return None
+
+        start = perf_counter()
+        _, _, gruppen_namen, gruppen = snapshot.daten
+        lage = self._lage_berechnen(gruppen_namen, gruppen)
+        neu = {art.ART_NR: art for g in gruppen_namen for art in gruppen[g]}
+
+        with self._lock:
+            alt = self._artikel
+
+            entfernt = [nr for nr in alt if nr not in neu]
+            geaendert = [nr for nr, art in neu.items() if nr in alt and alt[nr] != art]
+            hinzu = [nr for nr in neu if nr not in alt]
+
+            # Wenige Änderungen: sortierte Listen einzeln pflegen, sonst neu sortieren
+            einzeln = len(entfernt) + 2 * len(geaendert) + len(hinzu) <= NACHSORTIEREN_AB
+
+            for nr in entfernt + geaendert:
+                self._austragen(nr, einzeln)
+            for nr in geaendert + hinzu:
+                self._eintragen(neu[nr], einzeln)
+
+            if not einzeln:
+                self._vokabular = sorted(self._woerter)
+                self._herst_sortiert = sorted(self._herst_nr)
+
+            self._lage = lage
+            self.fingerabdruck = snapshot.fingerabdruck
+
+        logger.info(
+            "Suchindex aktualisiert: %d neu, %d geändert, %d entfernt in %.0f ms",
+            len(hinzu), len(geaendert), len(entfernt), (perf_counter() - start) * 1000,
+        )
+        return len(hinzu), len(geaendert), len(entfernt)
+
+    def _eintragen(self, art, einzeln=True):
+        nr = art.ART_NR
+        self._artikel[nr] = art
+
+        woerter = _woerter(art.ART_NAME)
+        self._suchnamen[nr] = " ".join(woerter)
+
+        for wort in set(woerter):
+            postings = self._woerter.get(wort)
+            if postings is None:
+                postings = self._woerter[wort] = set()
+                if einzeln:
+                    insort(self._vokabular, wort)
+            postings.add(nr)
+
+        for trigramm in set().union(*map(_trigramme, woerter)):
+            self._trigramme.setdefault(trigramm, set()).add(nr)
+
+        herst_nr = _herst_nr_normalisieren(art.HERST_ART_NR)
+        if herst_nr:
+            postings = self._herst_nr.get(herst_nr)
+            if postings is None:
+                postings = self._herst_nr[herst_nr] = set()
+                if einzeln:
+                    insort(self._herst_sortiert, herst_nr)
+            postings.add(nr)
+
+    def _austragen(self, nr, einzeln=True):
+        art = self._artikel.pop(nr)
+        woerter = self._suchnamen.pop(nr).split()
+
+        for wort in set(woerter):
+            postings = self._woerter[wort]
+            postings.discard(nr)
+            if not postings:
+                del self._woerter[wort]
+                if einzeln:
+                    del self._vokabular[bisect_left(self._vokabular, wort)]
+
+        for trigramm in set().union(*map(_trigramme, woerter)):
+            postings = self._trigramme[trigramm]
+            postings.discard(nr)
+            if not postings:
+                del self._trigramme[trigramm]
+
+        herst_nr = _herst_nr_normalisieren(art.HERST_ART_NR)
+        if herst_nr:
+            postings = self._herst_nr[herst_nr]
+            postings.discard(nr)
+            if not postings:
+                del self._herst_nr[herst_nr]
+                if einzeln:
+                    del self._herst_sortiert[bisect_left(self._herst_sortiert, herst_nr)]
+
+    def _lage_berechnen(self, gruppen_namen, gruppen):
+        """
+        ART_NR -> Lage in der PDF, Aufteilung wie seiten_aufteilen.
+        """
+        _, seitenhoehe = LAYOUT.seitenformat
+        zeilen_pro_seite = zeilen_pro_seite_berechnen(seitenhoehe)
+
+        lage = {}
+        rang = 0
+        pdf_seite = int(self.deckblatt)
+
+        for gruppenname in gruppen_namen:
+            artikel_liste = sorted(
+                gruppen.get(gruppenname, []),
+                key=lambda a: (a.get("ART_NAME") or "").lower()
+            )
+            if not artikel_liste:
+                continue
+
+            seiten_gruppe = -(-(len(artikel_liste) + LAYOUT.extra_leerzeilen) // zeilen_pro_seite)
+
+            for i, art in enumerate(artikel_liste):
+                seite = i // zeilen_pro_seite + 1
+                lage[art.ART_NR] = (rang, gruppenname, seite, seiten_gruppe, pdf_seite + seite)
+                rang += 1
+
+            pdf_seite += seiten_gruppe
+
+        return lage
+
+    # ---------------- Suche ----------------
+
+    def _praefix(self, sortiert, praefix):
+        """
+        Alle Einträge einer sortierten Liste, die mit praefix beginnen.
+        """
+        i = bisect_left(sortiert, praefix)
+        while i < len(sortiert) and sortiert[i].startswith(praefix):
+            yield sortiert[i]
+            i += 1
+
+    def _namen_treffer(self, woerter):
+        """
+        ART_NR aller Artikel, deren Name jedes Wort enthält
+        (ab 3 Zeichen als Teilwort über Trigramme, sonst als Wortanfang).
+        """
+        if not woerter:
+            return set()
+
+        # Das seltenste Wort liefert die Kandidaten, die übrigen werden nur geprüft
+        trigramm_postings = [
+            sorted((self._trigramme.get(t, ()) for t in _trigramme(wort)), key=len)
+            for wort in woerter if len(wort) >= 3
+        ]
+
+        if trigramm_postings:
+            postings = min(trigramm_postings, key=lambda p: len(p[0]))
+            kandidaten = postings[0]
+            for p in postings[1:]:
+                # Kleine Mengen direkt prüfen statt weiter zu schneiden
+                if len(kandidaten) <= DIREKT_PRUEFEN_BIS:
+                    break
+                kandidaten = kandidaten & p
+        else:
+            kandidaten = set()
+            for vollwort in self._praefix(self._vokabular, max(woerter, key=len)):
+                kandidaten |= self._woerter[vollwort]
+
+        # Trigramme passen noch nicht zwingend zusammen – alle Wörter am Namen prüfen
+        suchnamen = self._suchnamen
+        return {nr for nr in kandidaten if all(_wort_passt(suchnamen[nr], wort) for wort in woerter)}
+
+    def suchen(self, text, max_treffer=MAX_TREFFER):
+        """
+        Treffer für Cortexnr, HERST_ART_NR oder Namensteile.
+        Reihenfolge: exakte Cortexnr, exakte/beginnende HERST_ART_NR,
+        dann Namenstreffer in PDF-Reihenfolge.
+        """
+        text = (text or "").strip()
+        if not text:
+            return []
+
+        with self._lock:
+            gefunden = []
+            gesehen = set()
+
+            def aufnehmen(nummern):
+                for nr in sorted(nummern - gesehen, key=lambda n: self._lage[n][0]):
+                    gesehen.add(nr)
+                    gefunden.append(nr)
+
+            if text.isdigit() and int(text) in self._artikel:
+                aufnehmen({int(text)})
+
+            herst_nr = _herst_nr_normalisieren(text)
+            if herst_nr:
+                aufnehmen(self._herst_nr.get(herst_nr, set()))
+                for schluessel in self._praefix(self._herst_sortiert, herst_nr):
+                    if len(gefunden) >= max_treffer:
+                        break
+                    aufnehmen(self._herst_nr[schluessel])
+
+            rest = max_treffer - len(gefunden)
+            if rest > 0:
+                namen = self._namen_treffer(_woerter(text)) - gesehen
+                gefunden.extend(heapq.nsmallest(rest, namen, key=lambda n: self._lage[n][0]))
+
+            return [self._treffer(nr) for nr in gefunden[:max_treffer]]
+
+    def _treffer(self, nr):
+        _, gruppe, seite, seiten_gruppe, pdf_seite = self._lage[nr]
+        return ArtikelTreffer(self._artikel[nr], gruppe, seite, seiten_gruppe, pdf_seite)
+
+    def __len__(self):
+        return len(self._artikel)
+
+
+# ============================================================
+# Indizes je Quelle und Standort
+# ============================================================
+
+_INDIZES = OrderedDict()
+_INDIZES_LOCK = threading.Lock()
+
+
+def artikel_such_index(quelle=None, standort=None):
+    """
+    Suchindex zum aktuellen PDF-Snapshot von Quelle und Standort,
+    bei geändertem Snapshot inkrementell nachgeführt.
+    """
+    quelle = quelle or artikel_quelle()
+    snapshot = artikel_snapshot_holen(quelle, spalten=PDF_SPALTEN, standort=standort)
+    schluessel = (quelle.schluessel(), standort)
+
+    with _INDIZES_LOCK:
+        index = _INDIZES.get(schluessel)
+        if index is None:
+            index = _INDIZES[schluessel] = ArtikelSuchIndex()
+        _INDIZES.move_to_end(schluessel)
+        while len(_INDIZES) > MAX_INDIZES:
+            _INDIZES.popitem(last=False)
+
+    index.aktualisieren(snapshot)
+    return index
@@ -0,0 +1,253 @@
+"""
+Hilfsfunktionen für die Benchmark-Kommandos (manage.py bench_*).
+"""
+
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management import call_command
+from django.db import connections, transaction
+
+from firma_db import ARTIKEL_SPALTEN, AUSGESCHLOSSENE_WG_NUMMERN, UEBERGRUPPEN, fixture_schreiben
+
+
+def zeit_messen(funktion, wiederholungen=5):
+    """
+    Führt funktion mehrfach aus und liefert
+    (letztes_ergebnis, {"min_s", "median_s", "max_s"}).
+    """
+    dauern = []
+    ergebnis = None
+
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        ergebnis = funktion()
+        dauern.append(time.perf_counter() - start)
+
+    return ergebnis, {
+        "min_s": min(dauern),
+        "median_s": statistics.median(dauern),
+        "max_s": max(dauern),
+    }
+
+
+def speicher_messen(funktion):
+    """
+    Führt funktion einmal unter tracemalloc aus und liefert
+    (ergebnis, spitzen_bytes).
+    """
+    tracemalloc.start()
+    try:
+        ergebnis = funktion()
+        _, spitze = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return ergebnis, spitze
+
+
+# ============================================================
+# Eigene Benchmark-Datenbank
+# ============================================================
+
+SILBEN = ["ka", "bel", "pro", "fil", "al", "u", "schie", "ne", "stecker", "rah", "men", "led", "trag", "werk"]
+
+
+def bench_datenbank_anlegen(alias, pfad=None):
+    """
+    Registriert eine frische SQLite-Datenbank unter alias (Einstellungen
+    wie "default", z. B. WAL) und legt das Schema per migrate an.
+    Liefert den Pfad.
+    """
+    pfad = pfad or os.path.join(tempfile.mkdtemp(prefix="inventur_bench_"), f"{alias}.sqlite3")
+    if os.path.exists(pfad):
+        os.remove(pfad)
+
+    connections.databases[alias] = dict(connections.databases["default"], NAME=pfad)
+    call_command("migrate", "inventur", database=alias, verbosity=0)
+
+    return pfad
+
+
+def positionen_befuellen(alias, zeilen, inventuren=1, seed=4711):
+    """
+    Legt inventuren Inventuren mit zusammen zeilen synthetischen
+    Positionen an (Cortexnr 1..n je Inventur). Liefert die Inventur-IDs.
+    """
+    from inventur.models import Inventur, InventurPosition
+
+    zufall = random.Random(seed)
+    inventur_ids = [
+        Inventur.objects.using(alias).create(name=f"Bench {i}", created_at="2025-12-17").id
+        for i in range(inventuren)
+    ]
+
+    spalten = ["inventur_id", "Cortexnr", "Hersteller", "Artikelnr_Hersteller", "Artikelnaam",
+               "ART_ART_NR", "WOG_NAME", "WG_NAME", "WG_NR", "EINHEIT", "EINH_BEST"]
+    quote = connections[alias].ops.quote_name
+    sql = (
+        f"INSERT INTO {quote(InventurPosition._meta.db_table)} ({', '.join(map(quote, spalten))}) "
+        f"VALUES ({', '.join('%s' for _ in spalten)})"
+    )
+
+    def name():
+        return "".join(zufall.choice(SILBEN) for _ in range(zufall.randint(2, 5))).capitalize()
+
+    je_inventur = zeilen // inventuren
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        for inventur_id in inventur_ids:
+            batch = []
+            for cortexnr in range(1, je_inventur + 1):
+                wg_nr = zufall.randint(1, 90)
+                batch.append((
+                    inventur_id, cortexnr, name(), f"H-{zufall.randint(1, 99999)}",
+                    f"{name()} {zufall.randint(1, 500)} mm", "", "", f"WG {wg_nr}", wg_nr, "Stk", "",
+                ))
+                if len(batch) >= 10_000:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            cursor.executemany(sql, batch)
+
+    with connections[alias].cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    return inventur_ids
+
+
+# ============================================================
+# Synthetischer Artikelstamm (ART_STAMM_VW)
+# ============================================================
+
+KATALOG_SPALTEN = ARTIKEL_SPALTEN + ("Aktiv",)
+
+HERSTELLER = [
+    "3M Deutschland GmbH", "Avery Dennison", "Orafol Europe GmbH", "Hexis", "Mactac", "Kömmerling",
+    "3A Composites", "Felix Schoeller", "Mimaki Europe", "Roland DG", "Zünd Systemtechnik", "Würth",
+    "tesa SE", "Velcro", "Fischer", "Sihl GmbH", "Drytac", "Neschen Coating", "Heytex", "Mehler Texnologies",
+    None, "-",
+]
+
+MATERIALIEN = [
+    "Alu-Verbundplatte", "PVC-Hartschaumplatte", "Acrylglas XT", "Polyester-Gewebe", "Monomere Klebefolie",
+    "Polymere Digitaldruckfolie", "Gegossene Hochleistungsfolie", "Wabenkartonplatte", "Frontlit-Banner",
+    "Mesh-Banner", "Textil-Spannrahmenstoff", "Doppelseitiges Schaumklebeband", "Klettband Haken",
+    "Edelstahl-Abstandshalter", "Drahtseil-Abhängesystem", "Eco-Solvent-Tinte", "Laminierfolie",
+    "Schneidmesser Tangential", "Fräser Einschneider", "Versandkarton",
+]
+
+EIGENSCHAFTEN = [
+    "weiß", "schwarz", "transparent", "silber gebürstet", "signalrot", "verkehrsblau", "matt", "glänzend",
+    "seidenmatt", "permanent klebend", "wiederablösbar", "B1 schwer entflammbar", "UV-beständig",
+    "für Innen- und Außenanwendung", "mit grauem Kleber", "lösemittelfrei",
+]
+
+EINHEITEN = ["Stk", "m²", "lfm", "Rolle", "Pack", "Karton", "l"]
+
+
+def _wg_gewichte(zufall):
+    """
+    Realistische WG-Verteilung: die WGs der Übergruppen nach Zipf gewichtet
+    (wenige große, viele kleine), dazu Rest-WGs, ausgeschlossene WGs und
+    Artikel ohne WG.
+    """
+    gruppen_wg = sorted(wg for wg_set in UEBERGRUPPEN.values() for wg in wg_set)
+    zufall.shuffle(gruppen_wg)
+    belegt = set(gruppen_wg) | AUSGESCHLOSSENE_WG_NUMMERN
+    # Einige WGs ohne Übergruppe (landen als "WG 12" usw. in der Liste);
+    # mehr als ~35 Gruppen passen nicht mehr aufs Deckblatt
+    rest_wg = sorted(zufall.sample([wg for wg in range(1, 100) if wg not in belegt], 5))
+
+    wg_nummern, gewichte = [], []
+    for rang, wg in enumerate(gruppen_wg, start=1):
+        wg_nummern.append(wg)
+        gewichte.append(0.85 / rang)
+    summe = sum(gewichte)
+    gewichte = [g * 0.85 / summe for g in gewichte]
+
+    for wg in rest_wg:
+        wg_nummern.append(wg)
+        gewichte.append(0.08 / len(rest_wg))
+    for wg in sorted(AUSGESCHLOSSENE_WG_NUMMERN):
+        wg_nummern.append(wg)
+        gewichte.append(0.06 / len(AUSGESCHLOSSENE_WG_NUMMERN))
+
+    wg_nummern.append(None)
+    gewichte.append(0.01)
+    return wg_nummern, gewichte
+
+
+def synthetische_artikel(anzahl, seed=4711):
+    """
+    Erzeugt anzahl Zeilen wie ART_STAMM_VW (Spalten KATALOG_SPALTEN):
+    lange deutsche Artikelnamen, Herstellernummern, WG-Verteilung über
+    UEBERGRUPPEN sowie ein paar inaktive bzw. herausgefilterte Artikel.
+    Gleicher seed → gleiche Zeilen.
+    """
+    zufall = random.Random(seed)
+    wg_nummern, gewichte = _wg_gewichte(zufall)
+
+    # In Blöcken ziehen: random.choices je Zeile wäre der Engpass
+    block = 10_000
+    for start in range(0, anzahl, block):
+        wgs = zufall.choices(wg_nummern, gewichte, k=min(block, anzahl - start))
+
+        for art_nr, wg_nr in enumerate(wgs, start=start + 1):
+            hersteller = zufall.choice(HERSTELLER)
+            kuerzel = "".join(c for c in (hersteller or "XX") if c.isalpha())[:3].upper() or "XX"
+
+            name = " ".join((
+                zufall.choice(MATERIALIEN),
+                *zufall.sample(EIGENSCHAFTEN, zufall.randint(1, 4)),
+                zufall.choice((
+                    f"{zufall.choice((2, 3, 4, 5, 6, 10))} mm",
+                    f"{zufall.choice((1000, 1250, 1370, 1520, 1600))} mm x {zufall.choice((25, 50))} m",
+                    f"{zufall.choice((1000, 1500, 2050))} x {zufall.choice((2000, 3050, 4050))} mm",
+                    f"VE {zufall.choice((10, 25, 50, 100))} Stück",
+                )),
+            ))
+
+            yield (
+                art_nr,
+                hersteller,
+                f"{kuerzel}-{zufall.randint(100, 99999)}{zufall.choice(('', '-M', '/50', ' B1'))}",
+                name,
+                wg_nr,
+                zufall.choice((2, 4, 4, 5, 6, 7, 8, 9)),     # WOG_NR <= 3 fällt aus der Abfrage
+                f"WG {wg_nr}" if wg_nr is not None else None,
+                round(zufall.uniform(0.2, 900), 2),
+                zufall.choice(EINHEITEN),
+                zufall.choice(EINHEITEN),
+                zufall.choice((1.0, 1.0, 10.0, 25.0, 50.0)),
+                round(zufall.uniform(0, 500), 1),
+                0 if zufall.random() < 0.03 else 1,
+            )
+
+
+def katalog_schreiben(ziel, anzahl, seed=4711):
+    """
+    Schreibt einen synthetischen Artikelstamm als Fixture,
+    z. B. katalog_schreiben("sqlite:/tmp/katalog.sqlite", 100_000).
+    """
+    fixture_schreiben(ziel, KATALOG_SPALTEN, synthetische_artikel(anzahl, seed))
+
+
+def umgebung():
+    """
+    Versionen und Rechner, damit gespeicherte Ergebnisse vergleichbar bleiben.
+    """
+    import django
+    import reportlab
+
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "reportlab": reportlab.Version,
+        "plattform": platform.platform(),
+        "prozessor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
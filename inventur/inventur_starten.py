@@ -0,0 +1,91 @@
+"""
+"Inventur starten": friert den gefilterten Artikelstand aus dem ERP
+zum Stichtag als InventurPosition-Zeilen ein.
+
+PDF und Erfassung lesen danach über die Quelle "inventur:<id>"
+(siehe inventur.quellen) aus der lokalen Datenbank statt aus dem ERP.
+"""
+
+import datetime
+import logging
+from time import perf_counter
+
+from django.db import transaction
+
+from firma_db import ARTIKEL_SPALTEN, artikel_lager_laden
+from inventur.models import Inventur, InventurPosition
+from inventur.quellen import INVENTUR_FELDER
+
+
+logger = logging.getLogger(__name__)
+
+# Zeilen je INSERT (SQLite erlaubt max. 32766 Parameter je Anweisung)
+IMPORT_BATCH_GROESSE = 1000
+
+
+def _text(wert, max_laenge):
+    return ("" if wert is None else str(wert).strip())[:max_laenge]
+
+
+def _position_fabrik():
+    """
+    Baut aus einem Artikel-Datensatz (ARTIKEL_SPALTEN) eine InventurPosition.
+    Texte werden wie im ERP-Export bereinigt und auf die Feldlänge gekürzt.
+    """
+    zuordnung = []
+    for spalte in ARTIKEL_SPALTEN:
+        feld = InventurPosition._meta.get_field(INVENTUR_FELDER[spalte])
+        zuordnung.append((feld.name, feld.max_length if feld.get_internal_type() == "CharField" else None))
+
+    def position(inventur, artikel):
+        werte = {
+            name: _text(wert, max_laenge) if max_laenge else wert
+            for (name, max_laenge), wert in zip(zuordnung, artikel)
+        }
+        return InventurPosition(inventur=inventur, **werte)
+
+    return position
+
+
+def inventur_starten(name, standort="A", stichtag=None, quelle=None, batch_groesse=IMPORT_BATCH_GROESSE):
+    """
+    Legt eine Inventur an und kopiert alle Artikel des Standorts
+    (gefiltert wie für die PDF) in einer Transaktion als Positionen hinein.
+    Liefert die Inventur.
+    """
+    stichtag = stichtag or datetime.date.today()
+
+    start = perf_counter()
+    anzahl, _, sortierte_gruppen, gruppen = artikel_lager_laden(quelle, ARTIKEL_SPALTEN, standort=standort)
+    dauer_laden = perf_counter() - start
+
+    position = _position_fabrik()
+
+    start = perf_counter()
+    with transaction.atomic():
+        inventur = Inventur.objects.create(
+            name=name,
+            standort=standort,
+            stichtag=stichtag,
+            created_at=datetime.date.today(),
+        )
+
+        batch = []
+        for gruppenname in sortierte_gruppen:
+            for artikel in gruppen[gruppenname]:
+                batch.append(position(inventur, artikel))
+                if len(batch) >= batch_groesse:
+                    InventurPosition.objects.bulk_create(batch)
+                    batch = []
+
+        if batch:
+            InventurPosition.objects.bulk_create(batch)
+
+    dauer_schreiben = perf_counter() - start
+
+    logger.info(
+        "Inventur %s (%s, Standort %s) gestartet: %s Positionen, Laden %.2fs, Schreiben %.2fs",
+        inventur.id, name, standort, anzahl, dauer_laden, dauer_schreiben,
+    )
+
+    return inventur
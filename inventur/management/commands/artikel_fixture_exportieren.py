@@ -0,0 +1,39 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from firma_db import artikel_quelle_aus_text, fixture_schreiben
+
+
+class Command(BaseCommand):
+    help = (
+        "Exportiert die Artikelabfrage aus einer Quelle (Standard: ERP) "
+        "als SQLite-Spiegel, CSV- oder Parquet-Fixture für Offline-Tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "ziel",
+            help="Ziel, z. B. sqlite:/tmp/artikel.sqlite oder csv:/tmp/artikel.csv",
+        )
+        parser.add_argument(
+            "--quelle",
+            default="pyodbc",
+            help="Quelle wie in INVENTUR_ARTIKEL_QUELLE (Standard: pyodbc)",
+        )
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"])
+
+        start = perf_counter()
+        spalten, zeilen = quelle.zeilen_laden()
+        dauer_laden = perf_counter() - start
+
+        start = perf_counter()
+        fixture_schreiben(options["ziel"], spalten, zeilen)
+        dauer_schreiben = perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(zeilen)} Artikel aus {quelle.name} exportiert nach {options['ziel']} "
+            f"(Laden {dauer_laden:.2f}s, Schreiben {dauer_schreiben:.2f}s)"
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from firma_db import artikel_quelle_aus_text
+from inventur.spiegel import BLOCK_GROESSE, spiegel_abgleichen, spiegel_quelle
+
+
+class Command(BaseCommand):
+    help = (
+        "Gleicht den lokalen Artikel-Spiegel inkrementell mit dem ERP ab "
+        "(Prüfsummen je ART_NR-Block, nur geänderte Blöcke werden übertragen). "
+        "PDFs lesen den Spiegel mit INVENTUR_ARTIKEL_QUELLE=spiegel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quelle",
+            help="Quelle wie in INVENTUR_ARTIKEL_QUELLE (Standard: INVENTUR_SPIEGEL_QUELLE bzw. pyodbc)",
+        )
+        parser.add_argument("--blockgroesse", type=int, default=BLOCK_GROESSE, help="ART_NR je Block")
+        parser.add_argument("--voll", action="store_true", help="Alle Blöcke zeilenweise vergleichen")
+
+    def handle(self, *args, **options):
+        if options["blockgroesse"] < 1:
+            raise CommandError("--blockgroesse muss mindestens 1 sein")
+
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else spiegel_quelle()
+        if quelle.name == "spiegel":
+            raise CommandError("Der Spiegel kann nicht aus sich selbst abgeglichen werden")
+
+        abgleich = spiegel_abgleichen(quelle, options["blockgroesse"], options["voll"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Spiegel abgeglichen in {abgleich.dauer_s:.2f}s{' (voll)' if abgleich.voll else ''}: "
+            f"{abgleich.bloecke_geaendert} von {abgleich.bloecke} Blöcken geändert, "
+            f"{abgleich.zeilen_uebertragen} Zeilen übertragen "
+            f"(neu {abgleich.neu}, geändert {abgleich.geaendert}, entfernt {abgleich.entfernt})"
+        ))
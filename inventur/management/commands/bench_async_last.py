@@ -0,0 +1,122 @@
+import asyncio
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from firma_db import SNAPSHOT_CACHE, ArtikelQuelle, artikel_quelle, artikel_quelle_aus_text, artikel_quelle_setzen
+from inventur.pdf_async import PDF_DIENST
+from inventur.pdf_cache import PDF_CACHE
+
+
+class VerzoegerteQuelle(ArtikelQuelle):
+    """
+    Stub für das ERP: liefert die Zeilen einer lokalen Quelle
+    mit künstlicher Latenz je Abfrage.
+    """
+
+    def __init__(self, quelle, verzoegerung):
+        self.quelle = quelle
+        self.verzoegerung = verzoegerung
+        self.name = f"verzoegert:{quelle.name}"
+
+    def zeilen_iterieren(self, *args, **kwargs):
+        time.sleep(self.verzoegerung)
+        yield from self.quelle.zeilen_iterieren(*args, **kwargs)
+
+    def schluessel(self):
+        return (self.name,) + self.quelle.schluessel()
+
+
+class Command(BaseCommand):
+    help = (
+        "Lasttest: viele gleichzeitige PDF-Anfragen gegen die synchrone View "
+        "(Thread-Worker wie unter WSGI) und gegen die ASGI-View."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--anfragen", type=int, default=20)
+        parser.add_argument("--worker", type=int, default=8, help="Threads für die synchrone View")
+        parser.add_argument("--verzoegerung", type=float, default=0.5, help="ERP-Latenz je Abfrage in s")
+        parser.add_argument("--engine", default="canvas")
+
+    # Test-Clients senden Host "testserver"
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        artikel_quelle_setzen(VerzoegerteQuelle(quelle, options["verzoegerung"]))
+
+        # Eigenes Cache-Verzeichnis, damit jeder Durchlauf kalt startet
+        PDF_CACHE.verzeichnis = tempfile.mkdtemp(prefix="inventur_bench_")
+
+        anfragen = [
+            f"?site={'AB'[i % 2]}&engine={options['engine']}" for i in range(options["anfragen"])
+        ]
+
+        self.stdout.write(
+            f"{len(anfragen)} Anfragen, ERP-Latenz {options['verzoegerung']}s, "
+            f"Engine {options['engine']}, {quelle!r}"
+        )
+
+        dauer, zeiten, status = self._synchron(anfragen, options["worker"])
+        self._ausgeben(f"sync ({options['worker']} Threads)", dauer, zeiten, status)
+
+        dauer, zeiten, status = self._asynchron(anfragen)
+        self._ausgeben("async", dauer, zeiten, status)
+        self.stdout.write(f"  {PDF_DIENST.kennzahlen()}")
+
+    def _kalt_starten(self):
+        SNAPSHOT_CACHE.invalidieren()
+        PDF_CACHE.leeren()
+
+    def _synchron(self, anfragen, worker):
+        self._kalt_starten()
+        client = Client()
+
+        def abrufen(query):
+            start = time.perf_counter()
+            response = client.get(f"/startseite/{query}")
+            b"".join(response.streaming_content)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(worker) as pool:
+            ergebnisse = list(pool.map(abrufen, anfragen))
+        dauer = time.perf_counter() - start
+
+        return dauer, [e[0] for e in ergebnisse], [e[1] for e in ergebnisse]
+
+    def _asynchron(self, anfragen):
+        self._kalt_starten()
+        client = AsyncClient()
+
+        async def abrufen(query):
+            start = time.perf_counter()
+            response = await client.get(f"/inventur_pdf_async/{query}")
+            if response.streaming:
+                [block async for block in response.streaming_content]
+            return time.perf_counter() - start, response.status_code
+
+        async def alle():
+            return await asyncio.gather(*(abrufen(q) for q in anfragen))
+
+        start = time.perf_counter()
+        ergebnisse = asyncio.run(alle())
+        dauer = time.perf_counter() - start
+
+        return dauer, [e[0] for e in ergebnisse], [e[1] for e in ergebnisse]
+
+    def _ausgeben(self, name, dauer, zeiten, status):
+        zeiten = sorted(zeiten)
+        p95 = zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.95))]
+        codes = ", ".join(f"{code}×{status.count(code)}" for code in sorted(set(status)))
+
+        self.stdout.write(
+            f"{name:<20}{dauer:>8.2f}s gesamt{len(zeiten) / dauer:>8.1f} Anfragen/s"
+            f"  p50 {statistics.median(zeiten):.2f}s  p95 {p95:.2f}s  [{codes}]"
+        )
@@ -0,0 +1,115 @@
+from io import BytesIO
+from itertools import groupby
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from reportlab.lib import colors
+from reportlab.platypus import Table, TableStyle
+
+from firma_db import PDF_SPALTEN, STANDORTE, artikel_lager_laden, artikel_quelle, artikel_quelle_aus_text
+from inventur import pdf
+from inventur.benchmark import speicher_messen, zeit_messen
+
+
+# Original, da pdf.seiten_aufteilen für die Variante je Gruppe ersetzt wird
+_seiten_aufteilen = pdf.seiten_aufteilen
+
+
+def _tabelle_je_seite_neu_aufbauen(artikel_zeilen):
+    """
+    Bisherige Implementierung: TableStyle, Kopf und Zeilenhöhen je Seite neu.
+    """
+    daten = [list(pdf.TABELLEN_KOPF)]
+
+    for artikel in artikel_zeilen:
+        daten.append([
+            pdf.tabellenzelle_formatieren(artikel.get("ART_NR") if artikel else "", pdf.SPALTEN_BREITEN[0]),
+            pdf.tabellenzelle_formatieren(artikel.get("HERST_NAME") if artikel else "", pdf.SPALTEN_BREITEN[1]),
+            pdf.tabellenzelle_formatieren(artikel.get("HERST_ART_NR") if artikel else "", pdf.SPALTEN_BREITEN[2]),
+            pdf.tabellenzelle_formatieren(artikel.get("ART_NAME") if artikel else "", pdf.SPALTEN_BREITEN[3]),
+            "", "", "", "",
+        ])
+
+    zeilenhoehen = [pdf.LAYOUT.kopfzeile_hoehe] + [pdf.LAYOUT.tabellenzeile_hoehe] * (len(daten) - 1)
+
+    tabelle = Table(daten, colWidths=pdf.SPALTEN_BREITEN, rowHeights=zeilenhoehen, repeatRows=1)
+    tabelle.setStyle(TableStyle(list(pdf.INVENTUR_TABELLEN_STIL.getCommands())))
+    return tabelle
+
+
+def _uebersicht_mit_box_je_zeile(titel, gruppennamen, artikel_anzahlen, zeilen_pro_seite, tabellenbreite):
+    """
+    Bisherige Implementierung: zwei BOX-Befehle je Gruppe.
+    """
+    daten = [[titel, "Seiten", "", ""]]
+    for gruppenname in gruppennamen:
+        seiten = pdf.seitenanzahl_fuer_gruppe_berechnen(artikel_anzahlen.get(gruppenname, 0), zeilen_pro_seite)
+        daten.append([gruppenname, str(seiten), "", ""])
+
+    spalte_name = max(120, tabellenbreite - 30 - 2 * 16)
+    tabelle = Table(daten, colWidths=[spalte_name, 30, 16, 16], repeatRows=1)
+
+    checkbox_stile = []
+    for zeile in range(1, len(daten)):
+        checkbox_stile.append(("BOX", (2, zeile), (2, zeile), 0.8, colors.black))
+        checkbox_stile.append(("BOX", (3, zeile), (3, zeile), 0.8, colors.black))
+
+    tabelle.setStyle(TableStyle(list(pdf.UEBERSICHT_KOPF_STIL.getCommands()) + checkbox_stile))
+    return tabelle
+
+
+def _seiten_je_gruppe(gruppen_namen, gruppen, zeilen_pro_seite, seiten_auswahl=None):
+    """
+    Variante "eine Table je Gruppe": alle Zeilen einer Gruppe in einer Tabelle,
+    ReportLab bricht sie per repeatRows/split selbst um (Kopf-/Fußzeilen
+    stimmen dabei nicht, für die Zeitmessung unerheblich).
+    """
+    for gruppenname, seiten in groupby(
+        _seiten_aufteilen(gruppen_namen, gruppen, zeilen_pro_seite, seiten_auswahl),
+        key=lambda seite: seite[0],
+    ):
+        seiten = list(seiten)
+        yield gruppenname, 1, len(seiten), [zeile for *_, seiten_daten in seiten for zeile in seiten_daten]
+
+
+class Command(BaseCommand):
+    help = (
+        "Zeit- und Speicherprofil von doc.build: Tabellen je Seite neu aufgebaut vs. geteilte Stile "
+        "vs. eine Table je Gruppe (Umbruch durch ReportLab)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--site", default="A", choices=sorted(STANDORTE))
+        parser.add_argument("--wiederholungen", type=int, default=3)
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        site = options["site"]
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(quelle, PDF_SPALTEN, standort=site)
+        label = STANDORTE[site]["label"]
+
+        def erstellen():
+            puffer = BytesIO()
+            pdf.inventur_pdf_erstellen(puffer, gruppen_namen, gruppen, label)
+            return len(puffer.getvalue())
+
+        def vorher():
+            with mock.patch.object(pdf, "inventur_tabelle_fuer_seite_erstellen", _tabelle_je_seite_neu_aufbauen), \
+                    mock.patch.object(pdf, "gruppen_uebersichtstabelle_erstellen", _uebersicht_mit_box_je_zeile):
+                return erstellen()
+
+        def je_gruppe():
+            with mock.patch.object(pdf, "seiten_aufteilen", _seiten_je_gruppe):
+                return erstellen()
+
+        self.stdout.write(f"{sum(len(a) for a in gruppen.values())} Artikel, {len(gruppen_namen)} Gruppen, {quelle!r}")
+
+        for name, funktion in (("vorher", vorher), ("nachher", erstellen), ("je Gruppe", je_gruppe)):
+            groesse, zeiten = zeit_messen(funktion, options["wiederholungen"])
+            _, spitze = speicher_messen(funktion)
+            self.stdout.write(
+                f"{name:<10}{zeiten['median_s']:>10.3f}s (min {zeiten['min_s']:.3f}s)"
+                f"{spitze / 2**20:>10.1f} MiB Spitze{groesse / 2**20:>10.2f} MiB PDF"
+            )
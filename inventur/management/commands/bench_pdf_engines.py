@@ -0,0 +1,43 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from firma_db import PDF_SPALTEN, STANDORTE, artikel_lager_laden, artikel_quelle, artikel_quelle_aus_text
+from inventur import pdf
+from inventur.benchmark import speicher_messen, zeit_messen
+
+
+class Command(BaseCommand):
+    help = "Vergleicht die PDF-Engines (Platypus vs. Canvas): Seiten pro Sekunde und Speicherspitze."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--site", default="A", choices=sorted(STANDORTE))
+        parser.add_argument("--wiederholungen", type=int, default=3)
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        site = options["site"]
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(quelle, PDF_SPALTEN, standort=site)
+        label = STANDORTE[site]["label"]
+
+        zeilen_pro_seite = pdf.zeilen_pro_seite_berechnen(pdf.LAYOUT.seitenformat[1])
+        seiten = 1 + sum(1 for _ in pdf.seiten_aufteilen(gruppen_namen, gruppen, zeilen_pro_seite))
+
+        self.stdout.write(f"{sum(len(a) for a in gruppen.values())} Artikel, {seiten} Seiten, {quelle!r}")
+
+        for name, erstellen in pdf.PDF_ENGINES.items():
+            def lauf():
+                # Text-Cache leeren, damit beide Engines gleich starten
+                pdf.TEXT_EINPASSER.kuerzen.cache_clear()
+                puffer = BytesIO()
+                erstellen(puffer, gruppen_namen, gruppen, label)
+                return len(puffer.getvalue())
+
+            groesse, zeiten = zeit_messen(lauf, options["wiederholungen"])
+            _, spitze = speicher_messen(lauf)
+
+            self.stdout.write(
+                f"{name:<10}{zeiten['median_s']:>9.3f}s{seiten / zeiten['median_s']:>10.0f} Seiten/s"
+                f"{spitze / 2**20:>9.1f} MiB Spitze{groesse / 2**20:>9.2f} MiB PDF"
+            )
@@ -0,0 +1,57 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+
+from firma_db import PDF_SPALTEN, STANDORTE, artikel_lager_laden, artikel_quelle, artikel_quelle_aus_text
+from inventur import pdf
+from inventur.benchmark import zeit_messen
+from inventur.pdf_parallel import inventur_pdf_parallel_erstellen
+
+
+class Command(BaseCommand):
+    help = "Vergleicht serielles und paralleles Rendern der Inventur-PDF bei steigender Prozesszahl."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--site", default="A", choices=sorted(STANDORTE))
+        parser.add_argument("--engine", default="platypus", choices=sorted(pdf.PDF_ENGINES))
+        parser.add_argument("--prozesse", type=int, nargs="+", default=[2, 4])
+        parser.add_argument("--wiederholungen", type=int, default=3)
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        site = options["site"]
+        engine = options["engine"]
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(quelle, PDF_SPALTEN, standort=site)
+        label = STANDORTE[site]["label"]
+
+        self.stdout.write(f"{sum(len(a) for a in gruppen.values())} Artikel, Engine {engine}, {quelle!r}")
+
+        def seriell():
+            puffer = BytesIO()
+            pdf.PDF_ENGINES[engine](puffer, gruppen_namen, gruppen, label)
+            return puffer
+
+        _, zeiten = zeit_messen(seriell, options["wiederholungen"])
+        basis = zeiten["median_s"]
+        self.stdout.write(f"{'seriell':<14}{basis:>9.3f}s")
+
+        for prozesse in options["prozesse"]:
+            spawn = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=prozesse, mp_context=spawn) as pool:
+                def parallel():
+                    puffer = BytesIO()
+                    inventur_pdf_parallel_erstellen(
+                        puffer, gruppen_namen, gruppen, label, engine=engine, pool=pool, prozesse=prozesse
+                    )
+                    return puffer
+
+                # Erster Lauf wärmt die Pool-Prozesse auf (Import von ReportLab)
+                parallel()
+                _, zeiten = zeit_messen(parallel, options["wiederholungen"])
+
+            self.stdout.write(
+                f"{f'{prozesse} Prozesse':<14}{zeiten['median_s']:>9.3f}s{basis / zeiten['median_s']:>8.2f}x"
+            )
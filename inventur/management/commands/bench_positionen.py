@@ -0,0 +1,70 @@
+import os
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+
+from inventur.benchmark import bench_datenbank_anlegen, positionen_befuellen, zeit_messen
+from inventur.models import InventurPosition
+
+
+ALIAS = "bench_positionen"
+
+
+class Command(BaseCommand):
+    help = (
+        "Legt eine eigene SQLite-Datenbank mit vielen InventurPosition-Zeilen an und misst "
+        "Blättern (OFFSET vs. Keyset), Gruppieren nach WG und Einzelzugriff – mit und ohne Index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zeilen", type=int, default=1_000_000)
+        parser.add_argument("--inventuren", type=int, default=4, help="Zeilen verteilt auf so viele Inventuren")
+        parser.add_argument("--seitengroesse", type=int, default=100)
+        parser.add_argument("--pfad", help="SQLite-Datei (Standard: temporär)")
+        parser.add_argument("--wiederholungen", type=int, default=5)
+
+    def handle(self, *args, **options):
+        pfad = bench_datenbank_anlegen(ALIAS, options["pfad"])
+
+        start = perf_counter()
+        inventur_ids = positionen_befuellen(ALIAS, options["zeilen"], options["inventuren"])
+        # Mittlere Inventur messen, nicht die erste oder letzte
+        inventur_id = inventur_ids[len(inventur_ids) // 2]
+        self.stdout.write(
+            f"{options['zeilen']} Positionen in {options['inventuren']} Inventuren angelegt "
+            f"({perf_counter() - start:.1f}s, {os.path.getsize(pfad) / 2**20:.0f} MiB, {pfad})"
+        )
+
+        self._messen(inventur_id, options["seitengroesse"], options["wiederholungen"], "mit Index")
+
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('DROP INDEX "inventurposition_wg_name"')
+        self._messen(inventur_id, options["seitengroesse"], options["wiederholungen"], "ohne Index (wg_name)")
+
+        connections[ALIAS].close()
+
+    def _messen(self, inventur_id, seitengroesse, wiederholungen, titel):
+        positionen = InventurPosition.objects.using(ALIAS).filter(inventur_id=inventur_id)
+        anzahl = positionen.count()
+        mitte = anzahl // 2
+
+        # Letzte Zeile vor der mittleren Seite als Keyset-Marke
+        marke = positionen.sortiert().values_list("WG_NR", "name_klein", "id")[mitte - 1]
+
+        abfragen = {
+            "Seite 1 (OFFSET 0)": lambda: list(positionen.sortiert()[:seitengroesse]),
+            f"Seite Mitte (OFFSET {mitte})": lambda: list(positionen.sortiert()[mitte:mitte + seitengroesse]),
+            "Seite Mitte (Keyset)": lambda: list(positionen.nach(*marke)[:seitengroesse]),
+            "Gruppieren nach WG": lambda: list(
+                positionen.values("WG_NR").annotate(anzahl=Count("id")).order_by("WG_NR")
+            ),
+            "Eine WG sortiert": lambda: list(positionen.filter(WG_NR=42).sortiert()),
+            "Einzelzugriff Cortexnr": lambda: positionen.get(Cortexnr=mitte),
+        }
+
+        self.stdout.write(f"\n{titel}: Inventur {inventur_id} mit {anzahl} Positionen")
+        for name, abfrage in abfragen.items():
+            _, zeiten = zeit_messen(abfrage, wiederholungen)
+            self.stdout.write(f"  {name:<28}{zeiten['median_s'] * 1000:>10.2f} ms")
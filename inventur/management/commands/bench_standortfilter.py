@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+
+from firma_db import (
+    AUSGESCHLOSSENE_WG_NUMMERN,
+    PDF_SPALTEN,
+    STANDORTE,
+    UEBERGRUPPEN,
+    artikel_lager_laden,
+    artikel_nach_warengruppen_gruppieren,
+    artikel_quelle,
+    artikel_quelle_aus_text,
+    artikel_typ,
+    gruppen_fuer_standort_filtern,
+)
+from inventur.benchmark import zeit_messen
+
+
+def _filtern_nach_laden(quelle, standort):
+    """
+    Bisheriger Weg: alle aktiven Artikel laden und erst
+    in Python nach WG und Standort filtern.
+    """
+    typ = artikel_typ(PDF_SPALTEN)
+    zeilen = 0
+    artikel = []
+
+    for batch in quelle.zeilen_iterieren(PDF_SPALTEN):
+        zeilen += len(batch)
+        artikel.extend(map(typ._make, batch))
+
+    gruppen = artikel_nach_warengruppen_gruppieren(artikel, UEBERGRUPPEN, AUSGESCHLOSSENE_WG_NUMMERN)
+    gruppen_namen, gruppen = gruppen_fuer_standort_filtern(
+        list(gruppen), gruppen, STANDORTE[standort]["skip_groups"]
+    )
+
+    return zeilen, sum(len(a) for a in gruppen.values())
+
+
+def _filtern_in_abfrage(quelle, standort):
+    """
+    Neuer Weg: Standort- und WG-Ausschluss in der WHERE-Klausel.
+    """
+    zeilen, _, _, gruppen = artikel_lager_laden(quelle, PDF_SPALTEN, standort=standort)
+    return zeilen, sum(len(a) for a in gruppen.values())
+
+
+class Command(BaseCommand):
+    help = (
+        "Vergleicht übertragene Zeilen und Laufzeit: Standortfilter nach dem Laden "
+        "gegenüber Filter in der SQL-Abfrage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--wiederholungen", type=int, default=5)
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        wiederholungen = options["wiederholungen"]
+
+        self.stdout.write(f"Quelle: {quelle!r}")
+        self.stdout.write(f"{'Standort':<10}{'Variante':<22}{'Zeilen':>10}{'Artikel':>10}{'Median s':>12}{'Min s':>10}")
+
+        for standort in STANDORTE:
+            for variante, funktion in (
+                ("Filter nach Laden", _filtern_nach_laden),
+                ("Filter in Abfrage", _filtern_in_abfrage),
+            ):
+                (zeilen, artikel), zeiten = zeit_messen(
+                    lambda: funktion(quelle, standort), wiederholungen
+                )
+                self.stdout.write(
+                    f"{standort:<10}{variante:<22}{zeilen:>10}{artikel:>10}"
+                    f"{zeiten['median_s']:>12.4f}{zeiten['min_s']:>10.4f}"
+                )
@@ -0,0 +1,167 @@
+import datetime
+import json
+import os
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from firma_db import (
+    ARTIKEL_SPALTEN, AUSGESCHLOSSENE_WG_NUMMERN, PDF_SPALTEN, UEBERGRUPPEN, SqliteQuelle,
+    artikel_lager_laden, artikel_nach_warengruppen_gruppieren,
+)
+from inventur import pdf
+from inventur.benchmark import katalog_schreiben, umgebung, zeit_messen
+
+
+def _git_stand():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _zellen_kuerzen(artikel_liste):
+    breiten = pdf.SPALTEN_BREITEN
+    padding = 2 * pdf.LAYOUT.zellen_padding_x
+    schrift, groesse = pdf.LAYOUT.schriftart, pdf.LAYOUT.schriftgroesse
+
+    for artikel in artikel_liste:
+        for i, spalte in enumerate(("ART_NR", "HERST_NAME", "HERST_ART_NR", "ART_NAME")):
+            pdf.text_auf_spaltenbreite_kuerzen(artikel.get(spalte), max(1, breiten[i] - padding), schrift, groesse)
+
+
+def _text_kalt(artikel_liste):
+    # Ohne LRU-Treffer aus vorherigen Läufen
+    pdf.TEXT_EINPASSER.kuerzen.cache_clear()
+    _zellen_kuerzen(artikel_liste)
+
+
+def _seiten_aufteilen(gruppen_namen, gruppen):
+    _, seitenhoehe = pdf.LAYOUT.seitenformat
+    zeilen_pro_seite = pdf.zeilen_pro_seite_berechnen(seitenhoehe)
+    seiten = sum(1 for _ in pdf.seiten_aufteilen(gruppen_namen, gruppen, zeilen_pro_seite))
+    return seiten, pdf.seiten_gesamt_berechnen(gruppen_namen, gruppen, zeilen_pro_seite)
+
+
+def _pdf_bauen(engine, gruppen_namen, gruppen):
+    ausgabe = BytesIO()
+    pdf.PDF_ENGINES[engine](ausgabe, gruppen_namen, gruppen, "Benchmark")
+    return ausgabe.tell()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark-Suite auf einem synthetischen Artikelstamm (1k–500k Zeilen): "
+        "Laden, Gruppieren, Zellen kürzen, Seitenaufteilung und PDF-Aufbau einzeln, "
+        "Ergebnisse als JSON (mit --vergleich gegen einen früheren Lauf)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zeilen", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+        parser.add_argument("--seed", type=int, default=4711)
+        parser.add_argument("--wiederholungen", type=int, default=5)
+        parser.add_argument("--pdf-bis", type=int, default=100_000,
+                            help="PDF-Aufbau nur bis zu dieser Zeilenzahl (dauert am längsten)")
+        parser.add_argument("--engine", nargs="+", default=sorted(pdf.PDF_ENGINES), choices=sorted(pdf.PDF_ENGINES))
+        parser.add_argument("--ausgabe", help="JSON-Datei (Standard: bench_<Zeitstempel>.json)")
+        parser.add_argument("--vergleich", help="Früheres Ergebnis (JSON) zum Vergleich")
+
+    def handle(self, *args, **options):
+        if any(not 1 <= n <= 500_000 for n in options["zeilen"]):
+            raise CommandError("--zeilen muss zwischen 1 und 500000 liegen")
+
+        jetzt = datetime.datetime.now()
+        ausgabe = options["ausgabe"] or f"bench_{jetzt:%Y%m%d_%H%M%S}.json"
+        wiederholungen = options["wiederholungen"]
+
+        ergebnisse = []
+
+        def messen(zeilen, name, funktion, wiederholungen=wiederholungen, **werte):
+            ergebnis, zeiten = zeit_messen(funktion, wiederholungen)
+            eintrag = {"zeilen": zeilen, "messung": name, **werte, **zeiten}
+            ergebnisse.append(eintrag)
+            self.stdout.write(
+                f"{zeilen:>8} {name:<22} min {zeiten['min_s'] * 1000:10.1f} ms"
+                f"  median {zeiten['median_s'] * 1000:10.1f} ms"
+            )
+            return ergebnis
+
+        with tempfile.TemporaryDirectory(prefix="inventur_bench_") as verzeichnis:
+            for zeilen in options["zeilen"]:
+                pfad = os.path.join(verzeichnis, f"katalog_{zeilen}.sqlite")
+                katalog_schreiben(f"sqlite:{pfad}", zeilen, options["seed"])
+                quelle = SqliteQuelle(pfad)
+
+                # Laden inkl. Gruppieren, wie artikel_lager_laden es im Betrieb macht
+                anzahl, _, gruppen_namen, gruppen = messen(
+                    zeilen, "laden", lambda: artikel_lager_laden(quelle, PDF_SPALTEN)
+                )
+                artikel_liste = [artikel for g in gruppen_namen for artikel in gruppen[g]]
+
+                # Nur das Gruppieren auf vollen Datensätzen (ohne Abfrage)
+                _, _, _, alle = artikel_lager_laden(quelle, ARTIKEL_SPALTEN)
+                volle_liste = [artikel for g in alle.values() for artikel in g]
+                messen(zeilen, "gruppieren", lambda: artikel_nach_warengruppen_gruppieren(
+                    volle_liste, UEBERGRUPPEN, AUSGESCHLOSSENE_WG_NUMMERN
+                ), artikel=len(volle_liste))
+
+                messen(zeilen, "text_kuerzen_kalt", lambda: _text_kalt(artikel_liste), zellen=4 * anzahl)
+                messen(zeilen, "text_kuerzen_warm", lambda: _zellen_kuerzen(artikel_liste), zellen=4 * anzahl)
+
+                seiten, seiten_gesamt = messen(
+                    zeilen, "seiten_aufteilen", lambda: _seiten_aufteilen(gruppen_namen, gruppen)
+                )
+
+                if zeilen <= options["pdf_bis"]:
+                    for engine in options["engine"]:
+                        pdf.TEXT_EINPASSER.kuerzen.cache_clear()
+                        groesse = messen(
+                            zeilen, f"pdf_{engine}", lambda: _pdf_bauen(engine, gruppen_namen, gruppen),
+                            wiederholungen=1 if zeilen >= 50_000 else min(3, wiederholungen),
+                            seiten=seiten_gesamt,
+                        )
+                        ergebnisse[-1]["bytes"] = groesse
+
+                self.stdout.write(f"{zeilen:>8} {anzahl} Artikel in {len(gruppen_namen)} Gruppen, {seiten} Tabellenseiten")
+
+        bericht = {
+            "erstellt": jetzt.isoformat(timespec="seconds"),
+            "git": _git_stand(),
+            "seed": options["seed"],
+            "umgebung": umgebung(),
+            "ergebnisse": ergebnisse,
+        }
+        with open(ausgabe, "w", encoding="utf-8") as datei:
+            json.dump(bericht, datei, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Ergebnisse in {ausgabe}"))
+
+        if options["vergleich"]:
+            self._vergleichen(options["vergleich"], ergebnisse)
+
+    def _vergleichen(self, pfad, ergebnisse):
+        with open(pfad, encoding="utf-8") as datei:
+            frueher = json.load(datei)
+
+        alt = {(e["zeilen"], e["messung"]): e["median_s"] for e in frueher["ergebnisse"]}
+        self.stdout.write(f"\nVergleich mit {pfad} (git {frueher.get('git')}, {frueher.get('erstellt')}):")
+
+        for eintrag in ergebnisse:
+            vorher = alt.get((eintrag["zeilen"], eintrag["messung"]))
+            if not vorher:
+                continue
+            faktor = eintrag["median_s"] / vorher
+            zeile = (
+                f"{eintrag['zeilen']:>8} {eintrag['messung']:<22} "
+                f"{vorher * 1000:10.1f} ms -> {eintrag['median_s'] * 1000:10.1f} ms  ({faktor:5.2f}x)"
+            )
+            # Mehr als 10 % langsamer gilt als Rückschritt
+            if faktor > 1.1:
+                self.stdout.write(self.style.WARNING(zeile))
+            else:
+                self.stdout.write(zeile)
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from firma_db import PDF_SPALTEN, artikel_lager_laden, artikel_quelle, artikel_quelle_aus_text
+from inventur import pdf
+from inventur.benchmark import zeit_messen
+
+
+def _kuerzen_zeichenweise(text, max_breite_pt, schriftart, schriftgroesse):
+    """
+    Bisherige Implementierung (zeichenweise kürzen) als Vergleich.
+    """
+    text = pdf.db_wert_bereinigen(text)
+    if not text:
+        return ""
+
+    if stringWidth(text, schriftart, schriftgroesse) <= max_breite_pt:
+        return text
+
+    auslassung = "…"
+    auslassung_breite = stringWidth(auslassung, schriftart, schriftgroesse)
+
+    gekuerzt = text
+    while gekuerzt and (stringWidth(gekuerzt, schriftart, schriftgroesse) + auslassung_breite) > max_breite_pt:
+        gekuerzt = gekuerzt[:-1]
+
+    return gekuerzt + auslassung if gekuerzt else auslassung
+
+
+def _zeilen_formatieren(artikel_liste, kuerzen):
+    breiten = pdf.SPALTEN_BREITEN
+    padding = 2 * pdf.LAYOUT.zellen_padding_x
+    schrift = pdf.LAYOUT.schriftart
+    groesse = pdf.LAYOUT.schriftgroesse
+
+    ergebnis = []
+    for artikel in artikel_liste:
+        ergebnis.append([
+            kuerzen(artikel.get(spalte), max(1, breiten[i] - padding), schrift, groesse)
+            for i, spalte in enumerate(("ART_NR", "HERST_NAME", "HERST_ART_NR", "ART_NAME"))
+        ])
+    return ergebnis
+
+
+class Command(BaseCommand):
+    help = "Micro-Benchmark für das Kürzen der Tabellenzellen (Zeilen pro Sekunde)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--wiederholungen", type=int, default=3)
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else artikel_quelle()
+        _, _, _, gruppen = artikel_lager_laden(quelle, PDF_SPALTEN)
+        artikel_liste = [a for liste in gruppen.values() for a in liste]
+        wiederholungen = options["wiederholungen"]
+
+        referenz, zeiten_alt = zeit_messen(
+            lambda: _zeilen_formatieren(artikel_liste, _kuerzen_zeichenweise), wiederholungen
+        )
+
+        def neu_kalt():
+            pdf.TEXT_EINPASSER.kuerzen.cache_clear()
+            return _zeilen_formatieren(artikel_liste, pdf.text_auf_spaltenbreite_kuerzen)
+
+        ergebnis, zeiten_kalt = zeit_messen(neu_kalt, wiederholungen)
+        _, zeiten_warm = zeit_messen(
+            lambda: _zeilen_formatieren(artikel_liste, pdf.text_auf_spaltenbreite_kuerzen), wiederholungen
+        )
+
+        if ergebnis != referenz:
+            self.stderr.write(self.style.ERROR("Abweichende Ergebnisse zwischen alter und neuer Kürzung!"))
+
+        self.stdout.write(f"{len(artikel_liste)} Zeilen, {quelle!r}")
+        for name, zeiten in (
+            ("zeichenweise (alt)", zeiten_alt),
+            ("Einpasser, Cache kalt", zeiten_kalt),
+            ("Einpasser, Cache warm", zeiten_warm),
+        ):
+            self.stdout.write(
+                f"{name:<24}{zeiten['median_s']:>10.4f}s  {len(artikel_liste) / zeiten['median_s']:>12.0f} Zeilen/s"
+            )
@@ -0,0 +1,61 @@
+import json
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from inventur.benchmark import bench_datenbank_anlegen, positionen_befuellen
+from inventur.models import Inventur, InventurPosition
+from inventur.zaehlung import zaehlungen_uebernehmen
+
+
+ALIAS = "bench_zaehlungen"
+
+
+class Command(BaseCommand):
+    help = (
+        "Misst den Durchsatz der Zählungs-Übernahme (JSON parsen, prüfen, executemany-UPDATE) "
+        "auf einer eigenen SQLite-Datenbank mit den Einstellungen von 'default' (WAL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--positionen", type=int, default=100_000)
+        parser.add_argument("--stapel", type=int, nargs="+", default=[100, 1000, 5000])
+        parser.add_argument("--zeilen", type=int, default=50_000, help="Zählungen je Stapelgröße")
+        parser.add_argument("--pfad", help="SQLite-Datei (Standard: temporär)")
+
+    def handle(self, *args, **options):
+        pfad = bench_datenbank_anlegen(ALIAS, options["pfad"])
+        inventur_id, = positionen_befuellen(ALIAS, options["positionen"])
+        inventur = Inventur.objects.using(ALIAS).get(pk=inventur_id)
+
+        with connections[ALIAS].cursor() as cursor:
+            journal = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        self.stdout.write(f"{options['positionen']} Positionen, journal_mode={journal}, {pfad}")
+
+        zufall = random.Random(1)
+        for groesse in options["stapel"]:
+            stapel_anzahl = max(1, options["zeilen"] // groesse)
+            nutzlasten = []
+            for _ in range(stapel_anzahl):
+                nummern = zufall.sample(range(1, options["positionen"] + 1), groesse)
+                nutzlasten.append(json.dumps({"zaehlungen": [
+                    {"Cortexnr": n, "Anzahl": zufall.randint(0, 50), "Einheit_Rest": zufall.randint(0, 99) / 10}
+                    for n in nummern
+                ]}))
+
+            start = perf_counter()
+            for nutzlast in nutzlasten:
+                zaehlungen_uebernehmen(inventur, json.loads(nutzlast)["zaehlungen"], using=ALIAS)
+            dauer = perf_counter() - start
+
+            zeilen = stapel_anzahl * groesse
+            self.stdout.write(
+                f"Stapel {groesse:>6}: {zeilen:>7} Zählungen in {dauer:6.2f}s"
+                f"{zeilen / dauer:>10.0f} Zeilen/s{dauer / stapel_anzahl * 1000:>9.1f} ms/Stapel"
+            )
+
+        gezaehlt = InventurPosition.objects.using(ALIAS).filter(inventur=inventur, Anzahl__isnull=False).count()
+        self.stdout.write(f"{gezaehlt} Positionen mit Zählung")
+        connections[ALIAS].close()
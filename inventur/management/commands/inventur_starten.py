@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from firma_db import STANDORTE, artikel_quelle_aus_text
+from inventur.inventur_starten import inventur_starten
+from inventur.models import InventurPosition
+
+
+class Command(BaseCommand):
+    help = (
+        "Startet eine Inventur: friert den gefilterten Artikelstand eines Standorts "
+        "als InventurPosition-Zeilen ein (PDF danach per ?inventur=<id>)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Bezeichnung, z. B. 'Inventur 2025'")
+        parser.add_argument("--site", default="A", choices=sorted(STANDORTE))
+        parser.add_argument("--stichtag", type=datetime.date.fromisoformat, help="JJJJ-MM-TT (Standard: heute)")
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+
+    def handle(self, *args, **options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else None
+
+        inventur = inventur_starten(options["name"], options["site"], options["stichtag"], quelle)
+        anzahl = InventurPosition.objects.filter(inventur=inventur).count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Inventur {inventur.id} ({inventur.name}, Standort {inventur.standort}, "
+            f"Stichtag {inventur.stichtag}) mit {anzahl} Positionen angelegt"
+        ))
@@ -0,0 +1,90 @@
+import time
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from firma_db import artikel_quelle_aus_text
+from inventur.pdf import PDF_ENGINES
+from inventur.pdf_cache import PDF_CACHE
+from inventur.pdf_standorte import alle_standorte_rendern, alle_standorte_zip_schreiben
+from inventur.vorrendern import alle_standorte_vorrendern, vorrender_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Rendert die Inventur-PDF für alle Standorte parallel vorab in den PDF-Cache, "
+        "einmalig oder mit --intervall periodisch. Mit --einmal-laden werden die Artikel "
+        "nur einmal geladen und alle Standorte nacheinander in diesem Prozess gerendert; "
+        "--zip schreibt die PDFs zusätzlich in ein ZIP."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quelle", help="Artikel-Quelle, z. B. sqlite:/tmp/artikel.sqlite")
+        parser.add_argument("--engine", nargs="+", default=["platypus"], choices=sorted(PDF_ENGINES))
+        parser.add_argument("--prozesse", type=int, help="Anzahl Prozesse (Standard: je Standort einer)")
+        parser.add_argument("--intervall", type=float, default=0, help="Sekunden zwischen zwei Läufen (0 = einmalig)")
+        parser.add_argument("--einmal-laden", action="store_true", help="Ein Ladevorgang für alle Standorte")
+        parser.add_argument("--zip", help="PDFs aller Standorte in diese ZIP-Datei schreiben (nur eine Engine)")
+
+    def handle(self, *args, **options):
+        if options["zip"]:
+            if len(options["engine"]) != 1:
+                raise CommandError("--zip geht nur mit genau einer --engine")
+            self._zip_schreiben(options)
+            return
+
+        if not PDF_CACHE.aktiv:
+            raise CommandError("PDF-Cache ist abgeschaltet (INVENTUR_PDF_CACHE_MB=0)")
+
+        if options["einmal_laden"]:
+            self._einmal_laden(options)
+            return
+
+        with vorrender_pool(options["prozesse"]) as pool:
+            while True:
+                start = perf_counter()
+                ergebnisse = alle_standorte_vorrendern(options["engine"], options["quelle"], pool=pool)
+                dauer = perf_counter() - start
+
+                self._ergebnisse_ausgeben(ergebnisse, dauer, PDF_CACHE.verzeichnis)
+
+                if options["intervall"] <= 0:
+                    break
+                time.sleep(max(0.0, options["intervall"] - dauer))
+
+    def _ergebnisse_ausgeben(self, ergebnisse, dauer, ziel):
+        for ergebnis in ergebnisse:
+            status = "neu gerendert" if ergebnis["neu_gerendert"] else "unverändert"
+            self.stdout.write(
+                f"{ergebnis['standort']:<3}{ergebnis['engine']:<10}{status:<15}"
+                f"{ergebnis['artikel']:>8} Artikel  Laden {ergebnis['laden_s']:.2f}s"
+                f"  Rendern {ergebnis['rendern_s']:.2f}s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(ergebnisse)} PDFs in {dauer:.2f}s bereitgestellt ({ziel})"))
+
+    def _einmal_laden(self, options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else None
+
+        while True:
+            start = perf_counter()
+            ergebnisse = []
+            for engine in options["engine"]:
+                ergebnisse_engine = alle_standorte_rendern(quelle, engine)
+                for ergebnis in ergebnisse_engine:
+                    ergebnis["datei"].close()
+                ergebnisse.extend(ergebnisse_engine)
+            dauer = perf_counter() - start
+
+            self._ergebnisse_ausgeben(ergebnisse, dauer, PDF_CACHE.verzeichnis)
+
+            if options["intervall"] <= 0:
+                break
+            time.sleep(max(0.0, options["intervall"] - dauer))
+
+    def _zip_schreiben(self, options):
+        quelle = artikel_quelle_aus_text(options["quelle"]) if options["quelle"] else None
+
+        start = perf_counter()
+        with open(options["zip"], "wb") as ausgabe:
+            ergebnisse = alle_standorte_zip_schreiben(ausgabe, quelle, options["engine"][0])
+        self._ergebnisse_ausgeben(ergebnisse, perf_counter() - start, options["zip"])
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inventur',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('status', models.CharField(default='RUNNING', max_length=20)),
+                ('standort', models.CharField(default='A', max_length=5)),
+                ('stichtag', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventurPosition',
+            fields=[
+                ('Cortexnr', models.IntegerField(primary_key=True, serialize=False)),
+                ('Hersteller', models.CharField(max_length=200)),
+                ('Artikelnr_Hersteller', models.CharField(max_length=100)),
+                ('Artikelnaam', models.CharField(max_length=200)),
+                ('Verpackungseinheit', models.FloatField(blank=True, null=True)),
+                ('Anzahl', models.IntegerField(blank=True, null=True)),
+                ('Einheit_Rest', models.FloatField(blank=True, null=True)),
+                ('Anazahl', models.IntegerField(blank=True, null=True)),
+                ('ART_ART_NR', models.CharField(blank=True, default='', max_length=100)),
+                ('EK', models.FloatField(blank=True, null=True)),
+                ('WOG_NAME', models.CharField(blank=True, default='', max_length=50)),
+                ('WOG_NR', models.IntegerField(blank=True, null=True)),
+                ('WG_NAME', models.CharField(max_length=50)),
+                ('WG_NR', models.IntegerField()),
+                ('EINHEIT', models.CharField(max_length=10)),
+                ('EINH_UMR', models.FloatField(blank=True, null=True)),
+                ('EINH_BEST', models.CharField(blank=True, default='', max_length=10)),
+                ('Lager', models.FloatField(blank=True, null=True)),
+                ('inventur_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventur.inventur')),
+            ],
+        ),
+    ]
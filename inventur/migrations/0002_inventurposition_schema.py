@@ -0,0 +1,77 @@
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+# Spalten, die unverändert übernommen werden (alte Tabelle -> neue Tabelle)
+UEBERNOMMENE_SPALTEN = [
+    "Cortexnr", "Hersteller", "Artikelnr_Hersteller", "Artikelnaam",
+    "Verpackungseinheit", "Anzahl", "Einheit_Rest", "Anazahl", "ART_ART_NR",
+    "EK", "WOG_NAME", "WOG_NR", "WG_NAME", "WG_NR", "EINHEIT", "EINH_UMR",
+    "EINH_BEST", "Lager",
+]
+
+
+def positionen_kopieren(apps, schema_editor):
+    """
+    Kopiert die Positionen per INSERT … SELECT in die neue Tabelle
+    (neue id, Fremdschlüsselspalte heißt jetzt inventur_id).
+    """
+    alt = apps.get_model("inventur", "InventurPosition")._meta.db_table
+    neu = apps.get_model("inventur", "InventurPositionNeu")._meta.db_table
+    q = schema_editor.quote_name
+
+    spalten = ", ".join(q(s) for s in UEBERNOMMENE_SPALTEN)
+    schema_editor.execute(
+        f"INSERT INTO {q(neu)} ({q('inventur_id')}, {spalten}) "
+        f"SELECT {q('inventur_id_id')}, {spalten} FROM {q(alt)}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventur', '0001_initial'),
+    ]
+
+    # Cortexnr als globaler Primärschlüssel -> eigene id und (inventur, Cortexnr)
+    # eindeutig. Neuaufbau der Tabelle statt Umbau des Primärschlüssels an Ort und Stelle.
+    operations = [
+        migrations.CreateModel(
+            name='InventurPositionNeu',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('inventur', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='inventur.inventur')),
+                ('Cortexnr', models.PositiveIntegerField()),
+                ('Hersteller', models.CharField(max_length=200)),
+                ('Artikelnr_Hersteller', models.CharField(max_length=100)),
+                ('Artikelnaam', models.CharField(max_length=200)),
+                ('Verpackungseinheit', models.FloatField(blank=True, null=True)),
+                ('Anzahl', models.PositiveIntegerField(blank=True, null=True)),
+                ('Einheit_Rest', models.FloatField(blank=True, null=True)),
+                ('Anazahl', models.PositiveIntegerField(blank=True, null=True)),
+                ('ART_ART_NR', models.CharField(blank=True, default='', max_length=100)),
+                ('EK', models.FloatField(blank=True, null=True)),
+                ('WOG_NAME', models.CharField(blank=True, default='', max_length=50)),
+                ('WOG_NR', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('WG_NAME', models.CharField(max_length=50)),
+                ('WG_NR', models.PositiveSmallIntegerField()),
+                ('EINHEIT', models.CharField(max_length=10)),
+                ('EINH_UMR', models.FloatField(blank=True, null=True)),
+                ('EINH_BEST', models.CharField(blank=True, default='', max_length=10)),
+                ('Lager', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(models.F('inventur'), models.F('WG_NR'), django.db.models.functions.text.Lower('Artikelnaam'), name='inventurposition_wg_name')],
+                'constraints': [models.UniqueConstraint(fields=('inventur', 'Cortexnr'), name='inventurposition_inventur_cortexnr')],
+            },
+        ),
+        migrations.RunPython(positionen_kopieren, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='InventurPosition',
+        ),
+        migrations.RenameModel(
+            old_name='InventurPositionNeu',
+            new_name='InventurPosition',
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventur', '0002_inventurposition_schema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtikelSpiegelAbgleich',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('quelle', models.CharField(max_length=200)),
+                ('gestartet', models.DateTimeField()),
+                ('dauer_s', models.FloatField()),
+                ('blockgroesse', models.PositiveIntegerField()),
+                ('voll', models.BooleanField(default=False)),
+                ('bloecke', models.PositiveIntegerField()),
+                ('bloecke_geaendert', models.PositiveIntegerField()),
+                ('zeilen_uebertragen', models.PositiveIntegerField()),
+                ('neu', models.PositiveIntegerField()),
+                ('geaendert', models.PositiveIntegerField()),
+                ('entfernt', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArtikelSpiegelBlock',
+            fields=[
+                ('von', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('bis', models.PositiveIntegerField()),
+                ('anzahl', models.PositiveIntegerField()),
+                ('pruefsumme', models.CharField(max_length=40)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArtikelSpiegel',
+            fields=[
+                ('ART_NR', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('HERST_NAME', models.CharField(blank=True, max_length=200, null=True)),
+                ('HERST_ART_NR', models.CharField(blank=True, max_length=100, null=True)),
+                ('ART_NAME', models.CharField(blank=True, max_length=200, null=True)),
+                ('WG_NR', models.PositiveSmallIntegerField()),
+                ('WOG_NR', models.PositiveSmallIntegerField()),
+                ('WG_NAME', models.CharField(blank=True, max_length=50, null=True)),
+                ('EK', models.FloatField(blank=True, null=True)),
+                ('EINH', models.CharField(blank=True, max_length=10, null=True)),
+                ('EINH_BEST', models.CharField(blank=True, max_length=10, null=True)),
+                ('EINH_UMR', models.FloatField(blank=True, null=True)),
+                ('Lager', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(models.F('WG_NR'), django.db.models.functions.text.Lower('HERST_ART_NR'), models.F('ART_NR'), name='artikelspiegel_sortierung')],
+            },
+        ),
+    ]
@@ -1,30 +1,132 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 class Inventur(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=50)
     status = models.CharField(max_length=20, default="RUNNING")
+    standort = models.CharField(max_length=5, default="A")
     stichtag = models.DateField(null=True, blank=True)
     created_at = models.DateField()
 
+class InventurPositionQuerySet(models.QuerySet):
+
+    def sortiert(self):
+        """
+        Nach WG, darin nach Artikelname (wie die PDF) – nutzt den Index
+        inventurposition_wg_name, wenn vorher nach Inventur gefiltert wird.
+        """
+        return self.annotate(name_klein=Lower("Artikelnaam")).order_by("WG_NR", "name_klein", "id")
+
+    def nach(self, wg_nr, name_klein, position_id):
+        """
+        Keyset-Blättern: Positionen hinter (wg_nr, name_klein, id) in der
+        Reihenfolge von sortiert() – ohne OFFSET, gleich schnell auf jeder Seite.
+        """
+        # WG_NR >= wg_nr vorweg, damit der Index direkt an die Stelle springt
+        return self.sortiert().filter(WG_NR__gte=wg_nr).filter(
+            models.Q(WG_NR__gt=wg_nr)
+            | models.Q(name_klein__gt=name_klein)
+            | models.Q(name_klein=name_klein, id__gt=position_id)
+        )
+
+
 class InventurPosition(models.Model):
-    inventur_id = models.ForeignKey(Inventur, on_delete=models.CASCADE)
-    Cortexnr = models.IntegerField(primary_key=True)
+    id = models.AutoField(primary_key=True)
+    # Index über (inventur, Cortexnr) aus der Unique-Constraint deckt auch inventur allein ab
+    inventur = models.ForeignKey(Inventur, on_delete=models.CASCADE, db_index=False)
+    Cortexnr = models.PositiveIntegerField()
     Hersteller = models.CharField(max_length=200)
     Artikelnr_Hersteller = models.CharField(max_length=100)
     Artikelnaam = models.CharField(max_length=200)
-    Verpackungseinheit = models.FloatField()
-    Anzahl = models.IntegerField()
-    Einheit_Rest = models.FloatField()
-    Anazahl = models.IntegerField()
-    ART_ART_NR = models.CharField(max_length=100)
-    EK = models.FloatField()
-    WOG_NAME = models.CharField(max_length=50)
-    WOG_NR = models.IntegerField()
+    # Zählfelder – leer bis gezählt wurde
+    Verpackungseinheit = models.FloatField(null=True, blank=True)
+    Anzahl = models.PositiveIntegerField(null=True, blank=True)
+    Einheit_Rest = models.FloatField(null=True, blank=True)
+    Anazahl = models.PositiveIntegerField(null=True, blank=True)
+    ART_ART_NR = models.CharField(max_length=100, blank=True, default="")
+    EK = models.FloatField(null=True, blank=True)
+    WOG_NAME = models.CharField(max_length=50, blank=True, default="")
+    WOG_NR = models.PositiveSmallIntegerField(null=True, blank=True)
     WG_NAME = models.CharField(max_length=50)
-    WG_NR = models.IntegerField()
+    WG_NR = models.PositiveSmallIntegerField()
     EINHEIT = models.CharField(max_length=10)
-    EINH_UMR = models.FloatField()
+    EINH_UMR = models.FloatField(null=True, blank=True)
+    # Stand aus dem ERP zum Stichtag
+    EINH_BEST = models.CharField(max_length=10, blank=True, default="")
+    Lager = models.FloatField(null=True, blank=True)
+
+    objects = InventurPositionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["inventur", "Cortexnr"], name="inventurposition_inventur_cortexnr"),
+        ]
+        indexes = [
+            # "Alle Positionen einer Inventur nach WG, darin nach Name" (wie die PDF)
+            models.Index(
+                models.F("inventur"), models.F("WG_NR"), Lower("Artikelnaam"),
+                name="inventurposition_wg_name",
+            ),
+        ]
+
+
+class ArtikelSpiegel(models.Model):
+    """
+    Lokaler Spiegel der aktiven Artikel aus dbo.ART_STAMM_VW
+    (Spalten wie firma_db.ARTIKEL_SPALTEN), gepflegt von inventur.spiegel.
+    """
+    ART_NR = models.PositiveIntegerField(primary_key=True)
+    # NULL bleibt NULL (sortiert in der PDF vor leeren Texten)
+    HERST_NAME = models.CharField(max_length=200, null=True, blank=True)
+    HERST_ART_NR = models.CharField(max_length=100, null=True, blank=True)
+    ART_NAME = models.CharField(max_length=200, null=True, blank=True)
+    WG_NR = models.PositiveSmallIntegerField()
+    WOG_NR = models.PositiveSmallIntegerField()
+    WG_NAME = models.CharField(max_length=50, null=True, blank=True)
+    EK = models.FloatField(null=True, blank=True)
+    EINH = models.CharField(max_length=10, null=True, blank=True)
+    EINH_BEST = models.CharField(max_length=10, null=True, blank=True)
+    EINH_UMR = models.FloatField(null=True, blank=True)
+    Lager = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Reihenfolge der Artikelabfrage (WG_NR, HERST_ART_NR ohne Groß/klein)
+            models.Index(models.F("WG_NR"), Lower("HERST_ART_NR"), models.F("ART_NR"), name="artikelspiegel_sortierung"),
+        ]
+
+
+class ArtikelSpiegelBlock(models.Model):
+    """
+    Anzahl und Prüfsumme eines ART_NR-Blocks in der Quelle beim letzten Abgleich.
+    """
+    von = models.PositiveIntegerField(primary_key=True)
+    bis = models.PositiveIntegerField()
+    anzahl = models.PositiveIntegerField()
+    pruefsumme = models.CharField(max_length=40)
+
+
+class ArtikelSpiegelAbgleich(models.Model):
+    """
+    Protokoll eines Abgleichs: Dauer und übertragene Zeilen.
+    """
+    id = models.AutoField(primary_key=True)
+    quelle = models.CharField(max_length=200)
+    gestartet = models.DateTimeField()
+    dauer_s = models.FloatField()
+    blockgroesse = models.PositiveIntegerField()
+    voll = models.BooleanField(default=False)
+    bloecke = models.PositiveIntegerField()
+    bloecke_geaendert = models.PositiveIntegerField()
+    zeilen_uebertragen = models.PositiveIntegerField()
+    neu = models.PositiveIntegerField()
+    geaendert = models.PositiveIntegerField()
+    entfernt = models.PositiveIntegerField()
+
+    @property
+    def aenderungen(self):
+        return self.neu + self.geaendert + self.entfernt
 
 
 # Create your models here.
@@ -0,0 +1,813 @@
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from math import ceil
+from dataclasses import dataclass
+from time import perf_counter
+
+# ReportLab (Platypus) – direkte PDF-Erzeugung ohne HTML/CSS
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, PageBreak, Spacer, Frame
+from reportlab.platypus.doctemplate import LayoutError
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+import messung
+from firma_db import STANDORTE, gruppen_fuer_standort_filtern
+
+
+# ============================================================
+# PDF-Layout-Konfiguration
+# ============================================================
+
+@dataclass(frozen=True)
+class PdfLayout:
+    """
+    Zentrale Sammlung aller Layout-Werte für die PDF.
+    Änderungen am Drucklayout sollen nur hier passieren.
+    """
+    seitenformat: tuple = landscape(A3)
+
+    rand_links: int = 20
+    rand_rechts: int = 20
+    rand_oben: int = 55
+    rand_unten: int = 35
+
+    kopfzeile_hoehe: int = 22
+    tabellenzeile_hoehe: int = 18
+
+    schriftart: str = "Helvetica"
+    schriftgroesse: int = 9
+    zellen_padding_x: int = 6
+
+    # Zusätzliche Leerzeilen am Tabellenende (Platz zum Schreiben)
+    extra_leerzeilen: int = 6
+
+    # Kleine Reserve, damit Tabellen nicht über den Seitenrand laufen
+    hoehen_reserve: int = 10
+
+    # Innenabstand des Platypus-Frames (ReportLab-Standard)
+    frame_padding: int = 6
+
+    # Texte in Kopf-/Fußzeile und Deckblatt
+    kopf_titel: str = "Thamm Inventur"
+    kopf_datum: str = "17.12.2025"
+    deckblatt_titel: str = "Inventurlisten 2025"
+
+
+LAYOUT = PdfLayout()
+
+
+# ============================================================
+# Tabellenstruktur
+# ============================================================
+
+TABELLEN_KOPF = [
+    "Cortexnr.",
+    "Hersteller",
+    "Artikelnr. Hersteller",
+    "Artikelnaam",
+    "Verpackungseinheit",
+    "Anzahl",
+    "Einheit Rest (qm/lfm/Stk./usw.)",
+    "Anzahl",
+]
+
+# Spaltenbreiten in Punkt (ReportLab-Einheit)
+SPALTEN_BREITEN = [55, 105, 105, 400, 107, 55, 157, 55]
+
+
+# ============================================================
+# Vorkompilierte Tabellenstile
+# ============================================================
+
+# Einmal aus LAYOUT abgeleitet und von allen Tabellen geteilt
+# (TableStyle wird von Table nur gelesen)
+
+INVENTUR_TABELLEN_STIL = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, 0), 10),
+
+    ("ALIGN", (5, 0), (5, 0), "CENTER"),
+    ("ALIGN", (7, 0), (7, 0), "CENTER"),
+
+    ("FONTNAME", (0, 1), (-1, -1), LAYOUT.schriftart),
+    ("FONTSIZE", (0, 1), (-1, -1), LAYOUT.schriftgroesse),
+
+    ("LEFTPADDING", (0, 0), (-1, -1), LAYOUT.zellen_padding_x),
+    ("RIGHTPADDING", (0, 0), (-1, -1), LAYOUT.zellen_padding_x),
+    ("TOPPADDING", (0, 0), (-1, -1), 6),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+])
+
+UEBERSICHT_KOPF_STIL = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, 0), 11),
+    ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+    ("FONTSIZE", (0, 1), (-1, -1), 10),
+
+    ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+    ("ALIGN", (2, 0), (3, -1), "CENTER"),
+
+    ("LINEBELOW", (0, 0), (-1, 0), 1.2, colors.black),
+    ("TOPPADDING", (0, 0), (-1, -1), 4),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ("LEFTPADDING", (0, 0), (-1, -1), 2),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 2),
+])
+
+# Checkbox-Spalten: ein GRID über alle Datenzeilen statt zwei BOX-Befehle je Zeile
+UEBERSICHT_TABELLEN_STIL = TableStyle(
+    [("GRID", (2, 1), (3, -1), 0.8, colors.black)],
+    parent=UEBERSICHT_KOPF_STIL,
+)
+
+
+@lru_cache(maxsize=None)
+def _zeilenhoehen(datenzeilen):
+    """
+    Zeilenhöhen für eine Inventurtabelle (Kopf + Datenzeilen).
+    Als Tupel gecacht, da fast alle Seiten gleich viele Zeilen haben.
+    """
+    return (LAYOUT.kopfzeile_hoehe,) + (LAYOUT.tabellenzeile_hoehe,) * datenzeilen
+
+
+# ============================================================
+# Hilfsfunktionen
+# ============================================================
+
+def db_wert_bereinigen(wert) -> str:
+    """
+    Vereinheitlicht Werte aus der Datenbank:
+    - None, 'None' oder '-' werden als leer dargestellt
+    """
+    if wert is None:
+        return ""
+
+    text = str(wert).strip()
+    if not text or text.lower() == "none" or text == "-":
+        return ""
+
+    return text
+
+
+class TextEinpasser:
+    """
+    Kürzt Texte auf eine Spaltenbreite.
+
+    Statt den Text zeichenweise zu kürzen und jedes Mal stringWidth
+    aufzurufen, werden Zeichenbreiten (in 1/1000 Schriftgröße) einmal
+    je Schrift tabelliert und die Schnittstelle per Binärsuche über
+    die Präfix-Breiten bestimmt. Ergebnisse landen in einem LRU-Cache,
+    da sich Herstellernamen und Artikelbezeichnungen stark wiederholen.
+    """
+
+    AUSLASSUNG = "…"
+
+    def __init__(self, cache_groesse=100_000, vorbelegte_schriften=("Helvetica",)):
+        self._zeichen_breiten = {}
+        for schriftart in vorbelegte_schriften:
+            self._breiten_tabelle(schriftart)
+
+        self.kuerzen = lru_cache(maxsize=cache_groesse)(self._kuerzen)
+
+    def _breiten_tabelle(self, schriftart):
+        tabelle = self._zeichen_breiten.get(schriftart)
+        if tabelle is None:
+            # Standardzeichen (Latin-1) vorab, alles andere bei Bedarf
+            tabelle = {chr(i): stringWidth(chr(i), schriftart, 1000) for i in range(32, 256)}
+            self._zeichen_breiten[schriftart] = tabelle
+        return tabelle
+
+    def _zeichen_breite(self, tabelle, zeichen, schriftart):
+        breite = tabelle.get(zeichen)
+        if breite is None:
+            breite = tabelle[zeichen] = stringWidth(zeichen, schriftart, 1000)
+        return breite
+
+    def _kuerzen(self, text, max_breite_pt, schriftart, schriftgroesse):
+        if stringWidth(text, schriftart, schriftgroesse) <= max_breite_pt:
+            return text
+
+        auslassung_breite = stringWidth(self.AUSLASSUNG, schriftart, schriftgroesse)
+
+        tabelle = self._breiten_tabelle(schriftart)
+        praefix_breiten = list(accumulate(
+            self._zeichen_breite(tabelle, zeichen, schriftart) for zeichen in text
+        ))
+
+        # Längstes Präfix, das mit Auslassungszeichen noch passt
+        grenze = (max_breite_pt - auslassung_breite) * 1000 / schriftgroesse
+        laenge = bisect_right(praefix_breiten, grenze)
+
+        # Rundungsunterschiede zur Summe in stringWidth an der Grenze ausgleichen
+        while laenge and stringWidth(text[:laenge], schriftart, schriftgroesse) + auslassung_breite > max_breite_pt:
+            laenge -= 1
+        while (laenge < len(text)
+               and stringWidth(text[:laenge + 1], schriftart, schriftgroesse) + auslassung_breite <= max_breite_pt):
+            laenge += 1
+
+        return text[:laenge] + self.AUSLASSUNG if laenge else self.AUSLASSUNG
+
+
+TEXT_EINPASSER = TextEinpasser()
+
+
+def text_auf_spaltenbreite_kuerzen(text, max_breite_pt, schriftart, schriftgroesse) -> str:
+    """
+    Kürzt Text so, dass er sicher in die Spalte passt.
+    Wichtig für den Druck, damit nichts in andere Spalten läuft.
+    """
+    text = db_wert_bereinigen(text)
+    if not text:
+        return ""
+
+    return TEXT_EINPASSER.kuerzen(text, max_breite_pt, schriftart, schriftgroesse)
+
+
+def tabellenzelle_formatieren(text, spaltenbreite) -> str:
+    """
+    Formatiert eine einzelne Tabellenzelle inkl. Padding-Berechnung.
+    """
+    nutzbare_breite = max(1, spaltenbreite - 2 * LAYOUT.zellen_padding_x)
+
+    return text_auf_spaltenbreite_kuerzen(
+        text,
+        nutzbare_breite,
+        LAYOUT.schriftart,
+        LAYOUT.schriftgroesse
+    )
+
+
+# ============================================================
+# Seiten- & Tabellenlogik
+# ============================================================
+
+def zeilen_pro_seite_berechnen(seitenhoehe, doc=None) -> int:
+    """
+    Berechnet, wie viele Tabellenzeilen realistisch auf eine Seite passen.
+    Muss dynamisch sein, da Seitenränder variieren können.
+    Ohne doc werden die Ränder aus LAYOUT verwendet.
+    """
+    rand_oben = doc.topMargin if doc is not None else LAYOUT.rand_oben
+    rand_unten = doc.bottomMargin if doc is not None else LAYOUT.rand_unten
+
+    nutzbare_hoehe = (
+        seitenhoehe
+        - rand_oben
+        - rand_unten
+        - LAYOUT.hoehen_reserve
+    )
+
+    return max(
+        1,
+        int((nutzbare_hoehe - LAYOUT.kopfzeile_hoehe) // LAYOUT.tabellenzeile_hoehe)
+    )
+
+
+def seitenanzahl_fuer_gruppe_berechnen(artikel_anzahl, zeilen_pro_seite) -> int:
+    """
+    Ermittelt die benötigte Seitenanzahl pro Warengruppe.
+    Zusätzliche Leerzeilen werden bewusst mitgerechnet.
+    """
+    return max(
+        1,
+        ceil((artikel_anzahl + LAYOUT.extra_leerzeilen) / zeilen_pro_seite)
+    )
+
+
+def ausgewaehlte_seiten(seiten, gesamt_seiten):
+    """
+    Seitennummern (1-basiert) einer Gruppe aus einer Seitenauswahl;
+    None steht für alle Seiten, Nummern außerhalb entfallen.
+    """
+    if seiten is None:
+        return range(1, gesamt_seiten + 1)
+    return sorted(seite for seite in set(seiten) if 1 <= seite <= gesamt_seiten)
+
+
+def seiten_gesamt_berechnen(gruppen_namen, gruppen, zeilen_pro_seite, deckblatt=True, seiten_auswahl=None) -> int:
+    """
+    Seitenzahl des ganzen Dokuments, ohne es zu rendern
+    (leere Gruppen erscheinen nicht als Tabellenseiten).
+    Mit seiten_auswahl (siehe seiten_aufteilen) nur die ausgewählten Seiten.
+    """
+    return int(deckblatt) + sum(
+        len(ausgewaehlte_seiten(
+            None if seiten_auswahl is None else seiten_auswahl[g],
+            seitenanzahl_fuer_gruppe_berechnen(len(gruppen[g]), zeilen_pro_seite),
+        ))
+        for g in gruppen_namen
+        if gruppen.get(g) and (seiten_auswahl is None or g in seiten_auswahl)
+    )
+
+
+def seiten_aufteilen(gruppen_namen, gruppen, zeilen_pro_seite, seiten_auswahl=None):
+    """
+    Teilt die Artikel jeder Gruppe (sortiert nach Artikelname)
+    inkl. Leerzeilen auf Seiten auf.
+
+    Liefert je Seite (Gruppenname, Seite_in_Gruppe, Seiten_gesamt, Artikelzeilen);
+    Leerzeilen sind leere Dicts.
+
+    seiten_auswahl ({Gruppenname: Seitennummern oder None}) beschränkt das
+    Ergebnis auf diese Gruppen und Seiten, z. B. für den Nachdruck einzelner
+    Blätter. Seitenzählung und Inhalt bleiben wie im ganzen Dokument.
+    """
+    sortieren_s = 0.0
+
+    for gruppenname in gruppen_namen:
+        if seiten_auswahl is not None and gruppenname not in seiten_auswahl:
+            continue
+
+        start_sortieren = perf_counter()
+        artikel_liste = sorted(
+            gruppen.get(gruppenname, []),
+            key=lambda a: (a.get("ART_NAME") or "").lower()
+        )
+        sortieren_s += perf_counter() - start_sortieren
+        if not artikel_liste:
+            continue
+
+        artikel_liste_ext = list(artikel_liste) + ([{}] * LAYOUT.extra_leerzeilen)
+        gesamt_seiten = ceil(len(artikel_liste_ext) / zeilen_pro_seite)
+
+        seiten = None if seiten_auswahl is None else seiten_auswahl[gruppenname]
+        for seite in ausgewaehlte_seiten(seiten, gesamt_seiten):
+            start = (seite - 1) * zeilen_pro_seite
+            ende = start + zeilen_pro_seite
+
+            yield gruppenname, seite, gesamt_seiten, artikel_liste_ext[start:ende]
+
+    messung.erfassen("sortieren", sortieren_s * 1000, gruppen=len(gruppen_namen))
+
+
+# ============================================================
+# Tabellen-Erzeugung
+# ============================================================
+
+def gruppen_uebersichtstabelle_erstellen(titel, gruppennamen, artikel_anzahlen, zeilen_pro_seite, tabellenbreite):
+    """
+    Baut die Übersichtstabelle auf dem Deckblatt,
+    die zeigt, wie viele Seiten jede Warengruppe hat.
+    artikel_anzahlen: {Gruppenname: Anzahl Artikel}
+    """
+    daten = [[titel, "Seiten", "", ""]]
+
+    for gruppenname in gruppennamen:
+        artikel_anzahl = artikel_anzahlen.get(gruppenname, 0)
+        seiten = seitenanzahl_fuer_gruppe_berechnen(artikel_anzahl, zeilen_pro_seite)
+        daten.append([gruppenname, str(seiten), "", ""])
+
+    spalte_seiten = 30
+    spalte_checkbox = 16
+    spalte_name = max(120, tabellenbreite - spalte_seiten - 2 * spalte_checkbox)
+
+    tabelle = Table(
+        daten,
+        colWidths=[spalte_name, spalte_seiten, spalte_checkbox, spalte_checkbox],
+        repeatRows=1
+    )
+
+    tabelle.setStyle(UEBERSICHT_TABELLEN_STIL if len(daten) > 1 else UEBERSICHT_KOPF_STIL)
+
+    return tabelle
+
+
+def inventur_tabelle_fuer_seite_erstellen(artikel_zeilen):
+    """
+    Erstellt die eigentliche Inventurtabelle für eine PDF-Seite.
+    """
+    daten = [TABELLEN_KOPF]
+
+    for artikel in artikel_zeilen:
+        daten.append([
+            tabellenzelle_formatieren(artikel.get("ART_NR") if artikel else "", SPALTEN_BREITEN[0]),
+            tabellenzelle_formatieren(artikel.get("HERST_NAME") if artikel else "", SPALTEN_BREITEN[1]),
+            tabellenzelle_formatieren(artikel.get("HERST_ART_NR") if artikel else "", SPALTEN_BREITEN[2]),
+            tabellenzelle_formatieren(artikel.get("ART_NAME") if artikel else "", SPALTEN_BREITEN[3]),
+            "", "", "", "",
+        ])
+
+    tabelle = Table(
+        daten,
+        colWidths=SPALTEN_BREITEN,
+        rowHeights=_zeilenhoehen(len(daten) - 1),
+        repeatRows=1
+    )
+
+    tabelle.setStyle(INVENTUR_TABELLEN_STIL)
+
+    return tabelle
+
+
+# ============================================================
+# Deckblatt, Kopf- & Fußzeile
+# ============================================================
+
+def artikel_anzahlen_ermitteln(gruppen_namen, gruppen):
+    """
+    {Gruppenname: Anzahl Artikel} – mehr braucht das Deckblatt nicht.
+    """
+    return {g: len(gruppen.get(g, ())) for g in gruppen_namen}
+
+
+def deckblatt_flowables(gruppen_namen, artikel_anzahlen, zeilen_pro_seite):
+    """
+    Inhalt des Deckblatts: Titel und je Standort eine Übersicht,
+    wie viele Seiten jede Warengruppe hat.
+    """
+    seitenbreite, _ = LAYOUT.seitenformat
+    inhalt_breite = seitenbreite - LAYOUT.rand_links - LAYOUT.rand_rechts
+
+    gruppen_A, daten_A = gruppen_fuer_standort_filtern(
+        gruppen_namen, artikel_anzahlen, STANDORTE["A"]["skip_groups"]
+    )
+    gruppen_B, daten_B = gruppen_fuer_standort_filtern(
+        gruppen_namen, artikel_anzahlen, STANDORTE["B"]["skip_groups"]
+    )
+
+    halbe_breite = inhalt_breite / 2 - 10
+
+    t_links = gruppen_uebersichtstabelle_erstellen(
+        STANDORTE["A"]["label"], gruppen_A, daten_A, zeilen_pro_seite, halbe_breite
+    )
+    t_rechts = gruppen_uebersichtstabelle_erstellen(
+        STANDORTE["B"]["label"], gruppen_B, daten_B, zeilen_pro_seite, halbe_breite
+    )
+
+    deckblatt = Table([[t_links, t_rechts]],
+        colWidths=[inhalt_breite / 2] * 2
+    )
+
+    deckblatt.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 0),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+    ]))
+
+    titel = Table(
+        [[LAYOUT.deckblatt_titel]],
+        colWidths=[inhalt_breite]
+    )
+    titel.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 12),
+        ("LINEBELOW", (0, 0), (-1, -1), 1.2, colors.black),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+    ]))
+
+    return [Spacer(1, 6), titel, Spacer(1, 10), deckblatt]
+
+
+def kopf_und_fuss_zeichnen(canvas, seiten_info, standort_label):
+    """
+    Zeichnet Kopf- und Fußzeile einer Seite.
+    seiten_info ist (Gruppenname, Seite_in_Gruppe, Seiten_gesamt)
+    oder None für das Deckblatt.
+    """
+    seitenbreite, seitenhoehe = LAYOUT.seitenformat
+    gruppenname, seite_in_gruppe, gesamt_in_gruppe = seiten_info or ("", 0, 0)
+
+    canvas.saveState()
+
+    # Kopf links
+    canvas.setFont("Helvetica-Bold", 12)
+    canvas.drawString(LAYOUT.rand_links, seitenhoehe - 30, LAYOUT.kopf_titel)
+
+    canvas.setFont("Helvetica", 9)
+    canvas.drawString(LAYOUT.rand_links, seitenhoehe - 45, LAYOUT.kopf_datum)
+
+    # Kopf rechts (Gruppenname)
+    canvas.setFont("Helvetica-Bold", 11)
+    canvas.drawRightString(
+        seitenbreite - LAYOUT.rand_rechts,
+        seitenhoehe - 30,
+        db_wert_bereinigen(gruppenname)
+    )
+
+    # Fuß Mitte (Seitennummer pro Gruppe)
+    if gesamt_in_gruppe:
+        canvas.drawCentredString(
+            seitenbreite / 2,
+            18,
+            f"{seite_in_gruppe} von {gesamt_in_gruppe}"
+        )
+
+    # Fuß rechts (Standort)
+    canvas.drawRightString(
+        seitenbreite - LAYOUT.rand_rechts,
+        18,
+        standort_label
+    )
+
+    # Fuß links (Unterschrift)
+    canvas.drawString(LAYOUT.rand_links, 12, "Ausgefüllt von:")
+    canvas.line(LAYOUT.rand_links + 85, 10, LAYOUT.rand_links + 240, 10)
+
+    canvas.restoreState()
+
+
+# ============================================================
+# PDF-Erzeugung: Platypus
+# ============================================================
+
+def inventur_pdf_erstellen(ausgabe, gruppen_namen, gruppen, standort_label,
+                           deckblatt=True, artikel_anzahlen=None, fortschritt=None,
+                           seiten_auswahl=None):
+    """
+    Baut die komplette Inventur-PDF (Deckblatt + Tabellen je Gruppe)
+    und schreibt sie in ausgabe (Dateiname oder dateiähnliches Objekt).
+
+    Für Teil-Dokumente kann das Deckblatt weggelassen werden; die
+    Artikelanzahlen für das Deckblatt lassen sich separat übergeben
+    (dann genügt ein leeres gruppen für ein reines Deckblatt).
+
+    seiten_auswahl (siehe seiten_aufteilen) rendert nur einzelne Gruppen
+    oder Seiten; Kopf- und Fußzeilen bleiben wie im ganzen Dokument.
+
+    fortschritt(seiten_fertig, seiten_gesamt) wird je Seite aufgerufen.
+    """
+    doc = SimpleDocTemplate(
+        ausgabe,
+        pagesize=LAYOUT.seitenformat,
+        leftMargin=LAYOUT.rand_links,
+        rightMargin=LAYOUT.rand_rechts,
+        topMargin=LAYOUT.rand_oben,
+        bottomMargin=LAYOUT.rand_unten,
+    )
+
+    _, seitenhoehe = LAYOUT.seitenformat
+    zeilen_pro_seite = zeilen_pro_seite_berechnen(seitenhoehe, doc)
+
+    seiten_meta = []  # (Gruppenname, Seite_in_Gruppe, Seiten_gesamt)
+    story = []
+
+    # ================= Deckblatt =================
+
+    if deckblatt:
+        if artikel_anzahlen is None:
+            artikel_anzahlen = artikel_anzahlen_ermitteln(gruppen_namen, gruppen)
+
+        story.extend(deckblatt_flowables(gruppen_namen, artikel_anzahlen, zeilen_pro_seite))
+        story.append(PageBreak())
+
+    # ================= Inventur-Tabellen =================
+
+    # Bewusst eine Table je Seite statt je Gruppe mit repeatRows: gleiche
+    # Ausgabe, aber ReportLabs split misst die Resttabelle je Seite neu
+    # (~7 % langsamer, siehe bench_pdf_aufbau), und "x von y" käme dann
+    # nicht mehr aus derselben Aufteilung wie die gedruckten Seiten
+    tabellen_s = 0.0
+    for gruppenname, seite, gesamt_seiten, seiten_daten in seiten_aufteilen(
+        gruppen_namen, gruppen, zeilen_pro_seite, seiten_auswahl
+    ):
+        seiten_meta.append((gruppenname, seite, gesamt_seiten))
+
+        # Zellen formatieren/kürzen und Table anlegen
+        start = perf_counter()
+        story.append(inventur_tabelle_fuer_seite_erstellen(seiten_daten))
+        tabellen_s += perf_counter() - start
+        story.append(PageBreak())
+
+    messung.erfassen("tabellen", tabellen_s * 1000, seiten=len(seiten_meta))
+
+    # ================= Kopf- & Fußzeile =================
+
+    seiten_gesamt = int(deckblatt) + len(seiten_meta)
+
+    def seite_zeichnen(canvas, doc_):
+        # Erste Seite = Deckblatt (falls vorhanden)
+        idx = doc_.page - (2 if deckblatt else 1)
+        seiten_info = seiten_meta[idx] if 0 <= idx < len(seiten_meta) else None
+
+        kopf_und_fuss_zeichnen(canvas, seiten_info, standort_label)
+
+        # Aufruf zu Beginn der Seite: die vorherigen sind fertig
+        if fortschritt is not None:
+            fortschritt(doc_.page - 1, seiten_gesamt)
+
+    with messung.stufe("pdf_aufbau", seiten=seiten_gesamt):
+        doc.build(story, onFirstPage=seite_zeichnen, onLaterPages=seite_zeichnen)
+
+    if fortschritt is not None:
+        fortschritt(seiten_gesamt, seiten_gesamt)
+
+
+# ============================================================
+# PDF-Erzeugung: Canvas
+# ============================================================
+
+class _TabellenRaster:
+    """
+    Feste Geometrie der Inventurtabelle, einmal aus LAYOUT berechnet.
+    Wie bei Platypus wird in Tabellen-Koordinaten gezeichnet
+    (Ursprung unten links) und die Tabelle per translate im
+    Standard-Frame platziert (zentriert, oben im Frame).
+    """
+
+    def __init__(self):
+        seitenbreite, seitenhoehe = LAYOUT.seitenformat
+        verfuegbare_breite = (
+            seitenbreite - LAYOUT.rand_links - LAYOUT.rand_rechts - 2 * LAYOUT.frame_padding
+        )
+
+        self.breite = sum(SPALTEN_BREITEN)
+        self.x = LAYOUT.rand_links + LAYOUT.frame_padding + (verfuegbare_breite - self.breite) / 2
+        self.y_oben = seitenhoehe - LAYOUT.rand_oben - LAYOUT.frame_padding
+
+        self.spalten_x = [0]
+        for breite in SPALTEN_BREITEN:
+            self.spalten_x.append(self.spalten_x[-1] + breite)
+
+        # Textpositionen (VALIGN TOP, Padding wie in INVENTUR_TABELLEN_STIL)
+        self.text_x = [x + LAYOUT.zellen_padding_x for x in self.spalten_x[:-1]]
+        self.kopf_text = []
+        for spalte, titel in enumerate(TABELLEN_KOPF):
+            zentriert = spalte in (5, 7)
+            x = self.spalten_x[spalte] + SPALTEN_BREITEN[spalte] / 2 if zentriert else self.text_x[spalte]
+            self.kopf_text.append((x, zentriert, titel))
+
+    def hoehe(self, datenzeilen):
+        return LAYOUT.kopfzeile_hoehe + datenzeilen * LAYOUT.tabellenzeile_hoehe
+
+    def zeilen_y(self, datenzeilen):
+        """
+        Alle horizontalen Linien von oben nach unten (Tabellen-Koordinaten).
+        """
+        hoehe = self.hoehe(datenzeilen)
+        kopf_unterkante = hoehe - LAYOUT.kopfzeile_hoehe
+
+        return [hoehe] + [
+            kopf_unterkante - i * LAYOUT.tabellenzeile_hoehe
+            for i in range(datenzeilen + 1)
+        ]
+
+
+_RASTER = None
+
+
+def _tabellen_raster():
+    global _RASTER
+    if _RASTER is None:
+        _RASTER = _TabellenRaster()
+    return _RASTER
+
+
+def inventur_tabelle_zeichnen(canvas, artikel_zeilen):
+    """
+    Zeichnet eine Inventurtabelle direkt auf den Canvas –
+    optisch identisch zu inventur_tabelle_fuer_seite_erstellen.
+    """
+    raster = _tabellen_raster()
+    zeilen_y = raster.zeilen_y(len(artikel_zeilen))
+    hoehe = zeilen_y[0]
+
+    canvas.saveState()
+    canvas.translate(raster.x, raster.y_oben - hoehe)
+
+    # Hintergrund Kopfzeile
+    canvas.setFillColor(colors.whitesmoke)
+    canvas.rect(0, zeilen_y[1], raster.breite, LAYOUT.kopfzeile_hoehe, stroke=0, fill=1)
+    canvas.setFillColor(colors.black)
+
+    # Kopfzeile
+    canvas.setFont("Helvetica-Bold", 10)
+    kopf_text_y = hoehe - 6 - 10
+    for x, zentriert, titel in raster.kopf_text:
+        if zentriert:
+            canvas.drawCentredString(x, kopf_text_y, titel)
+        else:
+            canvas.drawString(x, kopf_text_y, titel)
+
+    # Datenzeilen: ein Textobjekt für die ganze Seite
+    text = canvas.beginText()
+    text.setFont(LAYOUT.schriftart, LAYOUT.schriftgroesse)
+    abstand_oben = 6 + LAYOUT.schriftgroesse
+
+    for zeile, artikel in enumerate(artikel_zeilen):
+        if not artikel:
+            continue
+
+        y = zeilen_y[zeile + 1] - abstand_oben
+        for spalte, feld in enumerate(("ART_NR", "HERST_NAME", "HERST_ART_NR", "ART_NAME")):
+            wert = tabellenzelle_formatieren(artikel.get(feld), SPALTEN_BREITEN[spalte])
+            if wert:
+                text.setTextOrigin(raster.text_x[spalte], y)
+                text.textOut(wert)
+
+    canvas.drawText(text)
+
+    # Gitter (GRID 0.5, runde Enden) – Einzellinien in derselben Reihenfolge
+    # wie Platypus (Rahmen, dann Innenlinien), damit sich Überlappungen gleich zeichnen
+    canvas.setStrokeColor(colors.black)
+    canvas.setLineWidth(0.5)
+    canvas.setLineCap(1)
+    canvas.setLineJoin(1)
+
+    links, rechts = raster.spalten_x[0], raster.spalten_x[-1]
+    oben, unten = zeilen_y[0], zeilen_y[-1]
+
+    canvas.line(links, oben, rechts, oben)
+    canvas.line(links, unten, rechts, unten)
+    canvas.line(links, unten, links, oben)
+    canvas.line(rechts, unten, rechts, oben)
+
+    for y in zeilen_y[1:-1]:
+        canvas.line(links, y, rechts, y)
+    for x in raster.spalten_x[1:-1]:
+        canvas.line(x, unten, x, oben)
+
+    canvas.restoreState()
+
+
+def inventur_pdf_canvas_erstellen(ausgabe, gruppen_namen, gruppen, standort_label,
+                                  deckblatt=True, artikel_anzahlen=None, fortschritt=None,
+                                  seiten_auswahl=None):
+    """
+    Wie inventur_pdf_erstellen, zeichnet die Tabellenseiten aber direkt
+    auf den Canvas statt über Platypus-Flowables und doc.build.
+    Nur das Deckblatt wird weiterhin über einen Platypus-Frame gesetzt.
+    """
+    seitenbreite, seitenhoehe = LAYOUT.seitenformat
+    zeilen_pro_seite = zeilen_pro_seite_berechnen(seitenhoehe)
+
+    canvas = Canvas(ausgabe, pagesize=LAYOUT.seitenformat)
+
+    seiten_gesamt = seiten_gesamt_berechnen(gruppen_namen, gruppen, zeilen_pro_seite, deckblatt, seiten_auswahl)
+    seiten_fertig = 0
+
+    # ================= Deckblatt =================
+
+    if deckblatt:
+        if artikel_anzahlen is None:
+            artikel_anzahlen = artikel_anzahlen_ermitteln(gruppen_namen, gruppen)
+
+        deckblatt_zeichnen(canvas, gruppen_namen, artikel_anzahlen, zeilen_pro_seite, standort_label)
+        seiten_fertig += 1
+        if fortschritt is not None:
+            fortschritt(seiten_fertig, seiten_gesamt)
+
+    # ================= Inventur-Tabellen =================
+
+    tabellen_s = 0.0
+    for gruppenname, seite, gesamt_seiten, seiten_daten in seiten_aufteilen(
+        gruppen_namen, gruppen, zeilen_pro_seite, seiten_auswahl
+    ):
+        kopf_und_fuss_zeichnen(canvas, (gruppenname, seite, gesamt_seiten), standort_label)
+
+        # Zellen formatieren/kürzen und zeichnen
+        start = perf_counter()
+        inventur_tabelle_zeichnen(canvas, seiten_daten)
+        tabellen_s += perf_counter() - start
+        canvas.showPage()
+
+        seiten_fertig += 1
+        if fortschritt is not None:
+            fortschritt(seiten_fertig, seiten_gesamt)
+
+    messung.erfassen("tabellen", tabellen_s * 1000, seiten=seiten_fertig - int(deckblatt))
+
+    with messung.stufe("pdf_aufbau", seiten=seiten_gesamt):
+        canvas.save()
+
+
+def deckblatt_zeichnen(canvas, gruppen_namen, artikel_anzahlen, zeilen_pro_seite, standort_label):
+    """
+    Setzt das Deckblatt über einen Platypus-Frame auf den Canvas
+    (gleiche Position wie im SimpleDocTemplate) und schließt die Seite ab.
+    Passt es nicht auf eine Seite, gibt es wie bei doc.build einen LayoutError
+    (Seitenzählung und Kopfzeilen rechnen mit genau einem Deckblatt).
+    """
+    seitenbreite, seitenhoehe = LAYOUT.seitenformat
+
+    kopf_und_fuss_zeichnen(canvas, None, standort_label)
+
+    frame = Frame(
+        LAYOUT.rand_links,
+        LAYOUT.rand_unten,
+        seitenbreite - LAYOUT.rand_links - LAYOUT.rand_rechts,
+        seitenhoehe - LAYOUT.rand_oben - LAYOUT.rand_unten,
+        leftPadding=LAYOUT.frame_padding,
+        rightPadding=LAYOUT.frame_padding,
+        topPadding=LAYOUT.frame_padding,
+        bottomPadding=LAYOUT.frame_padding,
+    )
+    # addFromList entfernt gesetzte Flowables aus der Liste, der Rest passte nicht
+    rest = deckblatt_flowables(gruppen_namen, artikel_anzahlen, zeilen_pro_seite)
+    frame.addFromList(rest, canvas)
+    if rest:
+        raise LayoutError(f"Deckblatt passt nicht auf eine Seite ({len(gruppen_namen)} Gruppen)")
+    canvas.showPage()
+
+
+# Auswählbar per ?engine=...
+PDF_ENGINES = {
+    "platypus": inventur_pdf_erstellen,
+    "canvas": inventur_pdf_canvas_erstellen,
+}
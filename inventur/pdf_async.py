@@ -0,0 +1,176 @@
+"""
+Asynchroner PDF-Pfad für den Betrieb unter ASGI.
+
+Der Event-Loop wartet nur; Datenbankabfrage und Rendern laufen in zwei
+getrennten, begrenzten Thread-Pools. Gleiche Anfragen (Standort + Engine
++ Quelle) werden zusammengelegt: alle warten auf dasselbe Rendern.
+
+Gegendruck: Warten bereits max_wartende Anfragen (zusammengelegte
+eingeschlossen), wird eine neue mit Ueberlastet abgewiesen (die View
+antwortet mit 503 und Retry-After). Das begrenzt offene Verbindungen
+und – da jedes Rendering mindestens eine wartende Anfrage hat – auch
+die Zahl verschiedener Renderings.
+
+Ein offenes Rendering ist ein concurrent.futures.Future, kein asyncio.Task:
+unter WSGI/runserver läuft jede Anfrage in einem eigenen Event-Loop
+(async_to_sync), zusammengelegte Anfragen warten per wrap_future jeweils
+in ihrem eigenen Loop darauf.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from firma_db import PDF_SPALTEN, SNAPSHOT_CACHE, artikel_snapshot_holen
+from inventur.pdf_cache import ergebnis_cache, pdf_bereitstellen
+
+
+class Ueberlastet(Exception):
+    """
+    Zu viele wartende Anfragen – später erneut versuchen.
+    """
+
+
+class AsyncPdfDienst:
+    """
+    Bereitstellen von Inventur-PDFs aus async Views.
+    """
+
+    def __init__(self, db_threads=4, render_threads=2, max_wartende=64):
+        self.db_threads = db_threads
+        self.render_threads = render_threads
+        self.max_wartende = max_wartende
+        self._lock = threading.Lock()
+        self._db = None
+        self._render = None
+        self._offen = {}  # (Standort, Engine, Quelle) -> Future
+        self._wartende = 0
+        self._statistik = {"anfragen": 0, "zusammengelegt": 0, "abgewiesen": 0}
+
+    async def aktueller_schluessel(self, standort, engine):
+        """
+        Schlüssel der vorgerenderten PDF, falls ihre Daten frisch sind, sonst None.
+        """
+        cache = ergebnis_cache()
+        return await self._im_db_pool(
+            cache.zeiger_lesen, f"{standort}-{engine}", max_alter=SNAPSHOT_CACHE.ttl
+        )
+
+    async def oeffnen(self, schluessel):
+        """
+        Öffnet eine PDF aus dem Cache (None, falls nicht vorhanden).
+        """
+        return await self._im_db_pool(ergebnis_cache().oeffnen, schluessel)
+
+    async def bereitstellen(self, standort, engine, quelle=None):
+        """
+        Sorgt dafür, dass die aktuelle PDF im Cache liegt, und liefert ihren Schlüssel.
+        Mit quelle (z. B. InventurQuelle) statt der Standard-Quelle; der
+        Zeiger für vorgerenderte PDFs bleibt dann unverändert.
+        """
+        schluessel = (standort, engine, quelle.schluessel() if quelle is not None else None)
+
+        with self._lock:
+            self._statistik["anfragen"] += 1
+            if self._wartende >= self.max_wartende:
+                self._statistik["abgewiesen"] += 1
+                raise Ueberlastet(f"{self._wartende} Anfragen warten")
+            self._wartende += 1
+
+            auftrag = self._offen.get(schluessel)
+            neu = auftrag is None
+            if neu:
+                auftrag = self._offen[schluessel] = Future()
+            else:
+                self._statistik["zusammengelegt"] += 1
+
+        try:
+            if neu:
+                self._starten(auftrag, schluessel, standort, engine, quelle)
+
+            # shield: bricht ein Client ab, läuft das Rendern für die anderen weiter
+            return await asyncio.shield(asyncio.wrap_future(auftrag))
+        finally:
+            with self._lock:
+                self._wartende -= 1
+
+    def kennzahlen(self):
+        with self._lock:
+            kennzahlen = dict(self._statistik)
+            kennzahlen["offen"] = len(self._offen)
+            kennzahlen["wartend"] = self._wartende
+        return kennzahlen
+
+    # -------- intern --------
+
+    def _starten(self, auftrag, schluessel, standort, engine, quelle):
+        """
+        Laden im DB-Pool, danach Rendern im Render-Pool – unabhängig vom
+        Event-Loop der Anfrage; das Ergebnis landet in auftrag.
+        """
+        def fertig(ergebnis=None, fehler=None):
+            # Erst austragen: spätere Anfragen prüfen die Daten neu
+            with self._lock:
+                self._offen.pop(schluessel, None)
+            if fehler is not None:
+                auftrag.set_exception(fehler)
+            else:
+                auftrag.set_result(ergebnis)
+
+        def rendern(snapshot):
+            schluessel_pdf, datei, _ = pdf_bereitstellen(
+                snapshot, standort, engine, cache=ergebnis_cache(), zeiger=quelle is None
+            )
+            datei.close()
+            return schluessel_pdf
+
+        def gerendert(render_auftrag):
+            try:
+                ergebnis = render_auftrag.result()
+            except BaseException as exc:
+                fertig(fehler=exc)
+            else:
+                fertig(ergebnis)
+
+        def geladen(db_auftrag):
+            try:
+                render_auftrag = self._render_pool().submit(rendern, db_auftrag.result())
+            except BaseException as exc:
+                fertig(fehler=exc)
+            else:
+                render_auftrag.add_done_callback(gerendert)
+
+        try:
+            db_auftrag = self._db_pool().submit(
+                artikel_snapshot_holen, quelle, spalten=PDF_SPALTEN, standort=standort
+            )
+        except BaseException as exc:
+            fertig(fehler=exc)
+        else:
+            db_auftrag.add_done_callback(geladen)
+
+    def _db_pool(self):
+        with self._lock:
+            if self._db is None:
+                self._db = ThreadPoolExecutor(self.db_threads, thread_name_prefix="pdf-db")
+            return self._db
+
+    def _render_pool(self):
+        with self._lock:
+            if self._render is None:
+                self._render = ThreadPoolExecutor(self.render_threads, thread_name_prefix="pdf-render")
+            return self._render
+
+    async def _im_db_pool(self, funktion, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._db_pool(), functools.partial(funktion, *args, **kwargs)
+        )
+
+
+PDF_DIENST = AsyncPdfDienst(
+    db_threads=int(os.environ.get("INVENTUR_ASYNC_DB_THREADS", 4)),
+    render_threads=int(os.environ.get("INVENTUR_ASYNC_RENDER_THREADS", 2)),
+    max_wartende=int(os.environ.get("INVENTUR_ASYNC_MAX_WARTENDE", 64)),
+)
@@ -0,0 +1,172 @@
+"""
+Asynchrone PDF-Erzeugung: Auftrag anlegen, Fortschritt abfragen, Ergebnis laden.
+
+Die Aufträge laufen in einem begrenzten Thread-Pool im Web-Prozess,
+der Request-Thread wird sofort wieder frei. Gleiche Aufträge
+(Standort + Engine), die noch warten oder laufen, werden zusammengelegt:
+20 gleichzeitige Klicks ergeben ein einziges Rendern.
+
+Die Aufträge liegen im Speicher des Prozesses; bei mehreren
+Worker-Prozessen muss die Abfrage beim selben Prozess landen.
+Das Ergebnis liegt im PDF-Cache (siehe ergebnis_cache).
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from firma_db import PDF_SPALTEN, artikel_snapshot_holen
+from inventur.pdf import LAYOUT, seiten_gesamt_berechnen, zeilen_pro_seite_berechnen
+from inventur.pdf_cache import ergebnis_cache, pdf_bereitstellen
+
+
+logger = logging.getLogger(__name__)
+
+WARTEND = "wartend"
+LAEUFT = "laeuft"
+FERTIG = "fertig"
+FEHLER = "fehler"
+
+
+class PdfAuftrag:
+    """
+    Zustand eines PDF-Auftrags (wird vom Worker-Thread fortgeschrieben).
+    """
+
+    def __init__(self, standort, engine):
+        self.id = uuid.uuid4().hex
+        self.standort = standort
+        self.engine = engine
+        self.status = WARTEND
+        self.seiten_fertig = 0
+        self.seiten_gesamt = None
+        self.schluessel = None
+        self.fehler = None
+        self.erstellt_um = time.time()
+        self.fertig_um = None
+
+    @property
+    def offen(self):
+        return self.status in (WARTEND, LAEUFT)
+
+    def als_dict(self):
+        return {
+            "id": self.id,
+            "standort": self.standort,
+            "engine": self.engine,
+            "status": self.status,
+            "seiten_fertig": self.seiten_fertig,
+            "seiten_gesamt": self.seiten_gesamt,
+            "fehler": self.fehler,
+            "erstellt_um": self.erstellt_um,
+            "fertig_um": self.fertig_um,
+        }
+
+
+class PdfAuftragsVerwaltung:
+    """
+    Nimmt Aufträge an, legt gleiche offene Aufträge zusammen
+    und räumt abgeschlossene nach aufbewahrung Sekunden weg.
+    """
+
+    def __init__(self, max_parallel=2, aufbewahrung=3600, cache=None):
+        self.max_parallel = max_parallel
+        self.aufbewahrung = aufbewahrung
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._auftraege = {}
+        self._offen = {}  # (Standort, Engine) -> offener Auftrag
+        self._pool = None
+
+    @property
+    def cache(self):
+        return self._cache or ergebnis_cache()
+
+    def einreichen(self, standort, engine="platypus"):
+        """
+        Legt einen Auftrag an oder liefert den bereits offenen gleichen.
+        """
+        with self._lock:
+            self._aufraeumen()
+
+            auftrag = self._offen.get((standort, engine))
+            if auftrag is not None:
+                return auftrag
+
+            auftrag = PdfAuftrag(standort, engine)
+            self._auftraege[auftrag.id] = auftrag
+            self._offen[(standort, engine)] = auftrag
+
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="pdf-auftrag")
+            self._pool.submit(self._ausfuehren, auftrag)
+
+        return auftrag
+
+    def holen(self, auftrag_id):
+        with self._lock:
+            return self._auftraege.get(auftrag_id)
+
+    def ergebnis_oeffnen(self, auftrag):
+        """
+        Öffnet die fertige PDF oder liefert None (noch nicht fertig oder verdrängt).
+        """
+        if auftrag.status != FERTIG:
+            return None
+        return self.cache.oeffnen(auftrag.schluessel)
+
+    # -------- intern --------
+
+    def _ausfuehren(self, auftrag):
+        auftrag.status = LAEUFT
+
+        def fortschritt(seiten_fertig, seiten_gesamt):
+            auftrag.seiten_fertig = seiten_fertig
+            auftrag.seiten_gesamt = seiten_gesamt
+
+        schluessel = fehler = None
+        try:
+            snapshot = artikel_snapshot_holen(spalten=PDF_SPALTEN, standort=auftrag.standort)
+
+            # Gesamtzahl vorab bekannt, noch bevor die erste Seite steht
+            _, _, gruppen_namen, gruppen = snapshot.daten
+            zeilen_pro_seite = zeilen_pro_seite_berechnen(LAYOUT.seitenformat[1])
+            auftrag.seiten_gesamt = seiten_gesamt_berechnen(gruppen_namen, gruppen, zeilen_pro_seite)
+
+            schluessel, datei, _ = pdf_bereitstellen(
+                snapshot, auftrag.standort, auftrag.engine, cache=self.cache, fortschritt=fortschritt
+            )
+            datei.close()
+        except Exception as exc:
+            logger.exception("PDF-Auftrag %s (%s/%s) fehlgeschlagen", auftrag.id, auftrag.standort, auftrag.engine)
+            fehler = str(exc)
+        finally:
+            # Abschluss unter dem Lock und fertig_um vor dem Status:
+            # _aufraeumen sieht nie einen abgeschlossenen Auftrag ohne fertig_um
+            with self._lock:
+                auftrag.fertig_um = time.time()
+                if fehler is None and schluessel is not None:
+                    auftrag.schluessel = schluessel
+                    auftrag.seiten_fertig = auftrag.seiten_gesamt
+                    auftrag.status = FERTIG
+                else:
+                    auftrag.fehler = fehler or "Abgebrochen"
+                    auftrag.status = FEHLER
+                if self._offen.get((auftrag.standort, auftrag.engine)) is auftrag:
+                    del self._offen[(auftrag.standort, auftrag.engine)]
+
+    def _aufraeumen(self):
+        # Nur unter self._lock aufrufen (siehe einreichen)
+        grenze = time.time() - self.aufbewahrung
+        for auftrag_id, auftrag in list(self._auftraege.items()):
+            if not auftrag.offen and auftrag.fertig_um is not None and auftrag.fertig_um < grenze:
+                del self._auftraege[auftrag_id]
+
+
+AUFTRAEGE = PdfAuftragsVerwaltung(
+    max_parallel=int(os.environ.get("INVENTUR_PDF_AUFTRAEGE_PARALLEL", 2)),
+    aufbewahrung=float(os.environ.get("INVENTUR_PDF_AUFTRAEGE_AUFBEWAHRUNG", 3600)),
+)
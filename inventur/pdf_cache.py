@@ -0,0 +1,289 @@
+"""
+Cache für fertig gerenderte Inventur-PDFs auf der Platte.
+
+Der Schlüssel ist ein Hash über alles, was das Ergebnis bestimmt:
+Inhalts-Hash der gruppierten Artikeldaten, Standort-Eintrag, PdfLayout
+(inkl. Kopftexte), Spaltenköpfe/-breiten und die Render-Variante.
+Gleicher Schlüssel → gleiche PDF, daher taugt er auch als ETag.
+
+Die Größe ist begrenzt; verdrängt wird die am längsten nicht
+gelieferte Datei (LRU über die Änderungszeit der Datei).
+
+Zusätzlich merkt sich je Standort und Engine ein Zeiger den Schlüssel
+der zuletzt bereitgestellten PDF und wann deren Daten geprüft wurden.
+Ist der Zeiger frisch, kann die PDF ohne Laden der Daten geliefert werden.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from firma_db import STANDORTE
+from inventur.pdf import LAYOUT, PDF_ENGINES, SPALTEN_BREITEN, TABELLEN_KOPF
+from inventur.pdf_parallel import inventur_pdf_parallel_erstellen
+
+
+logger = logging.getLogger(__name__)
+
+# Bei Änderungen an der Darstellung erhöhen, die nicht
+# in LAYOUT/SPALTEN_BREITEN/TABELLEN_KOPF stecken
+RENDER_VERSION = 1
+
+
+def render_schluessel(fingerabdruck, standort, variante):
+    """
+    Inhaltsadresse einer gerenderten PDF.
+    """
+    standort_cfg = STANDORTE[standort]
+
+    teile = (
+        RENDER_VERSION,
+        fingerabdruck,
+        standort,
+        standort_cfg["label"],
+        sorted(standort_cfg["skip_groups"]),
+        repr(LAYOUT),
+        SPALTEN_BREITEN,
+        TABELLEN_KOPF,
+        variante,
+    )
+
+    return hashlib.sha256(repr(teile).encode("utf-8")).hexdigest()
+
+
+class PdfRenderCache:
+    """
+    Größenbegrenzter Datei-Cache: <verzeichnis>/<schluessel>.pdf
+
+    Dateien werden atomar abgelegt (erst temporär, dann os.replace),
+    damit parallele Worker-Prozesse nie eine halbe PDF ausliefern.
+    """
+
+    def __init__(self, verzeichnis, max_bytes):
+        self.verzeichnis = verzeichnis
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._statistik = {"treffer": 0, "fehlschlaege": 0, "verdraengt": 0}
+
+    @property
+    def aktiv(self):
+        return bool(self.verzeichnis) and self.max_bytes > 0
+
+    def oeffnen(self, schluessel):
+        """
+        Öffnet die gecachte PDF zum Lesen oder liefert None.
+        """
+        try:
+            datei = open(self._pfad(schluessel), "rb")
+        except FileNotFoundError:
+            self._zaehlen("fehlschlaege")
+            return None
+
+        # Zugriffszeit für die LRU-Verdrängung merken
+        try:
+            os.utime(datei.fileno())
+        except OSError:
+            pass
+
+        self._zaehlen("treffer")
+        return datei
+
+    def ablegen(self, schluessel, schreiben):
+        """
+        Ruft schreiben(datei) auf, übernimmt das Ergebnis in den Cache
+        und liefert die abgelegte PDF zum Lesen geöffnet zurück.
+        """
+        self._verzeichnis_anlegen()
+        pfad = self._pfad(schluessel)
+
+        fd, tmp_pfad = tempfile.mkstemp(dir=self.verzeichnis, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as datei:
+                schreiben(datei)
+            os.replace(tmp_pfad, pfad)
+        except BaseException:
+            os.remove(tmp_pfad)
+            raise
+
+        # Vor dem Aufräumen öffnen: verdrängt ein anderer Prozess
+        # die Datei, bleibt sie über den Handle lesbar
+        datei = open(pfad, "rb")
+        self.aufraeumen()
+        return datei
+
+    def zeiger_setzen(self, name, schluessel, geprueft_um):
+        """
+        Merkt sich den aktuellen Schlüssel für name (z. B. "A-platypus").
+        """
+        self._verzeichnis_anlegen()
+
+        fd, tmp_pfad = tempfile.mkstemp(dir=self.verzeichnis, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as datei:
+            json.dump({"schluessel": schluessel, "geprueft_um": geprueft_um}, datei)
+        os.replace(tmp_pfad, self._zeiger_pfad(name))
+
+    def zeiger_lesen(self, name, max_alter):
+        """
+        Schlüssel für name, falls die Daten vor höchstens
+        max_alter Sekunden geprüft wurden, sonst None.
+        """
+        try:
+            with open(self._zeiger_pfad(name), encoding="utf-8") as datei:
+                zeiger = json.load(datei)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - zeiger.get("geprueft_um", 0) >= max_alter:
+            return None
+
+        return zeiger.get("schluessel")
+
+    def aufraeumen(self):
+        """
+        Verdrängt die ältesten PDFs, bis max_bytes eingehalten ist.
+        """
+        try:
+            eintraege = []
+            for eintrag in os.scandir(self.verzeichnis):
+                if eintrag.name.endswith(".pdf"):
+                    stat = eintrag.stat()
+                    eintraege.append((stat.st_mtime, stat.st_size, eintrag.path))
+        except FileNotFoundError:
+            return
+
+        belegt = sum(groesse for _, groesse, _ in eintraege)
+
+        for _, groesse, pfad in sorted(eintraege):
+            if belegt <= self.max_bytes:
+                break
+            try:
+                os.remove(pfad)
+            except FileNotFoundError:
+                pass
+            belegt -= groesse
+            self._zaehlen("verdraengt")
+            logger.info("Gerenderte PDF %s aus dem Cache verdrängt", pfad)
+
+    def leeren(self):
+        """
+        Entfernt alle gecachten PDFs.
+        """
+        if not os.path.isdir(self.verzeichnis):
+            return
+
+        for eintrag in os.scandir(self.verzeichnis):
+            if eintrag.name.endswith((".pdf", ".json", ".tmp")):
+                os.remove(eintrag.path)
+
+    def kennzahlen(self):
+        """
+        Treffer-/Fehlschlag-Statistik für Monitoring.
+        """
+        with self._lock:
+            return dict(self._statistik)
+
+    # -------- intern --------
+
+    def _verzeichnis_anlegen(self):
+        # Nur für den eigenen Benutzer: sonst könnten andere PDFs
+        # oder Zeiger unterschieben, die dann ausgeliefert werden
+        os.makedirs(self.verzeichnis, mode=0o700, exist_ok=True)
+
+    def _pfad(self, schluessel):
+        return os.path.join(self.verzeichnis, f"{schluessel}.pdf")
+
+    def _zeiger_pfad(self, name):
+        return os.path.join(self.verzeichnis, f"aktuell_{name}.json")
+
+    def _zaehlen(self, name):
+        with self._lock:
+            self._statistik[name] += 1
+
+
+# Standard im Projekt statt im für alle beschreibbaren temp-Verzeichnis
+STANDARD_VERZEICHNIS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "var", "inventur_pdf_cache"
+)
+
+# Verzeichnis und Größe per ENV; INVENTUR_PDF_CACHE_MB=0 schaltet den Cache ab
+PDF_CACHE = PdfRenderCache(
+    verzeichnis=os.environ.get("INVENTUR_PDF_CACHE_VERZEICHNIS") or STANDARD_VERZEICHNIS,
+    max_bytes=int(float(os.environ.get("INVENTUR_PDF_CACHE_MB", 512)) * 2**20),
+)
+
+_ERSATZ_CACHE = None
+_ERSATZ_LOCK = threading.Lock()
+
+
+def ergebnis_cache():
+    """
+    PDF_CACHE, oder – falls abgeschaltet – ein privater temporärer Cache
+    für Pfade, die das Ergebnis später erneut öffnen müssen (Aufträge, ASGI).
+    """
+    global _ERSATZ_CACHE
+
+    if PDF_CACHE.aktiv:
+        return PDF_CACHE
+
+    with _ERSATZ_LOCK:
+        if _ERSATZ_CACHE is None:
+            _ERSATZ_CACHE = PdfRenderCache(tempfile.mkdtemp(prefix="inventur_pdf_"), max_bytes=256 * 2**20)
+
+    return _ERSATZ_CACHE
+
+
+# ============================================================
+# Bereitstellen
+# ============================================================
+
+def pdf_rendern(ausgabe, daten, standort, engine="platypus", parallel=False, fortschritt=None,
+                seiten_auswahl=None):
+    """
+    Rendert ein Ergebnis von artikel_lager_laden für einen Standort nach ausgabe.
+    fortschritt wird nur beim seriellen Rendern gemeldet.
+    Mit seiten_auswahl nur einzelne Gruppen/Seiten, ohne Deckblatt (immer seriell).
+    """
+    _, _, gruppen_namen, gruppen = daten
+    standort_label = STANDORTE[standort]["label"]
+
+    if seiten_auswahl is not None:
+        PDF_ENGINES[engine](
+            ausgabe, gruppen_namen, gruppen, standort_label,
+            deckblatt=False, fortschritt=fortschritt, seiten_auswahl=seiten_auswahl,
+        )
+    elif parallel:
+        inventur_pdf_parallel_erstellen(ausgabe, gruppen_namen, gruppen, standort_label, engine=engine)
+    else:
+        PDF_ENGINES[engine](ausgabe, gruppen_namen, gruppen, standort_label, fortschritt=fortschritt)
+
+
+def pdf_bereitstellen(snapshot, standort, engine="platypus", parallel=False, cache=None, fortschritt=None,
+                      zeiger=True):
+    """
+    Liefert (schluessel, datei, neu_gerendert) für einen Artikel-Snapshot:
+    die PDF aus dem Cache oder frisch gerendert und dort abgelegt.
+    datei ist zum Lesen geöffnet und muss vom Aufrufer geschlossen werden.
+
+    zeiger=False für Snapshots, die nicht aus der aktiven Quelle stammen
+    (z. B. eine eingefrorene Inventur) – der Zeiger bleibt dann unverändert.
+    """
+    cache = cache or PDF_CACHE
+
+    # Parallel gerenderte PDFs sind seitengleich und teilen sich den Eintrag
+    schluessel = render_schluessel(snapshot.fingerabdruck, standort, engine)
+
+    datei = cache.oeffnen(schluessel)
+    neu_gerendert = datei is None
+    if neu_gerendert:
+        datei = cache.ablegen(
+            schluessel, lambda ausgabe: pdf_rendern(ausgabe, snapshot.daten, standort, engine, parallel, fortschritt)
+        )
+
+    if zeiger:
+        cache.zeiger_setzen(f"{standort}-{engine}", schluessel, snapshot.geprueft_um)
+
+    return schluessel, datei, neu_gerendert
@@ -0,0 +1,158 @@
+"""
+Paralleles Rendern der Inventur-PDF.
+
+Jede Warengruppe ist unabhängig (eigene Seiten, eigenes "x von y",
+eigener Kopf). Deckblatt und Abschnitte aus aufeinanderfolgenden Gruppen
+werden deshalb in einem Prozess-Pool erzeugt und danach in der
+Reihenfolge von gruppen_namen zusammengefügt.
+
+Zum Zusammenfügen wird pypdf benötigt; fehlt es, wird seriell gerendert.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from math import ceil
+
+from inventur.pdf import (
+    LAYOUT,
+    PDF_ENGINES,
+    artikel_anzahlen_ermitteln,
+    seitenanzahl_fuer_gruppe_berechnen,
+    zeilen_pro_seite_berechnen,
+)
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+
+logger = logging.getLogger(__name__)
+
+# Abschnitte je Prozess – etwas mehr als einer, damit große und kleine
+# Gruppen sich gleichmäßiger auf die Prozesse verteilen
+ABSCHNITTE_JE_PROZESS = 4
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def prozess_anzahl():
+    """
+    Größe des Pools: ENV-Variable INVENTUR_PDF_PROZESSE, Standard: Anzahl CPUs.
+    """
+    return int(os.environ.get("INVENTUR_PDF_PROZESSE", os.cpu_count() or 1))
+
+
+def prozess_pool():
+    """
+    Prozessweiter Pool für das Rendern (einmal je Worker-Prozess erzeugt).
+
+    "spawn" statt "fork": der Web-Prozess kann offene ODBC-Verbindungen
+    und Threads mit gehaltenen Locks haben, die in Kindprozessen nicht
+    weiterverwendet werden dürfen. Gerendert wird ohne Django.
+    """
+    global _POOL
+
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=prozess_anzahl(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    return _POOL
+
+
+def _teil_rendern(engine, gruppen_namen, gruppen, standort_label, deckblatt, artikel_anzahlen):
+    """
+    Läuft im Pool-Prozess: rendert ein Teil-Dokument und liefert die Bytes.
+    """
+    puffer = BytesIO()
+    PDF_ENGINES[engine](
+        puffer,
+        gruppen_namen,
+        gruppen,
+        standort_label,
+        deckblatt=deckblatt,
+        artikel_anzahlen=artikel_anzahlen,
+    )
+    return puffer.getvalue()
+
+
+def abschnitte_bilden(gruppen_namen, artikel_anzahlen, zeilen_pro_seite, ziel_seiten):
+    """
+    Fasst aufeinanderfolgende Gruppen zu Abschnitten von
+    mindestens ziel_seiten Seiten zusammen (Reihenfolge bleibt erhalten).
+    """
+    abschnitte = []
+    aktuell = []
+    seiten = 0
+
+    for gruppenname in gruppen_namen:
+        anzahl = artikel_anzahlen.get(gruppenname, 0)
+        if not anzahl:
+            continue
+
+        aktuell.append(gruppenname)
+        seiten += seitenanzahl_fuer_gruppe_berechnen(anzahl, zeilen_pro_seite)
+
+        if seiten >= ziel_seiten:
+            abschnitte.append(aktuell)
+            aktuell, seiten = [], 0
+
+    if aktuell:
+        abschnitte.append(aktuell)
+
+    return abschnitte
+
+
+def inventur_pdf_parallel_erstellen(ausgabe, gruppen_namen, gruppen, standort_label,
+                                    engine="platypus", pool=None, prozesse=None):
+    """
+    Wie die Engines in PDF_ENGINES, rendert aber Deckblatt und
+    Gruppen-Abschnitte parallel und fügt sie in Originalreihenfolge zusammen.
+    Mit eigenem pool gibt prozesse dessen Größe an (Standard: prozess_anzahl()).
+    """
+    erstellen = PDF_ENGINES[engine]
+
+    if PdfWriter is None:
+        logger.warning("pypdf nicht installiert – PDF wird seriell erstellt")
+        erstellen(ausgabe, gruppen_namen, gruppen, standort_label)
+        return
+
+    pool = pool or prozess_pool()
+    prozesse = prozesse or prozess_anzahl()
+
+    zeilen_pro_seite = zeilen_pro_seite_berechnen(LAYOUT.seitenformat[1])
+    artikel_anzahlen = artikel_anzahlen_ermitteln(gruppen_namen, gruppen)
+
+    seiten_gesamt = sum(
+        seitenanzahl_fuer_gruppe_berechnen(anzahl, zeilen_pro_seite)
+        for anzahl in artikel_anzahlen.values() if anzahl
+    )
+    ziel_seiten = max(1, ceil(seiten_gesamt / (prozesse * ABSCHNITTE_JE_PROZESS)))
+    abschnitte = abschnitte_bilden(gruppen_namen, artikel_anzahlen, zeilen_pro_seite, ziel_seiten)
+
+    # Lohnt sich nicht: direkt im aktuellen Prozess
+    if prozesse <= 1 or len(abschnitte) <= 1:
+        erstellen(ausgabe, gruppen_namen, gruppen, standort_label)
+        return
+
+    auftraege = [
+        pool.submit(_teil_rendern, engine, gruppen_namen, {}, standort_label, True, artikel_anzahlen)
+    ]
+    for namen in abschnitte:
+        auftraege.append(pool.submit(
+            _teil_rendern, engine, namen, {g: gruppen[g] for g in namen}, standort_label, False, None
+        ))
+
+    writer = PdfWriter()
+    for auftrag in auftraege:
+        writer.append(PdfReader(BytesIO(auftrag.result())))
+
+    writer.write(ausgabe)
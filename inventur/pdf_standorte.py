@@ -0,0 +1,105 @@
+"""
+Inventur-PDFs aller Standorte in einem Lauf.
+
+Die Artikel werden einmal für alle Gruppen geladen und gruppiert
+(standort_snapshots_holen); je Standort werden nur die Gruppen
+herausgefiltert. Gerendert wird nacheinander im selben Prozess, damit
+sich die Standorte die gekürzten Zelltexte (TEXT_EINPASSER) teilen –
+die Gruppen von B sind dann bereits von A her formatiert.
+
+Die PDFs landen wie beim Einzelabruf im PDF-Cache (inkl. Zeiger)
+oder, bei abgeschaltetem Cache, in Spool-Dateien.
+"""
+
+import logging
+import zipfile
+from tempfile import SpooledTemporaryFile
+from time import perf_counter
+
+from firma_db import PDF_SPALTEN, STANDORTE, standort_snapshots_holen
+from inventur.pdf_cache import PDF_CACHE, pdf_bereitstellen, pdf_rendern, render_schluessel
+
+
+logger = logging.getLogger(__name__)
+
+# Ab dieser Größe (Bytes) wird eine ungecachte PDF auf die Platte ausgelagert
+SPOOL_GROESSE = 8 * 1024 * 1024
+
+
+def standort_dateiname(standort):
+    return f"inventur_{standort}.pdf"
+
+
+def alle_standorte_rendern(quelle=None, engine="platypus", standorte=None, cache=None):
+    """
+    Lädt einmal und liefert je Standort ein dict mit standort, schluessel,
+    datei (zum Lesen geöffnet, vom Aufrufer zu schließen), neu_gerendert,
+    artikel und rendern_s. laden_s steht beim ersten Eintrag.
+    """
+    cache = cache or PDF_CACHE
+
+    start = perf_counter()
+    snapshots = standort_snapshots_holen(quelle, PDF_SPALTEN, standorte or list(STANDORTE))
+    laden_s = perf_counter() - start
+
+    ergebnisse = []
+    try:
+        for standort, snapshot in snapshots.items():
+            start = perf_counter()
+            if cache.aktiv:
+                # Zeiger nur für die aktive Quelle, wie in der View
+                schluessel, datei, neu_gerendert = pdf_bereitstellen(
+                    snapshot, standort, engine, cache=cache, zeiger=quelle is None
+                )
+            else:
+                schluessel = render_schluessel(snapshot.fingerabdruck, standort, engine)
+                datei = SpooledTemporaryFile(max_size=SPOOL_GROESSE)
+                pdf_rendern(datei, snapshot.daten, standort, engine)
+                datei.seek(0)
+                neu_gerendert = True
+
+            ergebnisse.append({
+                "standort": standort,
+                "engine": engine,
+                "schluessel": schluessel,
+                "datei": datei,
+                "neu_gerendert": neu_gerendert,
+                "artikel": snapshot.daten[0],
+                "laden_s": laden_s if not ergebnisse else 0.0,
+                "rendern_s": perf_counter() - start,
+            })
+    except BaseException:
+        for ergebnis in ergebnisse:
+            ergebnis["datei"].close()
+        raise
+
+    for ergebnis in ergebnisse:
+        logger.info(
+            "PDF %s/%s %s: %s Artikel in %.2fs",
+            ergebnis["standort"], engine,
+            "neu gerendert" if ergebnis["neu_gerendert"] else "unverändert",
+            ergebnis["artikel"], ergebnis["rendern_s"],
+        )
+
+    return ergebnisse
+
+
+def alle_standorte_zip_schreiben(ausgabe, quelle=None, engine="platypus", standorte=None, cache=None):
+    """
+    Schreibt die PDFs aller Standorte als inventur_<standort>.pdf in ein ZIP.
+    PDFs sind bereits komprimiert und werden unverändert abgelegt.
+    Liefert die Ergebnisse von alle_standorte_rendern (Dateien geschlossen).
+    """
+    ergebnisse = alle_standorte_rendern(quelle, engine, standorte, cache)
+
+    try:
+        with zipfile.ZipFile(ausgabe, "w", compression=zipfile.ZIP_STORED) as archiv:
+            for ergebnis in ergebnisse:
+                with archiv.open(standort_dateiname(ergebnis["standort"]), "w") as ziel:
+                    while block := ergebnis["datei"].read(1024 * 1024):
+                        ziel.write(block)
+    finally:
+        for ergebnis in ergebnisse:
+            ergebnis["datei"].close()
+
+    return ergebnisse
@@ -0,0 +1,128 @@
+"""
+Artikel-Quellen auf Basis der Django-Datenbank.
+
+Werden in InventurConfig.ready() in firma_db.QUELLEN_TYPEN eingetragen
+und sind dann wie alle anderen Quellen wählbar, z. B.
+INVENTUR_ARTIKEL_QUELLE=inventur:42 oder artikel_quelle_aus_text("inventur:42").
+Den lokalen Artikel-Spiegel (siehe inventur.spiegel) liest
+INVENTUR_ARTIKEL_QUELLE=spiegel.
+"""
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from firma_db import ARTIKEL_SPALTEN, BATCH_GROESSE, ArtikelQuelle, spalten_pruefen
+from inventur.models import ArtikelSpiegel, ArtikelSpiegelAbgleich, InventurPosition
+
+
+# Spalte der ERP-Abfrage -> Feld von InventurPosition
+INVENTUR_FELDER = {
+    "ART_NR": "Cortexnr",
+    "HERST_NAME": "Hersteller",
+    "HERST_ART_NR": "Artikelnr_Hersteller",
+    "ART_NAME": "Artikelnaam",
+    "WG_NR": "WG_NR",
+    "WOG_NR": "WOG_NR",
+    "WG_NAME": "WG_NAME",
+    "EK": "EK",
+    "EINH": "EINHEIT",
+    "EINH_BEST": "EINH_BEST",
+    "EINH_UMR": "EINH_UMR",
+    "Lager": "Lager",
+}
+
+
+class InventurQuelle(ArtikelQuelle):
+    """
+    Eingefrorener Artikelstand einer Inventur (InventurPosition)
+    statt Live-Abfrage gegen das ERP.
+    """
+
+    name = "inventur"
+
+    def __init__(self, inventur_id):
+        self.inventur_id = int(inventur_id)
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        felder = [INVENTUR_FELDER[spalte] for spalte in spalten_pruefen(spalten)]
+
+        # Gleiche Auswahl und Reihenfolge wie artikel_sql; Cortexnr macht
+        # die Reihenfolge bei gleicher Herst.-Nr. (und damit den Fingerabdruck) eindeutig
+        zeilen = (
+            self._positionen()
+            .exclude(WG_NR__in=list(ausgeschlossene_wg))
+            .order_by("WG_NR", Lower("Artikelnr_Hersteller"), "Cortexnr")
+            .values_list(*felder)
+            .iterator(chunk_size=batch_groesse)
+        )
+
+        batch = []
+        for zeile in zeilen:
+            batch.append(zeile)
+            if len(batch) >= batch_groesse:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def schluessel(self):
+        return (self.name, self.inventur_id)
+
+    def aenderungsmarke(self):
+        # Artikeldaten sind eingefroren; nur Neuanlage/Löschen ändert etwas
+        return self._positionen().count()
+
+    def _positionen(self):
+        return InventurPosition.objects.filter(inventur_id=self.inventur_id)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.inventur_id}>"
+
+
+class SpiegelQuelle(ArtikelQuelle):
+    """
+    Lokaler Spiegel von dbo.ART_STAMM_VW (ArtikelSpiegel),
+    aktuell gehalten per manage.py artikel_spiegeln.
+    """
+
+    name = "spiegel"
+
+    def __init__(self, argument=""):
+        pass
+
+    def zeilen_iterieren(self, spalten=ARTIKEL_SPALTEN, batch_groesse=BATCH_GROESSE, ausgeschlossene_wg=()):
+        spalten = spalten_pruefen(spalten)
+
+        if not ArtikelSpiegelAbgleich.objects.exists():
+            raise RuntimeError("Artikel-Spiegel ist leer – zuerst 'manage.py artikel_spiegeln' ausführen.")
+
+        # Filter (Aktiv, WOG_NR, WG_NR) gilt schon beim Abgleich;
+        # Reihenfolge wie artikel_sql, bei Gleichstand nach ART_NR
+        zeilen = (
+            ArtikelSpiegel.objects
+            .exclude(WG_NR__in=list(ausgeschlossene_wg))
+            .order_by("WG_NR", Lower("HERST_ART_NR"), "ART_NR")
+            .values_list(*spalten)
+            .iterator(chunk_size=batch_groesse)
+        )
+
+        batch = []
+        for zeile in zeilen:
+            batch.append(zeile)
+            if len(batch) >= batch_groesse:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def aenderungsmarke(self):
+        # Letzter Abgleich, der tatsächlich etwas geändert hat
+        return (
+            ArtikelSpiegelAbgleich.objects
+            .filter(Q(neu__gt=0) | Q(geaendert__gt=0) | Q(entfernt__gt=0))
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+        )
@@ -0,0 +1,176 @@
+"""
+Inkrementeller Abgleich von dbo.ART_STAMM_VW in den lokalen Spiegel
+(ArtikelSpiegel in der default-Datenbank).
+
+Die View hat keine rowversion, deshalb wird per Prüfsumme je
+ART_NR-Block verglichen (Block = ART_NR // blockgroesse):
+
+1. Die Quelle liefert Anzahl und Prüfsumme je Block – eine Abfrage
+   mit GROUP BY, übertragen werden nur wenige Zahlen je Block.
+2. Nur Blöcke, deren Stand sich seit dem letzten Abgleich geändert
+   hat, werden komplett geholt und zeilenweise mit dem Spiegel
+   verglichen; geschrieben werden nur neue, geänderte und
+   weggefallene (auch deaktivierte) Artikel.
+3. Blöcke, die in der Quelle ganz fehlen, werden im Spiegel geleert.
+
+Mit voll=True (oder bei neuer Quelle/Blockgröße) werden alle Blöcke
+verglichen, z. B. gelegentlich gegen Kollisionen von CHECKSUM_AGG.
+
+Die PDFs lesen danach über die Quelle "spiegel" (inventur.quellen.SpiegelQuelle).
+"""
+
+import logging
+import os
+from decimal import Decimal
+from time import perf_counter
+
+from django.db import transaction
+from django.utils import timezone
+
+import messung
+from firma_db import ARTIKEL_SPALTEN, BATCH_GROESSE, artikel_quelle_aus_text, block_bereiche
+from inventur.models import ArtikelSpiegel, ArtikelSpiegelAbgleich, ArtikelSpiegelBlock
+
+
+logger = logging.getLogger(__name__)
+
+# ART_NR je Block; kleiner = weniger Zeilen je Änderung, aber mehr Prüfsummen
+BLOCK_GROESSE = int(os.environ.get("INVENTUR_SPIEGEL_BLOCKGROESSE", 1000))
+
+# Löschen in Portionen (Grenze für SQL-Parameter)
+LOESCH_BATCH = 500
+
+
+def spiegel_quelle():
+    """
+    Quelle, aus der gespiegelt wird (ENV: INVENTUR_SPIEGEL_QUELLE, Standard: ERP).
+    """
+    return artikel_quelle_aus_text(os.environ.get("INVENTUR_SPIEGEL_QUELLE"))
+
+
+def _normalisieren(zeile):
+    # pyodbc liefert money/decimal als Decimal, der Spiegel speichert float
+    return tuple(float(wert) if isinstance(wert, Decimal) else wert for wert in zeile)
+
+
+def _lokale_zeilen(bereiche):
+    """
+    {ART_NR: Zeile} des Spiegels in den ART_NR-Bereichen.
+    """
+    lokal = {}
+    for von, bis in bereiche:
+        zeilen = (
+            ArtikelSpiegel.objects
+            .filter(ART_NR__gte=von, ART_NR__lt=bis)
+            .values_list(*ARTIKEL_SPALTEN)
+            .iterator(chunk_size=BATCH_GROESSE)
+        )
+        for zeile in zeilen:
+            lokal[zeile[0]] = zeile
+    return lokal
+
+
+def spiegel_abgleichen(quelle=None, blockgroesse=BLOCK_GROESSE, voll=False):
+    """
+    Gleicht den Spiegel mit der Quelle ab und liefert das
+    gespeicherte ArtikelSpiegelAbgleich (Dauer, übertragene Zeilen).
+    """
+    quelle = quelle or spiegel_quelle()
+    quelle_text = repr(quelle.schluessel())[:200]
+    gestartet = timezone.now()
+    start = perf_counter()
+
+    letzter = ArtikelSpiegelAbgleich.objects.order_by("-id").first()
+    voll = voll or letzter is None or letzter.quelle != quelle_text or letzter.blockgroesse != blockgroesse
+
+    # 1. Prüfsummen je Block
+    with messung.stufe("spiegel_pruefsummen", quelle=quelle.name) as s:
+        stand = {
+            block: (block * blockgroesse, (block + 1) * blockgroesse, anzahl, str(pruefsumme))
+            for block, (anzahl, pruefsumme) in quelle.block_pruefsummen(blockgroesse).items()
+        }
+        s.setzen(bloecke=len(stand))
+
+    bisher = {} if voll else {
+        b.von: (b.von, b.bis, b.anzahl, b.pruefsumme) for b in ArtikelSpiegelBlock.objects.all()
+    }
+    geaenderte_bloecke = [block for block, werte in stand.items() if bisher.get(werte[0]) != werte]
+
+    # Bereiche, deren Zeilen verglichen werden: geänderte Blöcke plus
+    # Blöcke, die in der Quelle weggefallen sind (bzw. bei voll alles)
+    bereiche = block_bereiche(geaenderte_bloecke, blockgroesse)
+    vorhandene_von = {werte[0] for werte in stand.values()}
+    if voll:
+        bereiche = [(0, 2**31)]
+    else:
+        bereiche += [(von, bis) for von, (_, bis, _, _) in bisher.items() if von not in vorhandene_von]
+
+    # 2. Geänderte Blöcke aus der Quelle holen
+    with messung.stufe("spiegel_uebertragen", quelle=quelle.name) as s:
+        quell_zeilen = {}
+        if geaenderte_bloecke:
+            for batch in quelle.zeilen_fuer_bloecke(geaenderte_bloecke, blockgroesse):
+                for zeile in batch:
+                    quell_zeilen[zeile[0]] = _normalisieren(zeile)
+        s.setzen(zeilen=len(quell_zeilen))
+
+    # 3. Zeilenweise vergleichen und nur Unterschiede schreiben
+    with messung.stufe("spiegel_schreiben") as s:
+        lokal = _lokale_zeilen(bereiche) if bereiche else {}
+
+        neu = [zeile for art_nr, zeile in quell_zeilen.items() if art_nr not in lokal]
+        geaendert = [
+            zeile for art_nr, zeile in quell_zeilen.items()
+            if art_nr in lokal and lokal[art_nr] != zeile
+        ]
+        entfernt = [art_nr for art_nr in lokal if art_nr not in quell_zeilen]
+
+        with transaction.atomic():
+            weg = entfernt + [zeile[0] for zeile in geaendert]
+            for i in range(0, len(weg), LOESCH_BATCH):
+                ArtikelSpiegel.objects.filter(ART_NR__in=weg[i:i + LOESCH_BATCH]).delete()
+
+            ArtikelSpiegel.objects.bulk_create(
+                (ArtikelSpiegel(**dict(zip(ARTIKEL_SPALTEN, zeile))) for zeile in neu + geaendert),
+                batch_size=1000,
+            )
+
+            # Block-Stände erst zusammen mit den Zeilen festschreiben
+            if voll:
+                ArtikelSpiegelBlock.objects.all().delete()
+                neue_staende = list(stand.values())
+            else:
+                veraltet = [von for von in bisher if von not in vorhandene_von]
+                veraltet += [stand[block][0] for block in geaenderte_bloecke]
+                for i in range(0, len(veraltet), LOESCH_BATCH):
+                    ArtikelSpiegelBlock.objects.filter(von__in=veraltet[i:i + LOESCH_BATCH]).delete()
+                neue_staende = [stand[block] for block in geaenderte_bloecke]
+
+            ArtikelSpiegelBlock.objects.bulk_create(
+                (ArtikelSpiegelBlock(von=von, bis=bis, anzahl=anzahl, pruefsumme=pruefsumme)
+                 for von, bis, anzahl, pruefsumme in neue_staende),
+                batch_size=1000,
+            )
+
+            abgleich = ArtikelSpiegelAbgleich.objects.create(
+                quelle=quelle_text,
+                gestartet=gestartet,
+                dauer_s=perf_counter() - start,
+                blockgroesse=blockgroesse,
+                voll=voll,
+                bloecke=len(stand),
+                bloecke_geaendert=len(geaenderte_bloecke),
+                zeilen_uebertragen=len(quell_zeilen),
+                neu=len(neu),
+                geaendert=len(geaendert),
+                entfernt=len(entfernt),
+            )
+        s.setzen(neu=len(neu), geaendert=len(geaendert), entfernt=len(entfernt))
+
+    logger.info(
+        "Artikel-Spiegel abgeglichen in %.2fs: %s/%s Blöcke geändert, %s Zeilen übertragen "
+        "(neu %s, geändert %s, entfernt %s)%s",
+        abgleich.dauer_s, abgleich.bloecke_geaendert, abgleich.bloecke, abgleich.zeilen_uebertragen,
+        abgleich.neu, abgleich.geaendert, abgleich.entfernt, " [voll]" if voll else "",
+    )
+    return abgleich
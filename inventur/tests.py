@@ -1,3 +1,1504 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import urlencode
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus.doctemplate import LayoutError
+
+from firma_db import (
+    ARTIKEL_SPALTEN, AUSGESCHLOSSENE_WG_NUMMERN, PDF_SPALTEN, SNAPSHOT_CACHE, STANDORTE, UEBERGRUPPEN, ArtikelQuelle,
+    ArtikelSnapshotCache, GruppierungsIndex, OdbcVerbindungsPool, SqliteQuelle, artikel_lager_laden,
+    artikel_nach_warengruppen_gruppieren, artikel_quelle_aus_text, artikel_snapshot_holen, daten_fuer_standort,
+    fixture_schreiben, gruppen_fuer_standort_filtern,
+)
+from inventur.artikel_liste import MAX_SEITEN_GROESSE, SEITEN_GROESSE, artikel_listen_index
+from inventur.artikel_suche import ArtikelSuchIndex
+from inventur.benchmark import KATALOG_SPALTEN, katalog_schreiben, synthetische_artikel
+from inventur.models import ArtikelSpiegel, Inventur, InventurPosition
+from inventur.pdf import LAYOUT, PDF_ENGINES, TextEinpasser, seiten_aufteilen, zeilen_pro_seite_berechnen
+from inventur.pdf_auftraege import FEHLER, FERTIG, PdfAuftrag, PdfAuftragsVerwaltung
+from inventur.pdf_cache import STANDARD_VERZEICHNIS, PdfRenderCache
+from inventur.pdf_parallel import PdfReader, inventur_pdf_parallel_erstellen
+from inventur.quellen import InventurQuelle
+from inventur.zaehlung import MAX_ZAEHLUNGEN, ZaehlungFehler, zaehlungen_pruefen, zaehlungen_uebernehmen
+
+
+class KatalogMixin:
+    """
+    Synthetischer Artikelstamm als SQLite-Fixture in einem temporären Verzeichnis.
+    """
+
+    katalog_zeilen = 600
+
+    def setUp(self):
+        super().setUp()
+        self.verzeichnis = tempfile.mkdtemp(prefix="inventur_test_")
+        self.addCleanup(shutil.rmtree, self.verzeichnis, ignore_errors=True)
+
+        self.katalog = os.path.join(self.verzeichnis, "katalog.sqlite")
+        katalog_schreiben(f"sqlite:{self.katalog}", self.katalog_zeilen, seed=1)
+        self.quelle = SqliteQuelle(self.katalog)
+
+        # Snapshots früherer Tests (gleiche Quelle, andere Daten) verwerfen
+        SNAPSHOT_CACHE.invalidieren()
+        self.addCleanup(SNAPSHOT_CACHE.invalidieren)
+
+    def katalog_aendern(self, sql, *parameter):
+        conn = sqlite3.connect(self.katalog)
+        try:
+            conn.execute(sql, parameter)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+# ============================================================
+# Artikel-Quellen
+# ============================================================
+
+class QuellenReihenfolgeTest(SimpleTestCase):
+
+    def setUp(self):
+        self.verzeichnis = tempfile.mkdtemp(prefix="inventur_test_")
+        self.addCleanup(shutil.rmtree, self.verzeichnis, ignore_errors=True)
+
+        zeilen = [list(zeile) for zeile in synthetische_artikel(2000, seed=3)]
+        # Groß-/Kleinschreibung, Umlaute und NULL in einer WG: Sortierung wie ORDER BY ... COLLATE NOCASE
+        herst_nr = KATALOG_SPALTEN.index("HERST_ART_NR")
+        for zeile, nummer in zip(zeilen[:8], ("ab-7", "AB-6", "Ab-5", None, "Ärger-1", "zz-1", "ZY-2", "b")):
+            zeile[KATALOG_SPALTEN.index("WG_NR")] = 1
+            zeile[KATALOG_SPALTEN.index("WOG_NR")] = 5
+            zeile[KATALOG_SPALTEN.index("Aktiv")] = 1
+            zeile[herst_nr] = nummer
+        self.zeilen = zeilen
+
+    def quelle(self, typ):
+        ziel = f"{typ}:{os.path.join(self.verzeichnis, 'katalog.' + typ)}"
+        fixture_schreiben(ziel, KATALOG_SPALTEN, self.zeilen)
+        return artikel_quelle_aus_text(ziel)
+
+    def assertGleicheDaten(self, quelle, referenz):
+        for standort in (None, "A", "B"):
+            with self.subTest(quelle=quelle.name, standort=standort):
+                self.assertEqual(
+                    artikel_lager_laden(quelle, standort=standort),
+                    artikel_lager_laden(referenz, standort=standort),
+                )
+
+    def test_csv_wie_sqlite(self):
+        sqlite_quelle = self.quelle("sqlite")
+        self.assertGleicheDaten(self.quelle("csv"), sqlite_quelle)
+
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(sqlite_quelle)
+        gruppe = next(g for g in gruppen_namen if any(art.WG_NR == 1 for art in gruppen[g]))
+        self.assertEqual(
+            [art.HERST_ART_NR for art in gruppen[gruppe] if art.WG_NR == 1][:8],
+            [None, "Ab-5", "AB-6", "ab-7", "b", "ZY-2", "zz-1", "Ärger-1"],
+        )
+
+    @skipIf(importlib.util.find_spec("pyarrow") is None, "pyarrow nicht installiert")
+    def test_parquet_wie_sqlite(self):
+        self.assertGleicheDaten(self.quelle("parquet"), self.quelle("sqlite"))
+
+
+# ============================================================
+# ODBC-Verbindungspool
+# ============================================================
+
+class _FakeVerbindung:
+
+    def __init__(self):
+        self.geschlossen = False
+        self.kaputt = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        if self.kaputt:
+            raise ConnectionError("Verbindung getrennt")
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.geschlossen = True
+
+
+class OdbcVerbindungsPoolTest(SimpleTestCase):
+
+    def setUp(self):
+        self.verbindungen = []
+        self.pool = OdbcVerbindungsPool(
+            "DSN=test", max_groesse=2, leerlauf_timeout=300, pruef_intervall=30, verbinden=self.verbinden
+        )
+
+    def verbinden(self):
+        self.verbindungen.append(_FakeVerbindung())
+        return self.verbindungen[-1]
+
+    def altern(self, sekunden):
+        self.pool._frei = [(conn, zuletzt - sekunden) for conn, zuletzt in self.pool._frei]
+
+    def test_verbindung_wird_wiederverwendet(self):
+        with self.pool.verbindung() as erste:
+            pass
+        with self.pool.verbindung() as zweite:
+            self.assertEqual(self.pool.kennzahlen(), {"frei": 0, "ausgeliehen": 1})
+
+        self.assertIs(zweite, erste)
+        self.assertEqual(len(self.verbindungen), 1)
+        self.assertEqual(self.pool.kennzahlen(), {"frei": 1, "ausgeliehen": 0})
+
+    def test_leerlauf_wird_geschlossen(self):
+        with self.pool.verbindung() as alt:
+            pass
+        self.altern(301)
+
+        with self.pool.verbindung() as neu:
+            pass
+
+        self.assertIsNot(neu, alt)
+        self.assertTrue(alt.geschlossen)
+        self.assertEqual(self.pool.kennzahlen(), {"frei": 1, "ausgeliehen": 0})
+
+    def test_kaputte_verbindung_nach_pruefintervall_ersetzt(self):
+        with self.pool.verbindung() as alt:
+            pass
+
+        # Innerhalb des Prüfintervalls ungeprüft wiederverwendet
+        alt.kaputt = True
+        with self.pool.verbindung() as conn:
+            self.assertIs(conn, alt)
+
+        self.altern(31)
+        with self.pool.verbindung() as neu:
+            pass
+
+        self.assertIsNot(neu, alt)
+        self.assertTrue(alt.geschlossen)
+        self.assertEqual(len(self.verbindungen), 2)
+
+    def test_fehler_verwirft_verbindung(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.verbindung() as conn:
+                raise RuntimeError("Abfrage fehlgeschlagen")
+
+        self.assertTrue(conn.geschlossen)
+        self.assertEqual(self.pool.kennzahlen(), {"frei": 0, "ausgeliehen": 0})
+
+    def test_voller_pool_wartet_bis_timeout(self):
+        with self.pool.verbindung(), self.pool.verbindung():
+            with self.assertRaises(TimeoutError):
+                with self.pool.verbindung(timeout=0.05):
+                    pass
+
+            # Wird eine zurückgegeben, kommt der Wartende zum Zug
+            freigegeben = threading.Event()
+
+            def warten():
+                with self.pool.verbindung(timeout=5):
+                    freigegeben.set()
+
+            thread = threading.Thread(target=warten)
+            thread.start()
+        thread.join(5)
+
+        self.assertTrue(freigegeben.is_set())
+        self.assertEqual(len(self.verbindungen), 2)
+
+
+# ============================================================
+# Gruppierung
+# ============================================================
+
+class GruppierungsIndexTest(SimpleTestCase):
+
+    uebergruppen = {"Folien": {3, 1}, "Platten": {7}}
+
+    def test_doppelte_wg_faellt_beim_aufbau_auf(self):
+        with self.assertRaisesRegex(ValueError, r"WG_NR 7 .*'Folien' und 'Platten'"):
+            GruppierungsIndex({"Folien": {7, 1}, "Platten": {7}}, set())
+
+    def test_restgruppen_nach_wg_nummer(self):
+        index = GruppierungsIndex(self.uebergruppen, {5})
+        artikel = [{"ART_NR": nr, "WG_NR": wg} for nr, wg in enumerate((12, 1, 7, 2, 5, None, 3, 12, 2))]
+
+        gruppen_namen, gruppen = index.gruppieren(artikel)
+
+        # Restgruppen hinter den Übergruppen, numerisch ("WG 2" vor "WG 12")
+        self.assertEqual(gruppen_namen, ["Folien", "Platten", "WG 2", "WG 12"])
+        self.assertEqual({g: [a["ART_NR"] for a in gruppen[g]] for g in gruppen_namen}, {
+            "Folien": [1, 6], "Platten": [2], "WG 2": [3, 8], "WG 12": [0, 7],
+        })
+        self.assertEqual(artikel_nach_warengruppen_gruppieren(artikel, self.uebergruppen, {5}), gruppen)
+
+        self.assertEqual(sorted(gruppen_namen, key=index.rang), gruppen_namen)
+        self.assertEqual([index.gruppen_name(index.gruppen_id(wg)) for wg in (3, 7, 2, 12)],
+                         ["Folien", "Platten", "WG 2", "WG 12"])
+        self.assertEqual(index.wg_nummern("WG 12"), {12})
+        self.assertEqual(index.wg_nummern("Folien"), {1, 3})
+        self.assertEqual(index.wg_nummern("Unbekannt"), set())
+
+
+# ============================================================
+# Artikel laden
+# ============================================================
+
+class ArtikelLadenTest(KatalogMixin, SimpleTestCase):
+
+    katalog_zeilen = 3000
+
+    def test_batches_und_spaltenauswahl_wie_gesamt(self):
+        alle_spalten = artikel_lager_laden(self.quelle)
+        _, _, gruppen_namen, gruppen = alle_spalten
+
+        for batch_groesse in (1, 7, 5000):
+            with self.subTest(batch_groesse=batch_groesse):
+                self.assertEqual(artikel_lager_laden(self.quelle, batch_groesse=batch_groesse), alle_spalten)
+
+        anzahl, anzahl_gruppen, pdf_gruppen_namen, pdf_gruppen = artikel_lager_laden(
+            self.quelle, PDF_SPALTEN, batch_groesse=7
+        )
+        self.assertEqual((anzahl, anzahl_gruppen, pdf_gruppen_namen), alle_spalten[:3])
+        for gruppe in gruppen_namen:
+            felder = pdf_gruppen[gruppe][0]._fields
+            self.assertEqual(set(felder), set(PDF_SPALTEN))
+            self.assertEqual(
+                pdf_gruppen[gruppe],
+                [tuple(getattr(art, feld) for feld in felder) for art in gruppen[gruppe]],
+            )
+
+    def test_standort_in_abfrage_wie_nachtraeglich_gefiltert(self):
+        csv_pfad = os.path.join(self.verzeichnis, "katalog.csv")
+        katalog_schreiben(f"csv:{csv_pfad}", self.katalog_zeilen, seed=1)
+
+        for quelle in (self.quelle, artikel_quelle_aus_text(f"csv:{csv_pfad}")):
+            alle = artikel_lager_laden(quelle)
+            for standort, eintrag in STANDORTE.items():
+                with self.subTest(quelle=quelle.name, standort=standort):
+                    gefiltert = artikel_lager_laden(quelle, standort=standort)
+                    gruppen_namen, gruppen = gruppen_fuer_standort_filtern(alle[2], alle[3], eintrag["skip_groups"])
+
+                    self.assertEqual(gefiltert, daten_fuer_standort(alle, standort))
+                    self.assertEqual(gefiltert[2:], (gruppen_namen, gruppen))
+                    if eintrag["skip_groups"]:
+                        # Übersprungene Gruppen kommen gar nicht erst aus der Abfrage
+                        self.assertTrue(eintrag["skip_groups"] & set(alle[2]))
+                        self.assertLess(gefiltert[0], alle[0])
+
+
+# ============================================================
+# Snapshot-Cache
+# ============================================================
+
+class _FesteQuelle(ArtikelQuelle):
+    name = "fest"
+
+    def aenderungsmarke(self):
+        return 1
+
+
+class SnapshotCacheTest(SimpleTestCase):
+
+    def test_laden_blockiert_andere_schluessel_nicht(self):
+        gestartet, freigeben = threading.Event(), threading.Event()
+        geladen = []
+
+        def lader(quelle, spalten, standort=None):
+            geladen.append(standort)
+            if standort == "A":
+                gestartet.set()
+                freigeben.wait(5)
+            return 0, 0, [], {}
+
+        cache = ArtikelSnapshotCache(ttl=60, lader=lader)
+        quelle = _FesteQuelle()
+        cache.snapshot(quelle, PDF_SPALTEN, "B")
+
+        # Drei gleichzeitige Anfragen für A laden nur einmal
+        threads = [threading.Thread(target=cache.snapshot, args=(quelle, PDF_SPALTEN, "A")) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(gestartet.wait(5))
+
+        # Während A lädt, kommen Treffer für B und die Kennzahlen sofort
+        start = time.perf_counter()
+        cache.snapshot(quelle, PDF_SPALTEN, "B")
+        cache.kennzahlen()
+        self.assertLess(time.perf_counter() - start, 1)
+
+        freigeben.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(geladen.count("A"), 1)
+        self.assertEqual(cache.kennzahlen()["neu_geladen"], 2)
+
+    def test_abgelaufen_mit_gleicher_marke_wird_revalidiert(self):
+        cache = ArtikelSnapshotCache(ttl=60, lader=lambda quelle, spalten, standort=None: (0, 0, [], {}))
+        quelle = _FesteQuelle()
+        erster = cache.snapshot(quelle, PDF_SPALTEN)
+        erster.geprueft_um -= 120
+
+        self.assertIs(cache.snapshot(quelle, PDF_SPALTEN), erster)
+        self.assertEqual(cache.kennzahlen()["revalidiert"], 1)
+        self.assertEqual(cache.kennzahlen()["neu_geladen"], 1)
+
+
+# ============================================================
+# Artikel-Spiegel
+# ============================================================
+
+class SpiegelAbgleichTest(KatalogMixin, TestCase):
+
+    def quell_zeilen(self):
+        return sorted(self.quelle.zeilen_laden()[1])
+
+    def spiegel_zeilen(self):
+        return sorted(ArtikelSpiegel.objects.values_list(*ARTIKEL_SPALTEN))
+
+    def abgleichen(self, **kwargs):
+        from inventur.spiegel import spiegel_abgleichen
+        return spiegel_abgleichen(self.quelle, blockgroesse=100, **kwargs)
+
+    def test_erster_abgleich_ist_voll(self):
+        abgleich = self.abgleichen()
+
+        self.assertTrue(abgleich.voll)
+        self.assertEqual(abgleich.neu, len(self.quell_zeilen()))
+        self.assertEqual(self.spiegel_zeilen(), self.quell_zeilen())
+
+    def test_ohne_aenderung_wird_nichts_uebertragen(self):
+        self.abgleichen()
+        marke = artikel_quelle_aus_text("spiegel").aenderungsmarke()
+
+        abgleich = self.abgleichen()
+
+        self.assertFalse(abgleich.voll)
+        self.assertEqual((abgleich.bloecke_geaendert, abgleich.zeilen_uebertragen, abgleich.aenderungen), (0, 0, 0))
+        self.assertEqual(artikel_quelle_aus_text("spiegel").aenderungsmarke(), marke)
+
+    def test_nur_geaenderte_bloecke_werden_abgeglichen(self):
+        self.abgleichen()
+        vorher = self.spiegel_zeilen()
+        art_nr = vorher[0][0]
+
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET ART_NAME = 'Geändert' WHERE ART_NR = ?", art_nr)
+        abgleich = self.abgleichen()
+
+        self.assertEqual(abgleich.bloecke_geaendert, 1)
+        self.assertEqual(abgleich.geaendert, 1)
+        self.assertEqual((abgleich.neu, abgleich.entfernt), (0, 0))
+        # Übertragen wird genau der eine Block
+        self.assertEqual(abgleich.zeilen_uebertragen, sum(1 for z in vorher if z[0] // 100 == art_nr // 100))
+        self.assertEqual(self.spiegel_zeilen(), self.quell_zeilen())
+
+    def test_deaktivierte_und_geloeschte_artikel_werden_entfernt(self):
+        self.abgleichen()
+        zeilen = self.spiegel_zeilen()
+        deaktiviert = zeilen[0][0]
+        block = zeilen[-1][0] // 100
+        im_block = [z[0] for z in zeilen if z[0] // 100 == block]
+
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET Aktiv = 0 WHERE ART_NR = ?", deaktiviert)
+        # Ganzer Block fällt in der Quelle weg
+        self.katalog_aendern("DELETE FROM ART_STAMM_VW WHERE ART_NR >= ? AND ART_NR < ?", block * 100, block * 100 + 100)
+        abgleich = self.abgleichen()
+
+        self.assertEqual(abgleich.entfernt, 1 + len(im_block))
+        self.assertFalse(ArtikelSpiegel.objects.filter(ART_NR=deaktiviert).exists())
+        self.assertFalse(ArtikelSpiegel.objects.filter(ART_NR__in=im_block).exists())
+        self.assertEqual(self.spiegel_zeilen(), self.quell_zeilen())
+
+    def test_voll_findet_abweichungen_im_spiegel(self):
+        self.abgleichen()
+        # Abweichung, die keine Prüfsumme der Quelle sieht
+        ArtikelSpiegel.objects.filter(pk=self.spiegel_zeilen()[0][0]).update(ART_NAME="kaputt")
+
+        self.assertEqual(self.abgleichen().geaendert, 0)
+        self.assertEqual(self.abgleichen(voll=True).geaendert, 1)
+        self.assertEqual(self.spiegel_zeilen(), self.quell_zeilen())
+
+    def test_spiegel_liefert_gleiche_daten_wie_quelle(self):
+        self.abgleichen()
+        spiegel = artikel_quelle_aus_text("spiegel")
+
+        for standort in (None, "A", "B"):
+            self.assertEqual(
+                artikel_lager_laden(spiegel, PDF_SPALTEN, standort=standort),
+                artikel_lager_laden(self.quelle, PDF_SPALTEN, standort=standort),
+            )
+
+
+class SpiegelVorrendernTest(KatalogMixin, TestCase):
+
+    def test_vorrendern_aus_dem_spiegel(self):
+        from inventur.spiegel import spiegel_abgleichen
+        from inventur.vorrendern import _standort_vorrendern
+
+        spiegel_abgleichen(self.quelle, blockgroesse=100)
+        cache = PdfRenderCache(os.path.join(self.verzeichnis, "pdf"), 50 * 2**20)
+
+        with mock.patch("inventur.pdf_cache.PDF_CACHE", cache):
+            ergebnis = _standort_vorrendern("A", "canvas", "spiegel")
+
+        self.assertEqual(ergebnis["artikel"], artikel_lager_laden(self.quelle, PDF_SPALTEN, standort="A")[0])
+        datei = cache.oeffnen(ergebnis["schluessel"])
+        self.assertIsNotNone(datei)
+        datei.close()
+
+    def test_pool_prozesse_kennen_die_django_quellen(self):
+        from inventur.vorrendern import vorrender_pool
+
+        # "spawn"-Prozess: spiegel/inventur gibt es erst nach django.setup()
+        with vorrender_pool(1) as pool:
+            self.assertEqual(pool.submit(artikel_quelle_aus_text, "spiegel").result().name, "spiegel")
+
+
+# ============================================================
+# Vorrendern
+# ============================================================
+
+class VorrendernZeigerTest(KatalogMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = PdfRenderCache(os.path.join(self.verzeichnis, "pdf"), 50 * 2**20)
+        cache_patch = mock.patch("inventur.pdf_cache.PDF_CACHE", self.cache)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def zeiger(self):
+        return self.cache.zeiger_lesen("A-canvas", max_alter=3600)
+
+    def test_andere_quelle_laesst_zeiger_stehen(self):
+        from inventur.vorrendern import _standort_vorrendern
+
+        ergebnis = _standort_vorrendern("A", "canvas", f"sqlite:{self.katalog}")
+
+        self.assertIsNone(self.zeiger())
+        self.assertIsNotNone(ergebnis["schluessel"])
+
+    def test_standard_quelle_setzt_zeiger(self):
+        from inventur.vorrendern import _standort_vorrendern
+
+        with mock.patch("firma_db._aktive_quelle", self.quelle):
+            ergebnis = _standort_vorrendern("A", "canvas", None)
+
+        self.assertEqual(self.zeiger(), ergebnis["schluessel"])
+
+
+# ============================================================
+# PDF-Cache
+# ============================================================
+
+class PdfCacheVerzeichnisTest(SimpleTestCase):
+
+    def test_standard_nicht_im_temp_verzeichnis(self):
+        self.assertFalse(STANDARD_VERZEICHNIS.startswith(tempfile.gettempdir()))
+
+    def test_verzeichnis_nur_fuer_eigenen_benutzer(self):
+        basis = tempfile.mkdtemp(prefix="inventur_test_")
+        self.addCleanup(shutil.rmtree, basis, ignore_errors=True)
+        cache = PdfRenderCache(os.path.join(basis, "pdfs"), max_bytes=2**20)
+
+        cache.ablegen("abc", lambda datei: datei.write(b"%PDF")).close()
+
+        self.assertEqual(os.stat(cache.verzeichnis).st_mode & 0o777, 0o700)
+
+
+class InventurPdfViewTest(KatalogMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = PdfRenderCache(os.path.join(self.verzeichnis, "pdf"), 50 * 2**20)
+        for ziel in ("inventur.pdf_cache.PDF_CACHE", "inventur.views.PDF_CACHE"):
+            cache_patch = mock.patch(ziel, self.cache)
+            cache_patch.start()
+            self.addCleanup(cache_patch.stop)
+
+        quelle_patch = mock.patch("firma_db._aktive_quelle", self.quelle)
+        quelle_patch.start()
+        self.addCleanup(quelle_patch.stop)
+
+    def pdf_holen(self, **header):
+        return self.client.get("/startseite/", {"site": "A", "engine": "canvas"}, **header)
+
+    @skipIf(PdfReader is None, "pypdf nicht installiert")
+    def test_pdf_wird_gestreamt(self):
+        erwartet = BytesIO()
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(self.quelle, PDF_SPALTEN, standort="A")
+        PDF_ENGINES["canvas"](erwartet, gruppen_namen, gruppen, STANDORTE["A"]["label"])
+
+        for cache_mb in (50, 0):
+            with self.subTest(cache_mb=cache_mb):
+                self.cache.max_bytes = cache_mb * 2**20
+                response = self.pdf_holen()
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response["Content-Type"], "application/pdf")
+                self.assertEqual(pdf_seiten_text(b"".join(response.streaming_content)),
+                                 pdf_seiten_text(erwartet.getvalue()))
+
+    def erste_fassung(self):
+        response = self.pdf_holen()
+        inhalt = b"".join(response.streaming_content)
+        response.close()
+        return response["ETag"], inhalt
+
+    def test_etag_und_304(self):
+        etag, inhalt = self.erste_fassung()
+
+        with mock.patch("inventur.pdf_cache.pdf_rendern") as rendern:
+            for if_none_match, status in ((etag, 304), ("*", 304), (f'"alt", {etag}', 304), ('"alt"', 200)):
+                with self.subTest(if_none_match=if_none_match):
+                    response = self.pdf_holen(HTTP_IF_NONE_MATCH=if_none_match)
+                    self.assertEqual(response.status_code, status)
+                    self.assertEqual(response["ETag"], etag)
+                    if status == 200:
+                        self.assertEqual(b"".join(response.streaming_content), inhalt)
+                    response.close()
+
+        rendern.assert_not_called()
+
+    def test_frischer_zeiger_ohne_daten_laden(self):
+        etag, inhalt = self.erste_fassung()
+
+        with mock.patch("inventur.views.artikel_snapshot_holen", side_effect=AssertionError("Daten geladen")):
+            self.assertEqual(self.pdf_holen(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            response = self.pdf_holen()
+            self.assertEqual(response["ETag"], etag)
+            self.assertEqual(b"".join(response.streaming_content), inhalt)
+            response.close()
+
+    def test_alter_zeiger_laedt_daten(self):
+        etag, _ = self.erste_fassung()
+        self.cache.zeiger_setzen("A-canvas", etag.strip('"'), geprueft_um=time.time() - SNAPSHOT_CACHE.ttl - 1)
+
+        with mock.patch("inventur.views.artikel_snapshot_holen", wraps=artikel_snapshot_holen) as holen:
+            self.assertEqual(self.pdf_holen(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        holen.assert_called_once()
+
+    def test_verdraengte_pdf_wird_neu_gerendert(self):
+        etag, _ = self.erste_fassung()
+        os.remove(self.cache._pfad(etag.strip('"')))
+
+        response = self.pdf_holen()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], etag)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        response.close()
+        self.assertEqual(self.cache.zeiger_lesen("A-canvas", max_alter=SNAPSHOT_CACHE.ttl), etag.strip('"'))
+
+
+# ============================================================
+# PDF-Engines
+# ============================================================
+
+def zeichenweise_kuerzen(text, max_breite_pt, schriftart, schriftgroesse):
+    # Bisheriges Verfahren: so lange ein Zeichen abschneiden, bis es mit "…" passt
+    if stringWidth(text, schriftart, schriftgroesse) <= max_breite_pt:
+        return text
+
+    auslassung_breite = stringWidth("…", schriftart, schriftgroesse)
+    gekuerzt = text
+    while gekuerzt and stringWidth(gekuerzt, schriftart, schriftgroesse) + auslassung_breite > max_breite_pt:
+        gekuerzt = gekuerzt[:-1]
+    return gekuerzt + "…" if gekuerzt else "…"
+
+
+class TextEinpasserTest(SimpleTestCase):
+
+    texte = [
+        "A",
+        "Schraube",
+        "Sechskantschraube DIN 933 M8x40 verzinkt, Festigkeitsklasse 8.8, VPE 100 Stück",
+        "WWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWWW",
+        "iiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiiii",
+        "Größenverstellbare Fußstütze für Büroarbeitsplätze – Ausführung „Überbreite“",
+        "Kabelbinder 4,8×200 mm 100 € / VPE ½ Karton ±5 %",
+        "日本語の製品名とEmoji 🔧🔩 gemischt mit Text",
+        "  führende und nachfolgende Leerzeichen  ",
+    ]
+
+    def test_gleich_wie_zeichenweise(self):
+        einpasser = TextEinpasser()
+        for schriftart in ("Helvetica", "Helvetica-Bold", "Courier"):
+            for text in self.texte:
+                volle_breite = stringWidth(text, schriftart, 8)
+                breiten = [1, 5, 20, 33.3, 60, 100, 250, volle_breite, volle_breite - 0.01]
+                # Genau passende Präfixe mit Auslassungszeichen
+                breiten += [
+                    stringWidth(text[:laenge], schriftart, 8) + stringWidth("…", schriftart, 8)
+                    for laenge in range(1, len(text), 7)
+                ]
+                for breite in breiten:
+                    with self.subTest(schriftart=schriftart, text=text, breite=breite):
+                        self.assertEqual(
+                            einpasser.kuerzen(text, breite, schriftart, 8),
+                            zeichenweise_kuerzen(text, breite, schriftart, 8),
+                        )
+
+    def test_ergebnis_passt_in_die_spalte(self):
+        einpasser = TextEinpasser()
+        for text in self.texte:
+            for breite in (10, 40, 120):
+                gekuerzt = einpasser.kuerzen(text, breite, "Helvetica", 8)
+                if gekuerzt != "…":
+                    self.assertLessEqual(stringWidth(gekuerzt, "Helvetica", 8), breite)
+
+
+class DeckblattTest(SimpleTestCase):
+
+    def deckblatt_rendern(self, engine, anzahl_gruppen):
+        gruppen_namen = [f"Gruppe {i:03d}" for i in range(anzahl_gruppen)]
+        PDF_ENGINES[engine](
+            BytesIO(), gruppen_namen, {}, "Lager", artikel_anzahlen={g: 5 for g in gruppen_namen}
+        )
+
+    def test_zu_viele_gruppen_fuer_das_deckblatt(self):
+        # Beide Engines brechen ab, statt Gruppen stillschweigend wegzulassen
+        for engine in PDF_ENGINES:
+            with self.subTest(engine=engine):
+                self.deckblatt_rendern(engine, 10)
+                with self.assertRaises(LayoutError):
+                    self.deckblatt_rendern(engine, 80)
+
+
+# ============================================================
+# Paralleles Rendern
+# ============================================================
+
+def pdf_seiten_text(inhalt):
+    return [seite.extract_text() for seite in PdfReader(BytesIO(inhalt)).pages]
+
+
+@skipIf(PdfReader is None, "pypdf nicht installiert")
+class PdfParallelTest(KatalogMixin, SimpleTestCase):
+
+    katalog_zeilen = 3000
+
+    def test_parallel_gleich_seriell(self):
+        _, _, gruppen_namen, gruppen = artikel_lager_laden(self.quelle, PDF_SPALTEN, standort="A")
+        label = STANDORTE["A"]["label"]
+
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for engine in PDF_ENGINES:
+                with self.subTest(engine=engine):
+                    seriell = BytesIO()
+                    PDF_ENGINES[engine](seriell, gruppen_namen, gruppen, label)
+
+                    parallel = BytesIO()
+                    inventur_pdf_parallel_erstellen(
+                        parallel, gruppen_namen, gruppen, label, engine=engine, pool=pool, prozesse=2
+                    )
+
+                    seiten = pdf_seiten_text(seriell.getvalue())
+                    self.assertGreater(len(seiten), 2)
+                    self.assertEqual(pdf_seiten_text(parallel.getvalue()), seiten)
+
+
+# ============================================================
+# Nachdruck einzelner Seiten
+# ============================================================
+
+@skipIf(PdfReader is None, "pypdf nicht installiert")
+class TeilPdfTest(KatalogMixin, SimpleTestCase):
+
+    katalog_zeilen = 3000
+
+    def setUp(self):
+        super().setUp()
+        _, _, self.gruppen_namen, self.gruppen = artikel_lager_laden(self.quelle, PDF_SPALTEN, standort="A")
+        self.label = STANDORTE["A"]["label"]
+
+        # (Gruppe, Seite) -> Seite im ganzen Dokument (0 = Deckblatt)
+        zeilen_pro_seite = zeilen_pro_seite_berechnen(LAYOUT.seitenformat[1])
+        self.seiten_index = {
+            (gruppe, seite): i
+            for i, (gruppe, seite, _, _) in enumerate(
+                seiten_aufteilen(self.gruppen_namen, self.gruppen, zeilen_pro_seite), start=1
+            )
+        }
+        self.seiten_je_gruppe = {}
+        for gruppe, seite in self.seiten_index:
+            self.seiten_je_gruppe[gruppe] = max(seite, self.seiten_je_gruppe.get(gruppe, 0))
+
+        self.gross = max(self.seiten_je_gruppe, key=self.seiten_je_gruppe.get)
+        self.klein = next(g for g in self.seiten_je_gruppe if g != self.gross)
+        self.assertGreaterEqual(self.seiten_je_gruppe[self.gross], 3)
+
+        self.ganz = {}
+
+    def ganzes_dokument(self, engine):
+        if engine not in self.ganz:
+            ausgabe = BytesIO()
+            PDF_ENGINES[engine](ausgabe, self.gruppen_namen, self.gruppen, self.label)
+            self.ganz[engine] = pdf_seiten_text(ausgabe.getvalue())
+            self.assertEqual(len(self.ganz[engine]), len(self.seiten_index) + 1)
+        return self.ganz[engine]
+
+    def erwartet(self, engine, auswahl):
+        ganz = self.ganzes_dokument(engine)
+        return [ganz[i] for (gruppe, seite), i in self.seiten_index.items()
+                if gruppe in auswahl and (auswahl[gruppe] is None or seite in auswahl[gruppe])]
+
+    def test_seiten_wie_im_ganzen_dokument(self):
+        letzte = self.seiten_je_gruppe[self.gross]
+        auswahl = {self.gross: {letzte, 1, 2, letzte + 5}, self.klein: None}
+
+        for engine in PDF_ENGINES:
+            with self.subTest(engine=engine):
+                ausgabe = BytesIO()
+                PDF_ENGINES[engine](
+                    ausgabe, self.gruppen_namen, self.gruppen, self.label, deckblatt=False, seiten_auswahl=auswahl
+                )
+                seiten = pdf_seiten_text(ausgabe.getvalue())
+
+                self.assertEqual(len(seiten), 3 + self.seiten_je_gruppe[self.klein])
+                self.assertEqual(seiten, self.erwartet(engine, auswahl))
+                self.assertIn(f"{letzte} von {letzte}", "\n".join(seiten))
+
+    def test_view_liefert_dieselben_seiten(self):
+        gesamt = self.seiten_je_gruppe[self.gross]
+
+        with mock.patch("firma_db._aktive_quelle", self.quelle):
+            for engine in PDF_ENGINES:
+                with self.subTest(engine=engine):
+                    response = self.client.get("/inventur_pdf_teil/", {
+                        "site": "A", "engine": engine, "gruppe": self.gross, "seiten": f"2-{gesamt}",
+                    })
+                    self.assertEqual(response.status_code, 200)
+
+                    seiten = pdf_seiten_text(b"".join(response.streaming_content))
+                    self.assertEqual(seiten, self.erwartet(engine, {self.gross: set(range(2, gesamt + 1))}))
+                    self.assertIn(f"2 von {gesamt}", seiten[0])
+
+
+# ============================================================
+# Artikelliste
+# ============================================================
+
+class ArtikelListenCursorTest(KatalogMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = artikel_listen_index(self.quelle, standort="A")
+
+    def alle_seiten(self, groesse, **filter_argumente):
+        """
+        Blättert wie die View über Cursor-Texte bis zum Ende.
+        """
+        artikel, cursor = [], None
+        while True:
+            treffer, weiter = self.index.seite(
+                nach=self.index.cursor_lesen(cursor), groesse=groesse, **filter_argumente
+            )
+            self.assertLessEqual(len(treffer), groesse)
+            artikel += [art for _, art in treffer]
+            if weiter is None:
+                return artikel
+            cursor = self.index.cursor(weiter)
+
+    def test_blaettern_liefert_jeden_artikel_einmal(self):
+        self.assertEqual(self.alle_seiten(groesse=50), list(self.index.artikel))
+
+    def test_blaettern_mit_filtern(self):
+        wg_nr = self.index.artikel[len(self.index.artikel) // 2].WG_NR
+        gruppe = self.index.gruppen_namen[0]
+        von, bis = self.index.gruppen_bereiche[gruppe]
+        wort = self.index.artikel[0].ART_NAME.split()[0].lower()
+
+        erwartet = {
+            "wg": [art for art in self.index.artikel if art.WG_NR == wg_nr],
+            "gruppe": list(self.index.artikel[von:bis]),
+            "suche": [art for art in self.index.artikel if wort in f"{art.ART_NAME}\0{art.HERST_ART_NR}".lower()],
+        }
+        filter_je_fall = {"wg": {"wg_nr": wg_nr}, "gruppe": {"uebergruppe": gruppe}, "suche": {"suche": wort}}
+
+        for name, artikel in erwartet.items():
+            with self.subTest(name):
+                self.assertTrue(artikel)
+                self.assertEqual(self.alle_seiten(groesse=7, **filter_je_fall[name]), artikel)
+
+    def test_letzte_seite_ohne_weiter(self):
+        treffer, weiter = self.index.seite(groesse=len(self.index.artikel))
+        self.assertEqual(len(treffer), len(self.index.artikel))
+        self.assertIsNone(weiter)
+
+    def test_fremder_oder_kaputter_cursor_beginnt_von_vorn(self):
+        self.assertEqual(self.index.cursor_lesen(self.index.cursor(42)), 42)
+        for cursor in (None, "", "kaputt", f"{'0' * 12}-42", f"{self.index.fingerabdruck[:12]}-x"):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.index.cursor_lesen(cursor), -1)
+
+    def test_cursor_eines_aelteren_snapshots(self):
+        cursor = self.index.cursor(10)
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET ART_NAME = ART_NAME || ' neu'")
+        SNAPSHOT_CACHE.invalidieren()
+
+        neuer_index = artikel_listen_index(self.quelle, standort="A")
+        self.assertNotEqual(neuer_index.fingerabdruck, self.index.fingerabdruck)
+        self.assertEqual(neuer_index.cursor_lesen(cursor), -1)
+
+
+class ArtikelListeViewTest(KatalogMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        quelle_patch = mock.patch("firma_db._aktive_quelle", self.quelle)
+        quelle_patch.start()
+        self.addCleanup(quelle_patch.stop)
+        self.index = artikel_listen_index(self.quelle, standort="A")
+
+    def durchblaettern(self, **parameter):
+        """
+        Folgt den Weiter-Links; liefert Artikel und Antworten je Seite.
+        """
+        artikel, antworten = [], []
+        url = "/artikel/?" + urlencode({"site": "A", **parameter})
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            antworten.append(response)
+
+            namen = [name for name, _ in response.context["abschnitte"]]
+            # Gruppenüberschrift je Seite nur einmal
+            self.assertEqual(len(namen), len(set(namen)))
+            artikel += [art for _, seite in response.context["abschnitte"] for art in seite]
+
+            weiter = response.context["weiter_url"]
+            url = f"/artikel/{weiter}" if weiter else None
+        return artikel, antworten
+
+    def test_weiter_links_liefern_jeden_artikel_einmal(self):
+        artikel, antworten = self.durchblaettern(anzahl=120)
+
+        self.assertEqual(artikel, list(self.index.artikel))
+        self.assertEqual([r.context["treffer_anzahl"] for r in antworten[:-1]], [120] * (len(antworten) - 1))
+        self.assertIsNone(antworten[0].context["anfang_url"])
+        self.assertNotIn("nach=", antworten[1].context["anfang_url"])
+
+    def test_filter_bleiben_beim_blaettern_erhalten(self):
+        wort = self.index.artikel[0].ART_NAME.split()[0]
+
+        artikel, antworten = self.durchblaettern(q=wort, anzahl=10)
+
+        self.assertGreater(len(antworten), 1)
+        self.assertEqual(
+            artikel,
+            [art for art in self.index.artikel if wort.lower() in f"{art.ART_NAME}\0{art.HERST_ART_NR}".lower()],
+        )
+
+    def test_seitengroesse_begrenzt(self):
+        for anzahl, erwartet in (("0", 1), ("abc", SEITEN_GROESSE), ("100000", MAX_SEITEN_GROESSE)):
+            with self.subTest(anzahl=anzahl):
+                response = self.client.get("/artikel/", {"site": "A", "anzahl": anzahl})
+                self.assertEqual(response.context["treffer_anzahl"], min(erwartet, len(self.index.artikel)))
+
+
+# ============================================================
+# Artikelsuche
+# ============================================================
+
+class ArtikelSuchIndexTest(KatalogMixin, SimpleTestCase):
+
+    def snapshot(self):
+        return artikel_snapshot_holen(self.quelle, spalten=PDF_SPALTEN, standort="A")
+
+    def katalog_umbauen(self, umbenannt, herst_nr_neu):
+        """
+        Neue, geänderte, entfernte und deaktivierte Artikel.
+        """
+        spalten = ", ".join(KATALOG_SPALTEN)
+        kopie = ", ".join("ART_NR + 10000" if s == "ART_NR" else s for s in KATALOG_SPALTEN)
+        self.katalog_aendern(f"INSERT INTO ART_STAMM_VW ({spalten}) SELECT {kopie} FROM ART_STAMM_VW WHERE ART_NR <= 20")
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET ART_NAME = 'Zebraband Sonderposten 7 mm' WHERE ART_NR IN (?, ?, ?)", *umbenannt)
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET HERST_ART_NR = 'QX-4711' WHERE ART_NR = ?", herst_nr_neu)
+        self.katalog_aendern("UPDATE ART_STAMM_VW SET Aktiv = 0 WHERE ART_NR BETWEEN 30 AND 39")
+        self.katalog_aendern("DELETE FROM ART_STAMM_VW WHERE ART_NR BETWEEN 40 AND 99")
+        SNAPSHOT_CACHE.invalidieren()
+
+    def suchbegriffe(self, *indizes):
+        """
+        Wörter, Wortanfänge, Teilwörter, HERST_ART_NR und Cortexnr
+        aus allen übergebenen Indizes – alte wie neue Stände.
+        """
+        begriffe = {"walross", "einzelstück", "unik-1", "unik", "zebraband", "sonder", "posten 7", "qx-4711", "qx", "10005", "21", "45", "35", "mm"}
+        for index in indizes:
+            for art in list(index._artikel.values())[::15]:
+                woerter = art.ART_NAME.split()
+                begriffe.update((woerter[0], woerter[-1][:2], art.ART_NAME[2:6], " ".join(woerter[:2])))
+                begriffe.update((art.HERST_ART_NR or "", (art.HERST_ART_NR or "")[:4], str(art.ART_NR)))
+        return sorted(b for b in begriffe if b.strip())
+
+    def test_inkrementell_wie_neu_aufgebaut(self):
+        for nachsortieren_ab in (5000, 0):
+            with self.subTest(nachsortieren_ab=nachsortieren_ab), \
+                    mock.patch("inventur.artikel_suche.NACHSORTIEREN_AB", nachsortieren_ab):
+                SNAPSHOT_CACHE.invalidieren()
+                katalog_schreiben(f"sqlite:{self.katalog}", self.katalog_zeilen, seed=1)
+                inkrementell = ArtikelSuchIndex()
+                inkrementell.aktualisieren(self.snapshot())
+
+                # Nur Artikel, die in der Liste für Standort A stehen; Name und
+                # HERST_ART_NR einmalig, damit beim Umbau Einträge ganz verschwinden
+                nummern = sorted(inkrementell._artikel)
+                umbenannt, herst_nr_neu = nummern[-4:-1], nummern[-1]
+                self.katalog_aendern(
+                    "UPDATE ART_STAMM_VW SET ART_NAME = 'Walrossleder Einzelstück' WHERE ART_NR = ?", umbenannt[0]
+                )
+                self.katalog_aendern("UPDATE ART_STAMM_VW SET HERST_ART_NR = 'UNIK-1' WHERE ART_NR = ?", herst_nr_neu)
+                SNAPSHOT_CACHE.invalidieren()
+                inkrementell.aktualisieren(self.snapshot())
+                alt = ArtikelSuchIndex()
+                alt.aktualisieren(self.snapshot())
+
+                self.katalog_umbauen(umbenannt, herst_nr_neu)
+                snapshot = self.snapshot()
+                neu, geaendert, entfernt = inkrementell.aktualisieren(snapshot)
+                self.assertEqual((neu > 0, geaendert > 0, entfernt > 0), (True, True, True))
+                self.assertIsNone(inkrementell.aktualisieren(snapshot))
+
+                frisch = ArtikelSuchIndex()
+                frisch.aktualisieren(snapshot)
+
+                self.assertEqual(len(inkrementell), len(frisch))
+                self.assertEqual(inkrementell._vokabular, frisch._vokabular)
+                self.assertEqual(inkrementell._herst_sortiert, frisch._herst_sortiert)
+                self.assertEqual(inkrementell._trigramme, frisch._trigramme)
+
+                for begriff in self.suchbegriffe(alt, frisch):
+                    self.assertEqual(
+                        [t.als_dict() for t in inkrementell.suchen(begriff, max_treffer=1000)],
+                        [t.als_dict() for t in frisch.suchen(begriff, max_treffer=1000)],
+                        begriff,
+                    )
+
+                self.assertEqual({t.artikel.ART_NR for t in frisch.suchen("zebraband")}, set(umbenannt))
+                self.assertEqual([t.artikel.ART_NR for t in frisch.suchen("QX4711")], [herst_nr_neu])
+
+
+# ============================================================
+# Zählungen
+# ============================================================
+
+def inventur_anlegen(positionen=3, status="RUNNING"):
+    inventur = Inventur.objects.create(name="Test", status=status, created_at=datetime.date(2026, 1, 1))
+    InventurPosition.objects.bulk_create(
+        InventurPosition(
+            inventur=inventur, Cortexnr=cortexnr, Hersteller="H", Artikelnr_Hersteller=f"A-{cortexnr}",
+            Artikelnaam=f"Artikel {cortexnr}", WG_NAME="WG", WG_NR=10, EINHEIT="Stk",
+        )
+        for cortexnr in range(1, positionen + 1)
+    )
+    return inventur
+
+
+class ZaehlungenPruefenTest(SimpleTestCase):
+
+    def fehler(self, zaehlungen):
+        with self.assertRaises(ZaehlungFehler) as kontext:
+            zaehlungen_pruefen(zaehlungen)
+        return kontext.exception.fehler
+
+    def test_gueltiger_stapel(self):
+        self.assertEqual(
+            zaehlungen_pruefen([
+                {"Cortexnr": 1, "Anzahl": 5, "Verpackungseinheit": 2},
+                {"Cortexnr": 2, "Anzahl": 3.0, "Einheit_Rest": None},
+            ]),
+            [(1, {"Anzahl": 5, "Verpackungseinheit": 2.0}), (2, {"Anzahl": 3, "Einheit_Rest": None})],
+        )
+
+    def test_kein_stapel(self):
+        for zaehlungen in ([], {}, None, "1"):
+            with self.subTest(zaehlungen=zaehlungen):
+                self.assertEqual(self.fehler(zaehlungen)[0]["zeile"], None)
+
+    def test_zu_grosser_stapel(self):
+        zaehlungen = [{"Cortexnr": i, "Anzahl": 1} for i in range(MAX_ZAEHLUNGEN + 1)]
+        self.assertIn("Höchstens", self.fehler(zaehlungen)[0]["fehler"])
+
+    def test_alle_fehler_je_zeile(self):
+        fehler = self.fehler([
+            {"Cortexnr": 1, "Anzahl": 1},
+            {"Cortexnr": 2, "Anzahl": -1},
+            {"Cortexnr": 3, "Anzahl": 2.5},
+            {"Cortexnr": 4, "Anzahl": True},
+            {"Cortexnr": 5, "Anzahl": "7"},
+            {"Cortexnr": 1, "Anzahl": 2},
+            {"Cortexnr": 6, "Menge": 1},
+            {"Cortexnr": 7},
+            {"Anzahl": 1},
+            [8, 1],
+        ])
+
+        self.assertEqual([f["zeile"] for f in fehler], list(range(1, 10)))
+        self.assertEqual(fehler[0], {"zeile": 1, "Cortexnr": 2, "fehler": "Anzahl: darf nicht negativ sein"})
+        self.assertEqual(fehler[1]["fehler"], "Anzahl: ganze Zahl erwartet")
+        self.assertEqual(fehler[4]["fehler"], "Cortexnr mehrfach im Stapel")
+        self.assertEqual(fehler[5]["fehler"], "Unbekannte Felder: Menge")
+        self.assertEqual(fehler[8], {"zeile": 9, "Cortexnr": None, "fehler": "Objekt erwartet"})
+
+
+class ZaehlungenUebernehmenTest(TestCase):
+
+    def setUp(self):
+        self.inventur = inventur_anlegen(positionen=3)
+
+    def werte(self):
+        return list(
+            InventurPosition.objects.filter(inventur=self.inventur)
+            .order_by("Cortexnr").values_list("Anzahl", "Einheit_Rest")
+        )
+
+    def test_wiederholter_stapel_gleiches_ergebnis(self):
+        stapel = [{"Cortexnr": 1, "Anzahl": 4}, {"Cortexnr": 2, "Anzahl": 2, "Einheit_Rest": 0.5}]
+
+        self.assertEqual(zaehlungen_uebernehmen(self.inventur, stapel), 2)
+        erster = self.werte()
+        # z. B. nach Timeout erneut gesendet: gesetzt, nicht addiert
+        self.assertEqual(zaehlungen_uebernehmen(self.inventur, stapel), 2)
+
+        self.assertEqual(self.werte(), erster)
+        self.assertEqual(erster, [(4, None), (2, 0.5), (None, None)])
+
+    def test_none_leert_ein_feld(self):
+        zaehlungen_uebernehmen(self.inventur, [{"Cortexnr": 1, "Anzahl": 4, "Einheit_Rest": 1.5}])
+        zaehlungen_uebernehmen(self.inventur, [{"Cortexnr": 1, "Einheit_Rest": None}])
+
+        self.assertEqual(self.werte()[0], (4, None))
+
+    def test_grosser_stapel_in_portionen_geprueft(self):
+        stapel = [{"Cortexnr": cortexnr, "Anzahl": cortexnr} for cortexnr in (1, 2, 3)]
+
+        with mock.patch("inventur.zaehlung.IN_BATCH", 2), CaptureQueriesContext(connection) as abfragen:
+            self.assertEqual(zaehlungen_uebernehmen(self.inventur, stapel), 3)
+
+        self.assertEqual(sum('"Cortexnr" IN' in abfrage["sql"] for abfrage in abfragen.captured_queries), 2)
+        self.assertEqual(self.werte(), [(1, None), (2, None), (3, None)])
+
+    def test_alles_oder_nichts(self):
+        andere = inventur_anlegen(positionen=5)
+
+        with self.assertRaises(ZaehlungFehler) as kontext:
+            zaehlungen_uebernehmen(self.inventur, [{"Cortexnr": 1, "Anzahl": 4}, {"Cortexnr": 5, "Anzahl": 1}])
+
+        self.assertEqual(kontext.exception.fehler, [
+            {"zeile": 1, "Cortexnr": 5, "fehler": "Artikel nicht in dieser Inventur"},
+        ])
+        self.assertEqual(self.werte(), [(None, None)] * 3)
+        self.assertFalse(InventurPosition.objects.filter(inventur=andere, Anzahl__isnull=False).exists())
+
+
+class ZaehlungenViewZugriffTest(TestCase):
+
+    def setUp(self):
+        self.inventur = inventur_anlegen()
+        self.url = f"/inventuren/{self.inventur.id}/zaehlungen/"
+        self.client = Client(enforce_csrf_checks=True)
+        self.body = json.dumps({"zaehlungen": [{"Cortexnr": 1, "Anzahl": 5}]})
+
+    def zaehler_anmelden(self, berechtigt=True):
+        benutzer = User.objects.create_user("zaehler", password="geheim")
+        if berechtigt:
+            benutzer.user_permissions.add(Permission.objects.get(codename="change_inventurposition"))
+        self.client.force_login(benutzer)
+
+    def senden(self, **extra):
+        return self.client.post(self.url, self.body, content_type="application/json", **extra)
+
+    def csrf_token(self):
+        # Wie vom Browser: Cookie csrftoken, derselbe Wert im Header
+        token = "t" * 32
+        self.client.cookies["csrftoken"] = token
+        return token
+
+    def anzahl(self):
+        return InventurPosition.objects.get(inventur=self.inventur, Cortexnr=1).Anzahl
+
+    def test_ohne_anmeldung_401(self):
+        self.assertEqual(self.senden(HTTP_X_CSRFTOKEN=self.csrf_token()).status_code, 401)
+        self.assertIsNone(self.anzahl())
+
+    def test_ohne_berechtigung_403(self):
+        self.zaehler_anmelden(berechtigt=False)
+        self.assertEqual(self.senden(HTTP_X_CSRFTOKEN=self.csrf_token()).status_code, 403)
+        self.assertIsNone(self.anzahl())
+
+    def test_ohne_csrf_token_abgelehnt(self):
+        self.zaehler_anmelden()
+        self.assertEqual(self.senden().status_code, 403)
+        self.assertIsNone(self.anzahl())
+
+    def test_mit_berechtigung_und_token(self):
+        self.zaehler_anmelden()
+        response = self.senden(HTTP_X_CSRFTOKEN=self.csrf_token())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"inventur": self.inventur.id, "aktualisiert": 1})
+        self.assertEqual(self.anzahl(), 5)
+
+
+# ============================================================
+# ?inventur=<id>
+# ============================================================
+
+class InventurParameterTest(TestCase):
+
+    urls = ["/startseite/", "/inventur_pdf_teil/", "/inventur_pdf_async/", "/artikel/", "/artikel/suche/"]
+
+    def test_keine_zahl_400(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {"inventur": "abc"}).status_code, 400)
+
+    def test_unbekannte_inventur_404(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {"inventur": "999999"}).status_code, 404)
+
+    def test_suche_im_eingefrorenen_stand(self):
+        inventur = inventur_anlegen()
+        inventur.standort = "B"
+        inventur.save()
+
+        response = self.client.get("/artikel/suche/", {"inventur": inventur.id, "q": "Artikel 2"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["standort"], "B")
+        self.assertIn(f"inventur={inventur.id}", response.json()["treffer"][0]["nachdruck"])
+
+
+# ============================================================
+# Eingefrorene Inventur
+# ============================================================
+
+class InventurQuelleTest(TestCase):
+
+    def test_gleiche_herstellernummer_nach_cortexnr(self):
+        inventur = inventur_anlegen(positionen=0)
+        # Absichtlich absteigend angelegt, gleiche WG und Herst.-Nr. (bis auf Groß-/Kleinschreibung)
+        InventurPosition.objects.bulk_create(
+            InventurPosition(
+                inventur=inventur, Cortexnr=cortexnr, Hersteller="H", Artikelnr_Hersteller=nummer,
+                Artikelnaam=f"Artikel {cortexnr}", WG_NAME="WG", WG_NR=10, EINHEIT="Stk",
+            )
+            for cortexnr, nummer in ((9, "X-1"), (5, "x-1"), (7, "X-1"), (3, "A-2"))
+        )
+
+        batches = InventurQuelle(inventur.id).zeilen_iterieren(("ART_NR",))
+
+        self.assertEqual([zeile[0] for batch in batches for zeile in batch], [3, 5, 7, 9])
+
+
+# ============================================================
+# Inventurpositionen
+# ============================================================
+
+class InventurPositionSchemaTest(TestCase):
+
+    def test_gleicher_artikel_in_zwei_inventuren(self):
+        erste, zweite = inventur_anlegen(), inventur_anlegen()
+
+        self.assertEqual(InventurPosition.objects.filter(Cortexnr=1).count(), 2)
+        self.assertEqual(
+            set(InventurPosition.objects.filter(Cortexnr=1).values_list("inventur_id", flat=True)),
+            {erste.id, zweite.id},
+        )
+
+    def test_artikel_je_inventur_nur_einmal(self):
+        inventur = inventur_anlegen()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            InventurPosition.objects.create(
+                inventur=inventur, Cortexnr=2, Hersteller="H", Artikelnr_Hersteller="A-2",
+                Artikelnaam="Doppelt", WG_NAME="WG", WG_NR=10, EINHEIT="Stk",
+            )
+
+        self.assertEqual(InventurPosition.objects.filter(inventur=inventur).count(), 3)
+
+    def test_constraint_und_index_aus_den_migrationen(self):
+        tabelle = InventurPosition._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, tabelle)
+
+        spalten = [InventurPosition._meta.get_field(f).column for f in ("inventur", "Cortexnr")]
+        self.assertTrue(constraints["inventurposition_inventur_cortexnr"]["unique"])
+        self.assertEqual(constraints["inventurposition_inventur_cortexnr"]["columns"], spalten)
+        self.assertIn("inventurposition_wg_name", constraints)
+
+
+# ============================================================
+# PDF-Aufträge
+# ============================================================
+
+class PdfAuftragAnlegenTest(TestCase):
+
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.cookies["csrftoken"] = "t" * 32
+
+        auftraege = mock.patch("inventur.views.AUFTRAEGE")
+        self.auftraege = auftraege.start()
+        self.addCleanup(auftraege.stop)
+        self.auftraege.einreichen.return_value = mock.Mock(id="a1", status="WARTEND", als_dict=lambda: {"id": "a1"})
+
+    def anlegen(self, **extra):
+        return self.client.post("/pdf_auftraege/", {"site": "B", "engine": "canvas"}, **extra)
+
+    def test_ohne_anmeldung_401(self):
+        self.assertEqual(self.anlegen(HTTP_X_CSRFTOKEN="t" * 32).status_code, 401)
+        self.auftraege.einreichen.assert_not_called()
+
+    def test_ohne_csrf_token_abgelehnt(self):
+        self.client.force_login(User.objects.create_user("zaehler"))
+        self.assertEqual(self.anlegen().status_code, 403)
+        self.auftraege.einreichen.assert_not_called()
+
+    def test_angemeldet_mit_token(self):
+        self.client.force_login(User.objects.create_user("zaehler"))
+        response = self.anlegen(HTTP_X_CSRFTOKEN="t" * 32)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status_url"], "/pdf_auftraege/a1/")
+        self.auftraege.einreichen.assert_called_once_with("B", "canvas")
+
+
+class PdfAuftragsVerwaltungTest(SimpleTestCase):
+
+    def setUp(self):
+        self.verwaltung = PdfAuftragsVerwaltung(max_parallel=1, aufbewahrung=0, cache=mock.Mock())
+
+    def warten(self, auftrag):
+        for _ in range(500):
+            if not auftrag.offen:
+                return
+            time.sleep(0.01)
+        self.fail("Auftrag nicht abgeschlossen")
+
+    def test_abgeschlossen_immer_mit_fertig_um(self):
+        with mock.patch("inventur.pdf_auftraege.artikel_snapshot_holen", side_effect=RuntimeError("ERP weg")):
+            auftrag = self.verwaltung.einreichen("A", "canvas")
+            self.warten(auftrag)
+
+        self.assertEqual((auftrag.status, auftrag.fehler), (FEHLER, "ERP weg"))
+        self.assertIsNotNone(auftrag.fertig_um)
+
+    def test_aufraeumen_ohne_fertig_um(self):
+        # Zustand aus einem Wettlauf mit dem Worker: kein TypeError beim nächsten Einreichen
+        halb_fertig = PdfAuftrag("B", "canvas")
+        halb_fertig.status = FERTIG
+        self.verwaltung._auftraege[halb_fertig.id] = halb_fertig
+
+        with mock.patch("inventur.pdf_auftraege.artikel_snapshot_holen", side_effect=RuntimeError):
+            self.warten(self.verwaltung.einreichen("A", "canvas"))
+
+        self.assertIs(self.verwaltung.holen(halb_fertig.id), halb_fertig)
+
+
+# ============================================================
+# Kennzahlen
+# ============================================================
+
+class MesswerteViewTest(TestCase):
+
+    def test_nicht_oeffentlich(self):
+        response = self.client.get("/intern/messwerte/")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("/admin/login/", response["Location"])
+
+    def test_ohne_staff_nicht_sichtbar(self):
+        self.client.force_login(User.objects.create_user("zaehler"))
+        self.assertEqual(self.client.get("/intern/messwerte/").status_code, 302)
+
+    def test_fuer_staff(self):
+        self.client.force_login(User.objects.create_user("admin", is_staff=True))
+        response = self.client.get("/intern/messwerte/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"stufen", "snapshot_cache", "pdf_cache"})
+
+
+# ============================================================
+# Asynchroner PDF-Dienst
+# ============================================================
+
+class AsyncPdfDienstTest(SimpleTestCase):
+
+    def test_zusammenlegen_ueber_mehrere_event_loops(self):
+        from inventur.pdf_async import AsyncPdfDienst
+
+        gerendert = []
+
+        def snapshot_holen(quelle, spalten, standort):
+            time.sleep(0.2)
+            return standort
+
+        def bereitstellen(snapshot, standort, engine, cache=None, zeiger=True):
+            gerendert.append(standort)
+            return f"pdf-{standort}-{engine}", mock.Mock(), True
+
+        dienst = AsyncPdfDienst()
+        ergebnisse = []
+
+        # Wie unter WSGI: jede Anfrage in ihrem eigenen Event-Loop
+        def anfrage():
+            ergebnisse.append(asyncio.run(dienst.bereitstellen("B", "canvas")))
+
+        with mock.patch("inventur.pdf_async.artikel_snapshot_holen", snapshot_holen), \
+                mock.patch("inventur.pdf_async.pdf_bereitstellen", bereitstellen), \
+                mock.patch("inventur.pdf_async.ergebnis_cache"):
+            threads = [threading.Thread(target=anfrage) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(ergebnisse, ["pdf-B-canvas"] * 4)
+        self.assertEqual(gerendert, ["B"])
+        kennzahlen = dienst.kennzahlen()
+        self.assertEqual((kennzahlen["zusammengelegt"], kennzahlen["offen"]), (3, 0))
+
+    def test_fehler_erreicht_alle_wartenden(self):
+        from inventur.pdf_async import AsyncPdfDienst
+
+        dienst = AsyncPdfDienst()
+        with mock.patch("inventur.pdf_async.artikel_snapshot_holen", side_effect=RuntimeError("ERP weg")):
+            with self.assertRaisesMessage(RuntimeError, "ERP weg"):
+                asyncio.run(dienst.bereitstellen("A", "platypus"))
+
+        self.assertEqual(dienst.kennzahlen()["offen"], 0)
+
+    def test_zu_viele_wartende_anfragen(self):
+        from inventur.pdf_async import AsyncPdfDienst, Ueberlastet
+
+        freigabe = threading.Event()
+        dienst = AsyncPdfDienst(max_wartende=2)
+        ergebnisse = []
+
+        def snapshot_holen(quelle, spalten, standort):
+            freigabe.wait(5)
+            return standort
+
+        def anfrage(standort):
+            ergebnisse.append(asyncio.run(dienst.bereitstellen(standort, "canvas")))
+
+        with mock.patch("inventur.pdf_async.artikel_snapshot_holen", snapshot_holen), \
+                mock.patch("inventur.pdf_async.pdf_bereitstellen", return_value=("pdf", mock.Mock(), True)), \
+                mock.patch("inventur.pdf_async.ergebnis_cache"):
+            # Zwei wartende Anfragen – zusammengelegt zählen sie trotzdem einzeln
+            threads = [threading.Thread(target=anfrage, args=("A",)) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for _ in range(500):
+                if dienst.kennzahlen()["wartend"] == 2:
+                    break
+                time.sleep(0.01)
+
+            with self.assertRaises(Ueberlastet):
+                asyncio.run(dienst.bereitstellen("B", "canvas"))
+
+            freigabe.set()
+            for thread in threads:
+                thread.join(5)
+
+            # Danach ist wieder Platz
+            self.assertEqual(asyncio.run(dienst.bereitstellen("B", "canvas")), "pdf")
+
+        self.assertEqual(ergebnisse, ["pdf", "pdf"])
+        kennzahlen = dienst.kennzahlen()
+        self.assertEqual((kennzahlen["abgewiesen"], kennzahlen["wartend"]), (1, 0))
+
+    def test_andere_quelle_eigenes_rendering_ohne_zeiger(self):
+        from inventur.pdf_async import AsyncPdfDienst
+        from inventur.quellen import InventurQuelle
+
+        dienst = AsyncPdfDienst()
+        quelle = InventurQuelle(7)
+        with mock.patch("inventur.pdf_async.artikel_snapshot_holen", return_value="snapshot") as holen, \
+                mock.patch("inventur.pdf_async.pdf_bereitstellen", return_value=("pdf", mock.Mock(), True)) as pdf, \
+                mock.patch("inventur.pdf_async.ergebnis_cache"):
+            asyncio.run(dienst.bereitstellen("B", "canvas", quelle))
+
+        self.assertIs(holen.call_args.args[0], quelle)
+        self.assertFalse(pdf.call_args.kwargs["zeiger"])
+
+
+# ============================================================
+# Benchmark-Suite
+# ============================================================
+
+class SynthetischeArtikelTest(SimpleTestCase):
+
+    def test_gleicher_seed_gleiche_zeilen(self):
+        zeilen = list(synthetische_artikel(3000, seed=7))
+
+        self.assertEqual(list(synthetische_artikel(3000, seed=7)), zeilen)
+        self.assertNotEqual(list(synthetische_artikel(3000, seed=8)), zeilen)
+
+    def test_verteilung_wie_art_stamm(self):
+        zeilen = [dict(zip(KATALOG_SPALTEN, zeile)) for zeile in synthetische_artikel(20_000, seed=7)]
+        wg_nummern = {zeile["WG_NR"] for zeile in zeilen}
+        uebergruppen_wg = set().union(*UEBERGRUPPEN.values())
+
+        self.assertEqual([zeile["ART_NR"] for zeile in zeilen], list(range(1, 20_001)))
+        self.assertTrue(all(len(zeile) == len(KATALOG_SPALTEN) for zeile in zeilen))
+        self.assertIn(None, wg_nummern)
+        self.assertTrue(wg_nummern & AUSGESCHLOSSENE_WG_NUMMERN)
+        self.assertTrue(wg_nummern - uebergruppen_wg - AUSGESCHLOSSENE_WG_NUMMERN - {None})
+        self.assertGreater(len(wg_nummern & uebergruppen_wg), len(uebergruppen_wg) // 2)
+        self.assertTrue(any(zeile["Aktiv"] == 0 for zeile in zeilen))
+        self.assertTrue(any(zeile["WOG_NR"] <= 3 for zeile in zeilen))
+
+
+class BenchSuiteTest(SimpleTestCase):
+
+    def test_json_ergebnis_und_vergleich(self):
+        verzeichnis = tempfile.mkdtemp(prefix="inventur_test_")
+        self.addCleanup(shutil.rmtree, verzeichnis, ignore_errors=True)
+        erster, zweiter = (os.path.join(verzeichnis, f"{name}.json") for name in ("erster", "zweiter"))
+        argumente = {"zeilen": [300], "wiederholungen": 1, "engine": ["canvas"], "stdout": StringIO()}
+
+        call_command("bench_suite", ausgabe=erster, **argumente)
+        ausgabe = StringIO()
+        call_command("bench_suite", ausgabe=zweiter, vergleich=erster, **{**argumente, "stdout": ausgabe})
+
+        with open(erster, encoding="utf-8") as datei:
+            bericht = json.load(datei)
+        self.assertEqual(bericht["seed"], 4711)
+        self.assertEqual(
+            [eintrag["messung"] for eintrag in bericht["ergebnisse"]],
+            ["laden", "gruppieren", "text_kuerzen_kalt", "text_kuerzen_warm", "seiten_aufteilen", "pdf_canvas"],
+        )
+        self.assertTrue(all(eintrag["median_s"] >= 0 for eintrag in bericht["ergebnisse"]))
+        self.assertIn(f"Vergleich mit {erster}", ausgabe.getvalue())
+
+    def test_zeilen_ausserhalb_des_bereichs(self):
+        for zeilen in (0, 500_001):
+            with self.subTest(zeilen=zeilen), self.assertRaises(CommandError):
+                call_command("bench_suite", zeilen=[zeilen], stdout=StringIO())
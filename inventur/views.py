@@ -1,428 +1,632 @@
-from io import BytesIO
-from datetime import date
-from math import ceil
-from dataclasses import dataclass
-
-from django.http import HttpResponse
-
-# ReportLab (Platypus) – direkte PDF-Erzeugung ohne HTML/CSS
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, PageBreak, Spacer
-from reportlab.lib.pagesizes import A3, landscape
-from reportlab.lib import colors
-from reportlab.pdfbase.pdfmetrics import stringWidth
-
-from firma_db import artikel_lager_laden, STANDORTE, gruppen_fuer_standort_filtern
+import asyncio
+import functools
+import json
+import os
+from tempfile import SpooledTemporaryFile
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import BadRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils.http import parse_etags, urlencode
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_GET, require_POST
+
+import messung
+from firma_db import artikel_snapshot_holen, SNAPSHOT_CACHE, STANDORTE, PDF_SPALTEN
+from inventur.artikel_liste import MAX_SEITEN_GROESSE, SEITEN_GROESSE, artikel_listen_index
+from inventur.artikel_suche import MAX_TREFFER, artikel_such_index
+from inventur.models import Inventur
+from inventur.pdf import LAYOUT, PDF_ENGINES, seiten_gesamt_berechnen, zeilen_pro_seite_berechnen
+from inventur.pdf_async import PDF_DIENST, Ueberlastet
+from inventur.pdf_auftraege import AUFTRAEGE, FERTIG
+from inventur.pdf_cache import PDF_CACHE, pdf_bereitstellen, pdf_rendern, render_schluessel
+from inventur.pdf_standorte import alle_standorte_zip_schreiben
+from inventur.quellen import InventurQuelle
+from inventur.zaehlung import ZaehlungFehler, zaehlungen_uebernehmen
+
+
+# Bis zu dieser Größe bleibt die PDF im Speicher, darüber wird sie
+# in eine temporäre Datei ausgelagert (ENV: INVENTUR_PDF_SPOOL_MB)
+PDF_SPOOL_GROESSE = int(float(os.environ.get("INVENTUR_PDF_SPOOL_MB", "8")) * 2**20)
+
+# ?profil=cprofile|tracemalloc nur mit DEBUG oder INVENTUR_PROFIL=1
+PROFIL_ERLAUBT = os.environ.get("INVENTUR_PROFIL") == "1"
 
 
 # ============================================================
-# PDF-Layout-Konfiguration
+# Messung
 # ============================================================
 
-@dataclass(frozen=True)
-class PdfLayout:
+def _ausliefern_messen(inhalt, laufende_messung, status):
     """
-    Zentrale Sammlung aller Layout-Werte für die PDF.
-    Änderungen am Drucklayout sollen nur hier passieren.
+    Reicht den Body durch und misst dabei das Ausliefern;
+    die Messung wird abgeschlossen, wenn der Body fertig (oder abgebrochen) ist.
     """
-    seitenformat: tuple = landscape(A3)
-
-    rand_links: int = 20
-    rand_rechts: int = 20
-    rand_oben: int = 55
-    rand_unten: int = 35
-
-    kopfzeile_hoehe: int = 22
-    tabellenzeile_hoehe: int = 18
-
-    schriftart: str = "Helvetica"
-    schriftgroesse: int = 9
-    zellen_padding_x: int = 6
-
-    # Zusätzliche Leerzeilen am Tabellenende (Platz zum Schreiben)
-    extra_leerzeilen: int = 6
-
-    # Kleine Reserve, damit Tabellen nicht über den Seitenrand laufen
-    hoehen_reserve: int = 10
-
-
-LAYOUT = PdfLayout()
+    bytes_gesendet = 0
+    start = perf_counter()
+    try:
+        for block in inhalt:
+            bytes_gesendet += len(block)
+            yield block
+    finally:
+        laufende_messung.erfassen("ausliefern", (perf_counter() - start) * 1000, {"bytes": bytes_gesendet})
+        messung.messung_abschliessen(laufende_messung, status=status)
+
+
+def gemessen(name):
+    """
+    Misst die Stufen einer View: Server-Timing-Header, JSON-Log-Zeile
+    und rollende Kennzahlen (siehe messung). Mit ?profil=cprofile oder
+    ?profil=tracemalloc (nur DEBUG/INVENTUR_PROFIL=1) kommt statt der
+    Antwort der Profil-Bericht als Text.
+    """
+    def dekorator(view):
+        @functools.wraps(view)
+        def view_gemessen(request, *args, **kwargs):
+            profil_art = request.GET.get("profil")
+            if profil_art in messung.PROFIL_ARTEN and (settings.DEBUG or PROFIL_ERLAUBT):
+                with messung.messung_starten(name) as laufende_messung:
+                    with messung.profil_erstellen(profil_art) as bericht:
+                        response = view(request, *args, **kwargs)
+                        # Body erzeugen, damit das Ausliefern im Profil enthalten ist
+                        with messung.stufe("ausliefern") as s:
+                            s.setzen(bytes=sum(map(len, response)))
+                        response.close()
+
+                profil = HttpResponse(bericht[0], content_type="text/plain; charset=utf-8")
+                profil["Server-Timing"] = laufende_messung.server_timing()
+                messung.messung_abschliessen(laufende_messung, status=response.status_code, profil=profil_art)
+                return profil
+
+            with messung.messung_starten(name) as laufende_messung:
+                response = view(request, *args, **kwargs)
+
+            # Ausliefern ist beim Setzen des Headers noch nicht gelaufen
+            response["Server-Timing"] = laufende_messung.server_timing()
+            if response.streaming:
+                response.streaming_content = _ausliefern_messen(
+                    response.streaming_content, laufende_messung, response.status_code
+                )
+            else:
+                messung.messung_abschliessen(
+                    laufende_messung, status=response.status_code, bytes=len(response.content)
+                )
+            return response
+
+        return view_gemessen
+
+    return dekorator
 
 
 # ============================================================
-# Tabellenstruktur
+# Zugriff
 # ============================================================
 
-TABELLEN_KOPF = [
-    "Cortexnr.",
-    "Hersteller",
-    "Artikelnr. Hersteller",
-    "Artikelnaam",
-    "Verpackungseinheit",
-    "Anzahl",
-    "Einheit Rest (qm/lfm/Stk./usw.)",
-    "Anzahl",
-]
+def anmeldung_erforderlich(berechtigung=None):
+    """
+    Für JSON-Endpunkte: 401 ohne Anmeldung, 403 ohne berechtigung
+    (z. B. "inventur.change_inventurposition") – statt der Weiterleitung
+    auf eine Login-Seite wie bei login_required.
+    """
+    def dekorator(view):
+        @functools.wraps(view)
+        def view_geschuetzt(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({"fehler": "Anmeldung erforderlich"}, status=401)
+            if berechtigung and not request.user.has_perm(berechtigung):
+                return JsonResponse({"fehler": "Keine Berechtigung"}, status=403)
+            return view(request, *args, **kwargs)
 
-# Spaltenbreiten in Punkt (ReportLab-Einheit)
-SPALTEN_BREITEN = [55, 105, 105, 400, 107, 55, 157, 55]
+        return view_geschuetzt
+
+    return dekorator
 
 
 # ============================================================
-# Hilfsfunktionen
+# Django View
 # ============================================================
 
-def db_wert_bereinigen(wert) -> str:
+def _standort_und_engine(request):
     """
-    Vereinheitlicht Werte aus der Datenbank:
-    - None, 'None' oder '-' werden als leer dargestellt
+    Standort (?site=A oder ?site=B) und Render-Engine
+    (?engine=platypus oder ?engine=canvas) aus der URL.
     """
-    if wert is None:
-        return ""
+    site = request.GET.get("site", "A")
+    if site not in STANDORTE:
+        site = "A"
 
-    text = str(wert).strip()
-    if not text or text.lower() == "none" or text == "-":
-        return ""
+    engine = request.GET.get("engine")
+    if engine not in PDF_ENGINES:
+        engine = "platypus"
 
-    return text
+    return site, engine
 
 
-def text_auf_spaltenbreite_kuerzen(text, max_breite_pt, schriftart, schriftgroesse) -> str:
+def _inventur_quelle(request, site):
     """
-    Kürzt Text so, dass er sicher in die Spalte passt.
-    Wichtig für den Druck, damit nichts in andere Spalten läuft.
+    Mit ?inventur=<id> Standort, Quelle und Inventur des eingefrorenen
+    Stands, sonst (site, None, None) für das ERP.
+    Keine Zahl → 400, unbekannte Inventur → 404.
     """
-    text = db_wert_bereinigen(text)
-    if not text:
-        return ""
-
-    if stringWidth(text, schriftart, schriftgroesse) <= max_breite_pt:
-        return text
-
-    auslassung = "…"
-    auslassung_breite = stringWidth(auslassung, schriftart, schriftgroesse)
+    inventur_id = request.GET.get("inventur")
+    if not inventur_id:
+        return site, None, None
 
-    gekuerzt = text
-    while gekuerzt and (stringWidth(gekuerzt, schriftart, schriftgroesse) + auslassung_breite) > max_breite_pt:
-        gekuerzt = gekuerzt[:-1]
+    try:
+        inventur_id = int(inventur_id)
+    except ValueError:
+        raise BadRequest(f"Ungültige Inventur: {inventur_id!r}")
 
-    return gekuerzt + auslassung if gekuerzt else auslassung
+    inventur = get_object_or_404(Inventur, pk=inventur_id)
+    return inventur.standort, InventurQuelle(inventur.id), inventur
 
 
-def tabellenzelle_formatieren(text, spaltenbreite) -> str:
+def _nicht_geaendert(request, etag):
     """
-    Formatiert eine einzelne Tabellenzelle inkl. Padding-Berechnung.
+    304-Antwort, falls der Browser die Fassung etag schon hat, sonst None.
     """
-    nutzbare_breite = max(1, spaltenbreite - 2 * LAYOUT.zellen_padding_x)
-
-    return text_auf_spaltenbreite_kuerzen(
-        text,
-        nutzbare_breite,
-        LAYOUT.schriftart,
-        LAYOUT.schriftgroesse
-    )
+    angefragt = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag not in angefragt and "*" not in angefragt:
+        return None
 
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
 
-# ============================================================
-# Seiten- & Tabellenlogik
-# ============================================================
 
-def zeilen_pro_seite_berechnen(seitenhoehe, doc) -> int:
+@gemessen("inventur_pdf")
+def inventur_pdf_view(request):
     """
-    Berechnet, wie viele Tabellenzeilen realistisch auf eine Seite passen.
-    Muss dynamisch sein, da Seitenränder variieren können.
+    Django-View:
+    Erstellt die Inventur-PDF serverseitig
+    und liefert sie direkt an den Browser aus.
     """
-    nutzbare_hoehe = (
-        seitenhoehe
-        - doc.topMargin
-        - doc.bottomMargin
-        - LAYOUT.hoehen_reserve
-    )
+    site, engine = _standort_und_engine(request)
+
+    # Optional parallel über mehrere Prozesse (?parallel=1)
+    parallel = request.GET.get("parallel") == "1"
+
+    # Mit ?inventur=<id> aus dem eingefrorenen Stand dieser Inventur
+    # statt aus dem ERP (Standort kommt dann aus der Inventur)
+    site, quelle, _ = _inventur_quelle(request, site)
+
+    # Vorgerenderte PDF (pdfs_vorrendern), solange ihre Daten
+    # nicht älter als die Snapshot-TTL sind – ohne die Daten zu laden
+    schluessel = None
+    if PDF_CACHE.aktiv and quelle is None:
+        schluessel = PDF_CACHE.zeiger_lesen(f"{site}-{engine}", max_alter=SNAPSHOT_CACHE.ttl)
+
+    snapshot = None
+    if schluessel is None:
+        # Standortabhängige Gruppen werden bereits in der Abfrage ausgefiltert
+        with messung.stufe("snapshot") as s:
+            snapshot = artikel_snapshot_holen(quelle, spalten=PDF_SPALTEN, standort=site)
+            s.setzen(artikel=snapshot.daten[0])
+        # Gleiche Daten + gleicher Standort + gleiches Layout → gleiche PDF
+        schluessel = render_schluessel(snapshot.fingerabdruck, site, engine)
+
+    etag = f'"{schluessel}"'
+
+    # Browser hat die aktuelle Fassung schon
+    nicht_geaendert = _nicht_geaendert(request, etag)
+    if nicht_geaendert is not None:
+        return nicht_geaendert
+
+    datei = None
+    if snapshot is None:
+        datei = PDF_CACHE.oeffnen(schluessel)
+        if datei is None:
+            # Zeiger frisch, PDF aber inzwischen verdrängt
+            snapshot = artikel_snapshot_holen(spalten=PDF_SPALTEN, standort=site)
+
+    if datei is None:
+        with messung.stufe("rendern", engine=engine) as s:
+            if PDF_CACHE.aktiv:
+                # Aus dem Cache oder neu gerendert, Zeiger wird aufgefrischt
+                schluessel, datei, neu = pdf_bereitstellen(snapshot, site, engine, parallel, zeiger=quelle is None)
+                s.setzen(neu=int(neu), bytes=os.fstat(datei.fileno()).st_size)
+            else:
+                # PDF direkt in die Spool-Datei schreiben und von dort streamen –
+                # keine zweite Kopie per getvalue(), Speicher je Anfrage begrenzt
+                datei = SpooledTemporaryFile(max_size=PDF_SPOOL_GROESSE)
+                try:
+                    pdf_rendern(datei, snapshot.daten, site, engine, parallel)
+                except Exception:
+                    datei.close()
+                    raise
+                s.setzen(neu=1, bytes=datei.tell())
+                datei.seek(0)
+
+        etag = f'"{schluessel}"'
+
+    # FileResponse schließt die Datei nach dem Ausliefern
+    response = FileResponse(datei, content_type="application/pdf", filename="inventur.pdf")
+    response["ETag"] = etag
+    # Immer revalidieren, da sich die Artikeldaten ändern können
+    response["Cache-Control"] = "no-cache"
+    return response
 
-    return max(
-        1,
-        int((nutzbare_hoehe - LAYOUT.kopfzeile_hoehe) // LAYOUT.tabellenzeile_hoehe)
-    )
+
+def _seiten_lesen(text):
+    """
+    Seitenangabe wie "3" oder "1,4-6" als Menge; None ohne Angabe.
+    """
+    if not text or not text.strip():
+        return None
+
+    seiten = set()
+    for teil in text.split(","):
+        von, _, bis = teil.strip().partition("-")
+        if not von.isdigit() or (bis and not bis.isdigit()):
+            raise ValueError(f"Ungültige Seitenangabe: {teil.strip()!r}")
+        von, bis = int(von), int(bis or von)
+        if von < 1 or bis < von or bis - von >= 10_000:
+            raise ValueError(f"Ungültiger Seitenbereich: {teil.strip()!r}")
+        seiten.update(range(von, bis + 1))
+    return seiten
+
+
+@require_GET
+@gemessen("inventur_pdf_teil")
+def inventur_pdf_teil_view(request):
+    """
+    Einzelne Gruppen oder Seiten der Inventur-PDF zum Nachdrucken:
+    ?gruppe=<Gruppenname> (mehrfach möglich), optional ?seiten=2,5-7 je Gruppe;
+    ?site, ?engine und ?inventur wie bei der ganzen PDF.
+    Seitenzählung ("x von y") und Kopfzeilen wie im ganzen Dokument,
+    formatiert und gesetzt werden nur die angefragten Seiten.
+    """
+    site, engine = _standort_und_engine(request)
+    site, quelle, _ = _inventur_quelle(request, site)
+
+    gruppen_auswahl = request.GET.getlist("gruppe")
+    if not gruppen_auswahl:
+        return JsonResponse({"fehler": "Mindestens eine Gruppe (?gruppe=…) angeben"}, status=400)
+
+    try:
+        seiten = _seiten_lesen(request.GET.get("seiten"))
+    except ValueError as exc:
+        return JsonResponse({"fehler": str(exc)}, status=400)
+
+    with messung.stufe("snapshot") as s:
+        snapshot = artikel_snapshot_holen(quelle, spalten=PDF_SPALTEN, standort=site)
+        s.setzen(artikel=snapshot.daten[0])
+
+    _, _, gruppen_namen, gruppen = snapshot.daten
+    unbekannt = [g for g in gruppen_auswahl if g not in gruppen]
+    if unbekannt:
+        return JsonResponse({"fehler": "Gruppe nicht im Dokument", "gruppen": unbekannt}, status=404)
+
+    seiten_auswahl = {g: seiten for g in gruppen_auswahl}
+    zeilen_pro_seite = zeilen_pro_seite_berechnen(LAYOUT.seitenformat[1])
+    anzahl_seiten = seiten_gesamt_berechnen(gruppen_namen, gruppen, zeilen_pro_seite, False, seiten_auswahl)
+    if not anzahl_seiten:
+        return JsonResponse({"fehler": "Keine der angefragten Seiten vorhanden"}, status=404)
+
+    # Auswahl gehört mit in den Schlüssel (gleiche Daten + Auswahl → gleiche PDF)
+    auswahl_text = repr(sorted((g, sorted(seiten or ())) for g in set(gruppen_auswahl)))
+    schluessel = render_schluessel(snapshot.fingerabdruck, site, f"{engine}:teil:{auswahl_text}")
+    etag = f'"{schluessel}"'
+
+    nicht_geaendert = _nicht_geaendert(request, etag)
+    if nicht_geaendert is not None:
+        return nicht_geaendert
+
+    with messung.stufe("rendern", engine=engine, seiten=anzahl_seiten) as s:
+        datei = SpooledTemporaryFile(max_size=PDF_SPOOL_GROESSE)
+        try:
+            pdf_rendern(datei, snapshot.daten, site, engine, seiten_auswahl=seiten_auswahl)
+        except Exception:
+            datei.close()
+            raise
+        s.setzen(bytes=datei.tell())
+        datei.seek(0)
+
+    response = FileResponse(datei, content_type="application/pdf", filename=f"inventur_{site}_nachdruck.pdf")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
-def seitenanzahl_fuer_gruppe_berechnen(artikel_anzahl, zeilen_pro_seite) -> int:
+@gemessen("inventur_pdf_alle")
+def inventur_pdf_alle_view(request):
     """
-    Ermittelt die benötigte Seitenanzahl pro Warengruppe.
-    Zusätzliche Leerzeilen werden bewusst mitgerechnet.
+    Liefert die Inventur-PDFs aller Standorte als ZIP –
+    Artikel werden dafür nur einmal geladen und gruppiert.
     """
-    return max(
-        1,
-        ceil((artikel_anzahl + LAYOUT.extra_leerzeilen) / zeilen_pro_seite)
-    )
+    _, engine = _standort_und_engine(request)
+
+    datei = SpooledTemporaryFile(max_size=PDF_SPOOL_GROESSE)
+    try:
+        alle_standorte_zip_schreiben(datei, engine=engine)
+    except Exception:
+        datei.close()
+        raise
+    datei.seek(0)
+
+    response = FileResponse(datei, content_type="application/zip", as_attachment=True,
+                            filename="inventur_standorte.zip")
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
 # ============================================================
-# Tabellen-Erzeugung
+# ASGI-View
 # ============================================================
 
-def gruppen_uebersichtstabelle_erstellen(titel, gruppennamen, gruppen_daten, zeilen_pro_seite, tabellenbreite):
+async def _datei_streamen(datei, blockgroesse=256 * 1024):
     """
-    Baut die Übersichtstabelle auf dem Deckblatt,
-    die zeigt, wie viele Seiten jede Warengruppe hat.
+    Liest die Datei blockweise außerhalb des Event-Loops.
     """
-    daten = [[titel, "Seiten", "", ""]]
-
-    for gruppenname in gruppennamen:
-        artikel_anzahl = len(gruppen_daten.get(gruppenname, []))
-        seiten = seitenanzahl_fuer_gruppe_berechnen(artikel_anzahl, zeilen_pro_seite)
-        daten.append([gruppenname, str(seiten), "", ""])
-
-    spalte_seiten = 30
-    spalte_checkbox = 16
-    spalte_name = max(120, tabellenbreite - spalte_seiten - 2 * spalte_checkbox)
-
-    tabelle = Table(
-        daten,
-        colWidths=[spalte_name, spalte_seiten, spalte_checkbox, spalte_checkbox],
-        repeatRows=1
-    )
+    loop = asyncio.get_running_loop()
+    try:
+        while block := await loop.run_in_executor(None, datei.read, blockgroesse):
+            yield block
+    finally:
+        datei.close()
 
-    checkbox_stile = []
-    for zeile in range(1, len(daten)):
-        checkbox_stile.append(("BOX", (2, zeile), (2, zeile), 0.8, colors.black))
-        checkbox_stile.append(("BOX", (3, zeile), (3, zeile), 0.8, colors.black))
 
-    tabelle.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 11),
-        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
+async def inventur_pdf_async_view(request):
+    """
+    Wie inventur_pdf_view, aber für ASGI: wartet nicht-blockierend auf
+    Datenbank und Rendern, legt gleiche Anfragen zusammen und antwortet
+    bei zu vielen wartenden Anfragen mit 503. ?inventur=<id> wie dort.
+    """
+    site, engine = _standort_und_engine(request)
+    site, quelle, _ = await sync_to_async(_inventur_quelle)(request, site)
+
+    # Vorgerenderte PDF, solange ihre Daten frisch sind (nur Standard-Quelle)
+    schluessel = None
+    if quelle is None:
+        schluessel = await PDF_DIENST.aktueller_schluessel(site, engine)
+    if schluessel is not None:
+        nicht_geaendert = _nicht_geaendert(request, f'"{schluessel}"')
+        if nicht_geaendert is not None:
+            return nicht_geaendert
+
+    datei = await PDF_DIENST.oeffnen(schluessel) if schluessel else None
+
+    if datei is None:
+        try:
+            schluessel = await PDF_DIENST.bereitstellen(site, engine, quelle)
+        except Ueberlastet:
+            response = JsonResponse({"fehler": "Zu viele PDF-Anfragen, bitte gleich erneut versuchen"}, status=503)
+            response["Retry-After"] = "5"
+            return response
+
+        nicht_geaendert = _nicht_geaendert(request, f'"{schluessel}"')
+        if nicht_geaendert is not None:
+            return nicht_geaendert
+
+        datei = await PDF_DIENST.oeffnen(schluessel)
+        if datei is None:
+            raise RuntimeError(f"Gerenderte PDF {schluessel} sofort wieder verdrängt – PDF-Cache zu klein?")
+
+    response = StreamingHttpResponse(_datei_streamen(datei), content_type="application/pdf")
+    response["Content-Length"] = str(os.fstat(datei.fileno()).st_size)
+    response["Content-Disposition"] = 'inline; filename="inventur.pdf"'
+    response["ETag"] = f'"{schluessel}"'
+    response["Cache-Control"] = "no-cache"
+    return response
 
-        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-        ("ALIGN", (2, 0), (3, -1), "CENTER"),
 
-        ("LINEBELOW", (0, 0), (-1, 0), 1.2, colors.black),
-        ("TOPPADDING", (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-        ("LEFTPADDING", (0, 0), (-1, -1), 2),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 2),
-    ] + checkbox_stile))
+# ============================================================
+# Asynchrone PDF-Aufträge
+# ============================================================
 
-    return tabelle
+def _auftrag_json(auftrag, status=200):
+    daten = auftrag.als_dict()
+    daten["status_url"] = reverse("pdf_auftrag_status", args=[auftrag.id])
+    if auftrag.status == FERTIG:
+        daten["pdf_url"] = reverse("pdf_auftrag_pdf", args=[auftrag.id])
+    return JsonResponse(daten, status=status)
 
 
-def inventur_tabelle_fuer_seite_erstellen(artikel_zeilen):
+# Rendern kostet Rechenzeit: nur angemeldet und mit CSRF-Token (wie Zählungen)
+@require_POST
+@anmeldung_erforderlich()
+def pdf_auftrag_anlegen_view(request):
     """
-    Erstellt die eigentliche Inventurtabelle für eine PDF-Seite.
+    Legt einen PDF-Auftrag an (site, engine wie bei inventur_pdf_view)
+    und antwortet sofort mit 202 und der Auftrags-ID.
+    Gleiche Aufträge werden zusammengelegt.
     """
-    daten = [TABELLEN_KOPF]
+    site = request.POST.get("site") or request.GET.get("site", "A")
+    if site not in STANDORTE:
+        return JsonResponse({"fehler": f"Unbekannter Standort: {site}"}, status=400)
 
-    for artikel in artikel_zeilen:
-        daten.append([
-            tabellenzelle_formatieren(artikel.get("ART_NR") if artikel else "", SPALTEN_BREITEN[0]),
-            tabellenzelle_formatieren(artikel.get("HERST_NAME") if artikel else "", SPALTEN_BREITEN[1]),
-            tabellenzelle_formatieren(artikel.get("HERST_ART_NR") if artikel else "", SPALTEN_BREITEN[2]),
-            tabellenzelle_formatieren(artikel.get("ART_NAME") if artikel else "", SPALTEN_BREITEN[3]),
-            "", "", "", "",
-        ])
+    engine = request.POST.get("engine") or request.GET.get("engine") or "platypus"
+    if engine not in PDF_ENGINES:
+        return JsonResponse({"fehler": f"Unbekannte Engine: {engine}"}, status=400)
 
-    zeilenhoehen = (
-        [LAYOUT.kopfzeile_hoehe] +
-        [LAYOUT.tabellenzeile_hoehe] * (len(daten) - 1)
-    )
+    auftrag = AUFTRAEGE.einreichen(site, engine)
+    return _auftrag_json(auftrag, status=202)
 
-    tabelle = Table(
-        daten,
-        colWidths=SPALTEN_BREITEN,
-        rowHeights=zeilenhoehen,
-        repeatRows=1
-    )
 
-    tabelle.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
+@require_GET
+def pdf_auftrag_status_view(request, auftrag_id):
+    """
+    Status und Fortschritt (seiten_fertig von seiten_gesamt) eines Auftrags.
+    """
+    auftrag = AUFTRAEGE.holen(auftrag_id)
+    if auftrag is None:
+        return JsonResponse({"fehler": "Auftrag unbekannt"}, status=404)
 
-        ("ALIGN", (5, 0), (5, 0), "CENTER"),
-        ("ALIGN", (7, 0), (7, 0), "CENTER"),
+    return _auftrag_json(auftrag)
 
-        ("FONTNAME", (0, 1), (-1, -1), LAYOUT.schriftart),
-        ("FONTSIZE", (0, 1), (-1, -1), LAYOUT.schriftgroesse),
 
-        ("LEFTPADDING", (0, 0), (-1, -1), LAYOUT.zellen_padding_x),
-        ("RIGHTPADDING", (0, 0), (-1, -1), LAYOUT.zellen_padding_x),
-        ("TOPPADDING", (0, 0), (-1, -1), 6),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+@require_GET
+def pdf_auftrag_pdf_view(request, auftrag_id):
+    """
+    Liefert die fertige PDF eines Auftrags.
+    """
+    auftrag = AUFTRAEGE.holen(auftrag_id)
+    if auftrag is None:
+        return JsonResponse({"fehler": "Auftrag unbekannt"}, status=404)
 
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-    ]))
+    if auftrag.status != FERTIG:
+        return _auftrag_json(auftrag, status=409)
 
-    return tabelle
+    datei = AUFTRAEGE.ergebnis_oeffnen(auftrag)
+    if datei is None:
+        return JsonResponse({"fehler": "Ergebnis nicht mehr vorhanden, bitte neu anlegen"}, status=410)
+
+    response = FileResponse(datei, content_type="application/pdf", filename="inventur.pdf")
+    response["ETag"] = f'"{auftrag.schluessel}"'
+    return response
 
 
 # ============================================================
-# Django View
+# Zählungen erfassen
 # ============================================================
 
-def inventur_pdf_view(request):
+@require_POST
+@anmeldung_erforderlich("inventur.change_inventurposition")
+def zaehlungen_view(request, inventur_id):
     """
-    Django-View:
-    Erstellt die Inventur-PDF serverseitig
-    und liefert sie direkt an den Browser aus.
+    Übernimmt einen Stapel Zählungen als JSON:
+    {"zaehlungen": [{"Cortexnr": 4711, "Anzahl": 3, "Einheit_Rest": 1.5}, …]}
+    Ungültige Stapel werden komplett abgelehnt (400 mit Fehlerliste).
+
+    Nur angemeldet mit Änderungsrecht auf Positionen; der Client sendet
+    den Wert des Cookies csrftoken (von den Seiten der App gesetzt)
+    im Header X-CSRFToken mit.
     """
+    inventur = get_object_or_404(Inventur, pk=inventur_id)
+    if inventur.status != "RUNNING":
+        return JsonResponse({"fehler": f"Inventur ist {inventur.status}"}, status=409)
 
-    # Standort aus URL (?site=A oder ?site=B)
-    site = request.GET.get("site", "A")
-    standort_cfg = STANDORTE.get(site, STANDORTE["A"])
-    standort_label = standort_cfg["label"]
+    try:
+        daten = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"fehler": "Ungültiges JSON"}, status=400)
 
-    _, _, gruppen_namen, gruppen = artikel_lager_laden()
+    try:
+        anzahl = zaehlungen_uebernehmen(inventur, daten.get("zaehlungen") if isinstance(daten, dict) else None)
+    except ZaehlungFehler as exc:
+        return JsonResponse({"fehler": str(exc), "zeilen": exc.fehler}, status=400)
 
-    # Standortabhängige Gruppen ausfiltern
-    gruppen_namen, gruppen = gruppen_fuer_standort_filtern(
-        gruppen_namen,
-        gruppen,
-        standort_cfg["skip_groups"]
-    )
+    return JsonResponse({"inventur": inventur.id, "aktualisiert": anzahl})
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=LAYOUT.seitenformat,
-        leftMargin=LAYOUT.rand_links,
-        rightMargin=LAYOUT.rand_rechts,
-        topMargin=LAYOUT.rand_oben,
-        bottomMargin=LAYOUT.rand_unten,
-    )
 
-    seitenbreite, seitenhoehe = LAYOUT.seitenformat
-    zeilen_pro_seite = zeilen_pro_seite_berechnen(seitenhoehe, doc)
+# ============================================================
+# Artikelliste (HTML)
+# ============================================================
 
-    story = []
-    seiten_meta = []  # (Gruppenname, Seite_in_Gruppe, Seiten_gesamt)
+def _zahl(text, standard=None):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return standard
 
-    # ================= Deckblatt =================
 
-    gruppen_A, daten_A = gruppen_fuer_standort_filtern(
-        gruppen_namen, gruppen, STANDORTE["A"]["skip_groups"]
-    )
-    gruppen_B, daten_B = gruppen_fuer_standort_filtern(
-        gruppen_namen, gruppen, STANDORTE["B"]["skip_groups"]
+# Setzt das CSRF-Cookie für Clients, die von hier aus Zählungen senden
+@ensure_csrf_cookie
+@gemessen("artikel_liste")
+def artikel_liste_view(request):
+    """
+    Seitenweise Artikelliste mit Filtern:
+    ?site=A, ?gruppe=<Übergruppe>, ?wg=<WG_NR>, ?q=<Text in Name/Herst.-Nr.>,
+    ?inventur=<id> für den eingefrorenen Stand, ?nach=<Cursor> zum Weiterblättern.
+    """
+    site, _ = _standort_und_engine(request)
+    site, quelle, inventur = _inventur_quelle(request, site)
+
+    index = artikel_listen_index(quelle, standort=site)
+
+    gruppe = request.GET.get("gruppe") or None
+    wg_nr = _zahl(request.GET.get("wg"))
+    suche = request.GET.get("q", "").strip()
+    groesse = min(max(_zahl(request.GET.get("anzahl"), SEITEN_GROESSE), 1), MAX_SEITEN_GROESSE)
+
+    treffer, weiter = index.seite(
+        uebergruppe=gruppe,
+        wg_nr=wg_nr,
+        suche=suche,
+        nach=index.cursor_lesen(request.GET.get("nach")),
+        groesse=groesse,
     )
 
-    halbe_breite = (seitenbreite - doc.leftMargin - doc.rightMargin) / 2 - 10
+    # Gruppenüberschrift nur beim Wechsel innerhalb der Seite
+    abschnitte = []
+    for gruppenname, art in treffer:
+        if not abschnitte or abschnitte[-1][0] != gruppenname:
+            abschnitte.append((gruppenname, []))
+        abschnitte[-1][1].append(art)
+
+    weiter_url = None
+    if weiter is not None:
+        parameter = request.GET.copy()
+        parameter["nach"] = index.cursor(weiter)
+        weiter_url = f"?{parameter.urlencode()}"
+
+    anfang = request.GET.copy()
+    anfang.pop("nach", None)
+
+    return render(request, "lager_artikel.html", {
+        "count": len(index.artikel),
+        "group": len(index.gruppen_namen),
+        "gruppen_namen": index.gruppen_namen,
+        "standorte": STANDORTE,
+        "site": site,
+        "inventur": inventur,
+        "gruppe": gruppe,
+        "wg": wg_nr,
+        "q": suche,
+        "abschnitte": abschnitte,
+        "treffer_anzahl": len(treffer),
+        "weiter_url": weiter_url,
+        "anfang_url": f"?{anfang.urlencode()}" if "nach" in request.GET else None,
+    })
+
+
+@require_GET
+@gemessen("artikel_suche")
+def artikel_suche_view(request):
+    """
+    Sucht Artikel nach Cortexnr, HERST_ART_NR oder Namensteil (?q=…)
+    und liefert je Treffer Gruppe und Seite der Inventurliste als JSON.
+    ?site=A oder ?inventur=<id> wie bei der PDF.
+    """
+    site, _ = _standort_und_engine(request)
+    site, quelle, _ = _inventur_quelle(request, site)
 
-    t_links = gruppen_uebersichtstabelle_erstellen(
-        STANDORTE["A"]["label"], gruppen_A, daten_A, zeilen_pro_seite, halbe_breite
-    )
-    t_rechts = gruppen_uebersichtstabelle_erstellen(
-        STANDORTE["B"]["label"], gruppen_B, daten_B, zeilen_pro_seite, halbe_breite
-    )
+    index = artikel_such_index(quelle, standort=site)
+    anzahl = min(max(_zahl(request.GET.get("anzahl"), MAX_TREFFER), 1), MAX_SEITEN_GROESSE)
+    treffer = index.suchen(request.GET.get("q", ""), anzahl)
 
-    deckblatt = Table([[t_links, t_rechts]],
-        colWidths=[(seitenbreite - doc.leftMargin - doc.rightMargin) / 2] * 2
-    )
+    # Je Treffer ein Link zum Nachdruck genau seines Blatts
+    nachdruck_url = reverse("inventur_pdf_teil")
+    ziel = {"inventur": quelle.inventur_id} if quelle is not None else {"site": site}
 
-    deckblatt.setStyle(TableStyle([
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 0),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-    ]))
+    return JsonResponse({
+        "standort": site,
+        "treffer": [
+            {**t.als_dict(), "nachdruck": f"{nachdruck_url}?{urlencode({**ziel, 'gruppe': t.gruppe, 'seiten': t.seite})}"}
+            for t in treffer
+        ],
+    })
 
-    story.append(Spacer(1, 6))
 
-    titel = Table(
-        [["Inventurlisten 2025"]],
-        colWidths=[seitenbreite - doc.leftMargin - doc.rightMargin]
-    )
-    titel.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 12),
-        ("LINEBELOW", (0, 0), (-1, -1), 1.2, colors.black),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-    ]))
-
-    story.extend([titel, Spacer(1, 10), deckblatt, PageBreak()])
-
-    # ================= Inventur-Tabellen =================
-
-    for gruppenname in gruppen_namen:
-        artikel_liste = sorted(
-            gruppen.get(gruppenname, []),
-            key=lambda a: (a.get("ART_NAME") or "").lower()
-        )
-        if not artikel_liste:
-            continue
-
-        artikel_liste_ext = list(artikel_liste) + ([{}] * LAYOUT.extra_leerzeilen)
-        gesamt_seiten = ceil(len(artikel_liste_ext) / zeilen_pro_seite)
-
-        for seite in range(gesamt_seiten):
-            start = seite * zeilen_pro_seite
-            ende = start + zeilen_pro_seite
-            seiten_daten = artikel_liste_ext[start:ende]
-
-            seiten_meta.append((gruppenname, seite + 1, gesamt_seiten))
-
-            story.append(inventur_tabelle_fuer_seite_erstellen(seiten_daten))
-            story.append(PageBreak())
-
-    # ================= Kopf- & Fußzeile =================
-
-    titel_links = "Thamm Inventur"
-    datum_text = "17.12.2025"
-    fuss_rechts = standort_label
-
-    def kopf_und_fuss_zeichnen(canvas, doc_):
-        canvas.saveState()
-
-        gruppenname = ""
-        seite_in_gruppe = 0
-        gesamt_in_gruppe = 0
-
-        # Erste Seite = Deckblatt
-        if doc_.page >= 2:
-            idx = doc_.page - 2
-            if 0 <= idx < len(seiten_meta):
-                gruppenname, seite_in_gruppe, gesamt_in_gruppe = seiten_meta[idx]
-
-        # Kopf links
-        canvas.setFont("Helvetica-Bold", 12)
-        canvas.drawString(doc_.leftMargin, seitenhoehe - 30, titel_links)
-
-        canvas.setFont("Helvetica", 9)
-        canvas.drawString(doc_.leftMargin, seitenhoehe - 45, datum_text)
-
-        # Kopf rechts (Gruppenname)
-        canvas.setFont("Helvetica-Bold", 11)
-        canvas.drawRightString(
-            seitenbreite - doc_.rightMargin,
-            seitenhoehe - 30,
-            db_wert_bereinigen(gruppenname)
-        )
-
-        # Fuß Mitte (Seitennummer pro Gruppe)
-        if gesamt_in_gruppe:
-            canvas.drawCentredString(
-                seitenbreite / 2,
-                18,
-                f"{seite_in_gruppe} von {gesamt_in_gruppe}"
-            )
-
-        # Fuß rechts (Standort)
-        canvas.drawRightString(
-            seitenbreite - doc_.rightMargin,
-            18,
-            fuss_rechts
-        )
-
-        # Fuß links (Unterschrift)
-        canvas.drawString(doc_.leftMargin, 12, "Ausgefüllt von:")
-        canvas.line(doc_.leftMargin + 85, 10, doc_.leftMargin + 240, 10)
-
-        canvas.restoreState()
-
-    doc.build(story, onFirstPage=kopf_und_fuss_zeichnen, onLaterPages=kopf_und_fuss_zeichnen)
-
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'inline; filename="inventur.pdf"'
-    response.write(pdf)
-    return response
+# ============================================================
+# Kennzahlen
+# ============================================================
+
+@require_GET
+@staff_member_required
+def messwerte_view(request):
+    """
+    Rollende Kennzahlen je Stufe (p50/p95/p99 in ms, Summen von Zeilen,
+    Seiten, Bytes) sowie die Statistik von Snapshot- und PDF-Cache.
+    Nur für Staff-Benutzer (sonst Weiterleitung zur Admin-Anmeldung).
+    """
+    return JsonResponse({
+        "stufen": messung.STATISTIK.kennzahlen(),
+        "snapshot_cache": SNAPSHOT_CACHE.kennzahlen(),
+        "pdf_cache": PDF_CACHE.kennzahlen(),
+    })
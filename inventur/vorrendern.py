@@ -0,0 +1,174 @@
+"""
+Vorab-Rendern der Inventur-PDFs für alle Standorte.
+
+Jeder Standort wird in einem eigenen Prozess geladen und gerendert
+und atomar im PDF-Cache abgelegt. Die View liefert danach die
+vorgerenderte PDF, solange deren Daten frisch sind.
+
+Ein Lauf kann einmalig (manage.py pdfs_vorrendern) oder periodisch
+über den Planer im Web-Prozess angestoßen werden
+(ENV: INVENTUR_VORRENDER_INTERVALL in Sekunden, 0 = aus).
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from firma_db import PDF_SPALTEN, STANDORTE, artikel_quelle_aus_text, artikel_snapshot_holen
+from inventur.pdf_cache import pdf_bereitstellen
+
+
+logger = logging.getLogger(__name__)
+
+
+def _standort_vorrendern(standort, engine, quelle_text):
+    """
+    Läuft im Pool-Prozess: lädt einen Standort und legt seine PDF im Cache ab.
+    """
+    quelle = artikel_quelle_aus_text(quelle_text) if quelle_text else None
+
+    start = perf_counter()
+    snapshot = artikel_snapshot_holen(quelle, PDF_SPALTEN, standort)
+    laden_s = perf_counter() - start
+
+    # Der Zeiger der View gilt nur für die Standard-Quelle (wie in pdf_standorte)
+    start = perf_counter()
+    schluessel, datei, neu_gerendert = pdf_bereitstellen(snapshot, standort, engine, zeiger=quelle_text is None)
+    datei.close()
+    rendern_s = perf_counter() - start
+
+    return {
+        "standort": standort,
+        "engine": engine,
+        "schluessel": schluessel,
+        "neu_gerendert": neu_gerendert,
+        "artikel": snapshot.daten[0],
+        "laden_s": laden_s,
+        "rendern_s": rendern_s,
+    }
+
+
+def _prozess_einrichten():
+    """
+    Läuft einmal je Pool-Prozess. "spawn" startet ohne Django; erst
+    django.setup() trägt die Quellen aus InventurConfig.ready() ein
+    (inventur:<id>, spiegel) und macht die Datenbank nutzbar.
+    """
+    # Kein eigener Planer im Pool-Prozess (ready() würde ihn sonst starten)
+    os.environ["INVENTUR_VORRENDER_INTERVALL"] = "0"
+
+    import django
+    django.setup()
+
+
+def vorrender_pool(prozesse=None):
+    """
+    Prozess-Pool für das Vorab-Rendern.
+
+    "spawn" statt "fork": der Web-Prozess kann offene ODBC-Verbindungen
+    halten, die in Kindprozessen nicht weiterverwendet werden dürfen.
+    """
+    prozesse = prozesse or min(len(STANDORTE), os.cpu_count() or 1)
+    return ProcessPoolExecutor(
+        max_workers=prozesse,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_prozess_einrichten,
+    )
+
+
+def alle_standorte_vorrendern(engines=("platypus",), quelle_text=None, pool=None):
+    """
+    Rendert die PDF für jeden Standort in STANDORTE (und jede Engine) parallel.
+    Liefert je Standort/Engine die Zeiten, sortiert wie STANDORTE.
+    """
+    eigener_pool = pool is None
+    pool = pool or vorrender_pool()
+
+    try:
+        auftraege = [
+            pool.submit(_standort_vorrendern, standort, engine, quelle_text)
+            for standort in STANDORTE
+            for engine in engines
+        ]
+        ergebnisse = [auftrag.result() for auftrag in auftraege]
+    finally:
+        if eigener_pool:
+            pool.shutdown()
+
+    for ergebnis in ergebnisse:
+        logger.info(
+            "PDF %s/%s %s: %s Artikel, Laden %.2fs, Rendern %.2fs",
+            ergebnis["standort"], ergebnis["engine"],
+            "neu gerendert" if ergebnis["neu_gerendert"] else "unverändert",
+            ergebnis["artikel"], ergebnis["laden_s"], ergebnis["rendern_s"],
+        )
+
+    return ergebnisse
+
+
+# ============================================================
+# Planer
+# ============================================================
+
+class VorrenderPlaner:
+    """
+    Hintergrund-Thread, der alle intervall Sekunden vorrendert.
+
+    Der Pool bleibt über die Läufe bestehen, damit die Snapshot-Caches
+    in den Pool-Prozessen erhalten bleiben: unveränderte Daten kosten
+    dann nur die Prüfung der Änderungsmarke, kein erneutes Rendern.
+    """
+
+    def __init__(self, intervall, engines=("platypus",)):
+        self.intervall = intervall
+        self.engines = engines
+        self._stopp = threading.Event()
+        self._thread = None
+
+    def starten(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laufen, name="pdf-vorrendern", daemon=True)
+            self._thread.start()
+
+    def stoppen(self):
+        self._stopp.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _laufen(self):
+        with vorrender_pool() as pool:
+            while not self._stopp.is_set():
+                start = perf_counter()
+                try:
+                    alle_standorte_vorrendern(self.engines, pool=pool)
+                except Exception:
+                    # Nächster Lauf versucht es erneut; die View rendert notfalls selbst
+                    logger.exception("Vorab-Rendern der Inventur-PDFs fehlgeschlagen")
+
+                self._stopp.wait(max(0.0, self.intervall - (perf_counter() - start)))
+
+
+_PLANER = None
+
+
+def planer_starten(intervall=None):
+    """
+    Startet den Planer einmal je Prozess (Intervall per ENV, falls nicht angegeben).
+    Mehrere Web-Worker mit eigenem Planer sind unkritisch: die Ablage ist atomar.
+    """
+    global _PLANER
+
+    if intervall is None:
+        intervall = float(os.environ.get("INVENTUR_VORRENDER_INTERVALL", 0))
+
+    if intervall <= 0 or _PLANER is not None:
+        return _PLANER
+
+    _PLANER = VorrenderPlaner(intervall)
+    _PLANER.starten()
+    logger.info("Vorab-Rendern der Inventur-PDFs alle %ss gestartet", intervall)
+    return _PLANER
@@ -0,0 +1,144 @@
+"""
+Erfassung gezählter Mengen für eine Inventur.
+
+Ein Stapel [{Cortexnr, Zählfelder…}, …] wird vollständig geprüft und dann
+in einer Transaktion per executemany-UPDATE übernommen – alles oder nichts.
+Die Werte werden gesetzt, nicht addiert: ein wiederholter Stapel
+(z. B. nach Timeout) führt zum selben Ergebnis.
+"""
+
+from django.db import connections, transaction
+
+from inventur.models import InventurPosition
+
+
+# Feld -> Typ; None leert ein Feld wieder
+ZAEHL_FELDER = {
+    "Verpackungseinheit": float,
+    "Anzahl": int,
+    "Einheit_Rest": float,
+    "Anazahl": int,
+}
+
+# Obergrenze je Stapel
+MAX_ZAEHLUNGEN = 10_000
+
+# Cortexnr je IN-Abfrage: SQL Server erlaubt höchstens 2100 Parameter
+IN_BATCH = 2000
+
+
+class ZaehlungFehler(ValueError):
+    """
+    Ungültiger Stapel; fehler ist eine Liste {"zeile", "Cortexnr", "fehler"}.
+    """
+
+    def __init__(self, fehler):
+        super().__init__(f"{len(fehler)} ungültige Zählung(en)")
+        self.fehler = fehler
+
+
+def _wert_pruefen(feld, wert):
+    if wert is None:
+        return None
+
+    typ = ZAEHL_FELDER[feld]
+    # bool ist ein int, als Menge aber sicher ein Fehler
+    if isinstance(wert, bool) or not isinstance(wert, (int, float)):
+        raise ValueError(f"{feld}: Zahl erwartet")
+    if typ is int and wert != int(wert):
+        raise ValueError(f"{feld}: ganze Zahl erwartet")
+    if wert < 0:
+        raise ValueError(f"{feld}: darf nicht negativ sein")
+
+    return typ(wert)
+
+
+def zaehlungen_pruefen(zaehlungen):
+    """
+    Prüft Form und Werte eines Stapels (ohne Datenbank).
+    Liefert [(Cortexnr, {feld: wert})] oder wirft ZaehlungFehler.
+    """
+    if not isinstance(zaehlungen, list) or not zaehlungen:
+        raise ZaehlungFehler([{"zeile": None, "Cortexnr": None, "fehler": "Liste von Zählungen erwartet"}])
+    if len(zaehlungen) > MAX_ZAEHLUNGEN:
+        raise ZaehlungFehler([{
+            "zeile": None, "Cortexnr": None,
+            "fehler": f"Höchstens {MAX_ZAEHLUNGEN} Zählungen je Stapel",
+        }])
+
+    fehler = []
+    geprueft = []
+    gesehen = set()
+
+    for zeile, zaehlung in enumerate(zaehlungen):
+        cortexnr = zaehlung.get("Cortexnr") if isinstance(zaehlung, dict) else None
+        try:
+            if not isinstance(zaehlung, dict):
+                raise ValueError("Objekt erwartet")
+            if not isinstance(cortexnr, int) or isinstance(cortexnr, bool):
+                raise ValueError("Cortexnr fehlt oder ist keine Zahl")
+            if cortexnr in gesehen:
+                raise ValueError("Cortexnr mehrfach im Stapel")
+
+            unbekannt = set(zaehlung) - set(ZAEHL_FELDER) - {"Cortexnr"}
+            if unbekannt:
+                raise ValueError(f"Unbekannte Felder: {', '.join(sorted(unbekannt))}")
+
+            werte = {feld: _wert_pruefen(feld, wert) for feld, wert in zaehlung.items() if feld in ZAEHL_FELDER}
+            if not werte:
+                raise ValueError("Keine Zählfelder angegeben")
+        except ValueError as exc:
+            fehler.append({"zeile": zeile, "Cortexnr": cortexnr, "fehler": str(exc)})
+            continue
+
+        gesehen.add(cortexnr)
+        geprueft.append((cortexnr, werte))
+
+    if fehler:
+        raise ZaehlungFehler(fehler)
+
+    return geprueft
+
+
+def zaehlungen_uebernehmen(inventur, zaehlungen, using="default"):
+    """
+    Prüft den Stapel gegen die Positionen der Inventur und übernimmt ihn.
+    Liefert die Anzahl aktualisierter Positionen.
+    """
+    geprueft = zaehlungen_pruefen(zaehlungen)
+
+    positionen = InventurPosition.objects.using(using).filter(inventur=inventur)
+    cortexnummern = [cortexnr for cortexnr, _ in geprueft]
+    vorhanden = set()
+    for i in range(0, len(cortexnummern), IN_BATCH):
+        vorhanden.update(
+            positionen.filter(Cortexnr__in=cortexnummern[i:i + IN_BATCH]).values_list("Cortexnr", flat=True)
+        )
+    fehlend = [
+        {"zeile": zeile, "Cortexnr": cortexnr, "fehler": "Artikel nicht in dieser Inventur"}
+        for zeile, (cortexnr, _) in enumerate(geprueft) if cortexnr not in vorhanden
+    ]
+    if fehlend:
+        raise ZaehlungFehler(fehlend)
+
+    # Je Kombination gesetzter Felder ein UPDATE mit executemany
+    stapel = {}
+    for cortexnr, werte in geprueft:
+        felder = tuple(sorted(werte))
+        stapel.setdefault(felder, []).append(
+            [werte[feld] for feld in felder] + [inventur.pk, cortexnr]
+        )
+
+    verbindung = connections[using]
+    quote = verbindung.ops.quote_name
+    tabelle = quote(InventurPosition._meta.db_table)
+
+    with transaction.atomic(using=using), verbindung.cursor() as cursor:
+        for felder, parameter in stapel.items():
+            zuweisungen = ", ".join(f"{quote(feld)} = %s" for feld in felder)
+            cursor.executemany(
+                f"UPDATE {tabelle} SET {zuweisungen} WHERE {quote('inventur_id')} = %s AND {quote('Cortexnr')} = %s",
+                parameter,
+            )
+
+    return len(geprueft)
@@ -0,0 +1,269 @@
+"""
+Zeitmessung der einzelnen Stufen (Laden, Gruppieren, Sortieren,
+Tabellen, PDF-Aufbau, Ausliefern) – ohne Abhängigkeit von Django.
+
+- stufe("gruppieren", gruppen=12) misst einen Abschnitt.
+- Läuft gerade eine Messung (messung_starten, z. B. je Anfrage),
+  landen Dauer und Werte (Zeilen, Seiten, Bytes) dort; daraus wird
+  der Server-Timing-Header und ein strukturierter Log-Eintrag.
+- Die Dauern fließen in die rollenden Kennzahlen (p50/p95/p99) von
+  STATISTIK: innerhalb einer Messung einmal je Stufe beim Abschluss
+  (mehrfach gemessene Stufen addiert), sonst sofort.
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+# Anzahl Messwerte je Stufe für die Perzentile
+FENSTER = int(os.environ.get("INVENTUR_MESSUNG_FENSTER", 1000))
+
+
+# ============================================================
+# Rollende Kennzahlen
+# ============================================================
+
+class RollendeStatistik:
+    """
+    Hält je Stufe die letzten FENSTER Dauern (ms) und summiert die Werte.
+    Perzentile werden erst beim Abruf berechnet.
+    """
+
+    def __init__(self, fenster=FENSTER):
+        self.fenster = fenster
+        self._lock = threading.Lock()
+        self._dauern = {}
+        self._summen = {}
+
+    def erfassen(self, name, dauer_ms, werte=None):
+        with self._lock:
+            dauern = self._dauern.get(name)
+            if dauern is None:
+                dauern = self._dauern[name] = deque(maxlen=self.fenster)
+                self._summen[name] = {"anzahl": 0}
+            dauern.append(dauer_ms)
+
+            summen = self._summen[name]
+            summen["anzahl"] += 1
+            for schluessel, wert in (werte or {}).items():
+                if isinstance(wert, (int, float)):
+                    summen[schluessel] = summen.get(schluessel, 0) + wert
+
+    def kennzahlen(self):
+        """
+        {stufe: {anzahl, p50_ms, p95_ms, p99_ms, max_ms, <Summen der Werte>}}
+        """
+        with self._lock:
+            kopie = {name: (sorted(dauern), dict(self._summen[name])) for name, dauern in self._dauern.items()}
+
+        ergebnis = {}
+        for name, (dauern, summen) in sorted(kopie.items()):
+            ergebnis[name] = {
+                **summen,
+                "p50_ms": _perzentil(dauern, 50),
+                "p95_ms": _perzentil(dauern, 95),
+                "p99_ms": _perzentil(dauern, 99),
+                "max_ms": round(dauern[-1], 3),
+            }
+        return ergebnis
+
+    def zuruecksetzen(self):
+        with self._lock:
+            self._dauern.clear()
+            self._summen.clear()
+
+
+def _perzentil(sortiert, p):
+    # Nächster Rang, wie bei den meisten Monitoring-Systemen
+    index = max(0, min(len(sortiert) - 1, -(-len(sortiert) * p // 100) - 1))
+    return round(sortiert[index], 3)
+
+
+STATISTIK = RollendeStatistik()
+
+
+# ============================================================
+# Messung je Anfrage
+# ============================================================
+
+class Messung:
+    """
+    Stufen einer Anfrage in Reihenfolge ihres ersten Auftretens.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = perf_counter()
+        self.stufen = {}
+
+    def erfassen(self, name, dauer_ms, werte):
+        stufe = self.stufen.get(name)
+        if stufe is None:
+            stufe = self.stufen[name] = {"dauer_ms": 0.0}
+        stufe["dauer_ms"] += dauer_ms
+        for schluessel, wert in werte.items():
+            if isinstance(wert, (int, float)) and isinstance(stufe.get(schluessel), (int, float)):
+                stufe[schluessel] += wert
+            else:
+                stufe[schluessel] = wert
+
+    def gesamt_ms(self):
+        return (perf_counter() - self.start) * 1000
+
+    def server_timing(self):
+        """
+        Wert für den Server-Timing-Header: je Stufe dur, Werte in desc.
+        """
+        teile = []
+        for name, stufe in self.stufen.items():
+            werte = " ".join(f"{k}={v}" for k, v in stufe.items() if k != "dauer_ms")
+            teil = f"{name};dur={stufe['dauer_ms']:.1f}"
+            if werte:
+                teil += f';desc="{werte}"'
+            teile.append(teil)
+        teile.append(f"gesamt;dur={self.gesamt_ms():.1f}")
+        return ", ".join(teile)
+
+    def als_dict(self):
+        return {
+            "messung": self.name,
+            "gesamt_ms": round(self.gesamt_ms(), 3),
+            "stufen": {
+                name: {k: round(v, 3) if isinstance(v, float) else v for k, v in stufe.items()}
+                for name, stufe in self.stufen.items()
+            },
+        }
+
+
+_AKTUELL = contextvars.ContextVar("inventur_messung", default=None)
+
+
+def aktuelle_messung():
+    return _AKTUELL.get()
+
+
+@contextmanager
+def messung_starten(name):
+    """
+    Startet eine Messung für den aktuellen Kontext (Thread/Task).
+    """
+    messung = Messung(name)
+    token = _AKTUELL.set(messung)
+    try:
+        yield messung
+    finally:
+        _AKTUELL.reset(token)
+
+
+def messung_abschliessen(messung, **werte):
+    """
+    Stufen und Gesamtdauer in STATISTIK übernehmen und als JSON-Zeile
+    loggen; werte (z. B. HTTP-Status) erscheinen nur im Log.
+    """
+    for name, stufe in messung.stufen.items():
+        werte_stufe = {k: v for k, v in stufe.items() if k != "dauer_ms"}
+        STATISTIK.erfassen(name, stufe["dauer_ms"], werte_stufe)
+    STATISTIK.erfassen(messung.name, messung.gesamt_ms())
+    daten = messung.als_dict()
+    daten.update(werte)
+    logger.info("messung %s", json.dumps(daten, ensure_ascii=False, default=str))
+
+
+def erfassen(name, dauer_ms, **werte):
+    """
+    Bereits gemessene Dauer einer Stufe übernehmen.
+    """
+    messung = _AKTUELL.get()
+    if messung is not None:
+        messung.erfassen(name, dauer_ms, werte)
+    else:
+        STATISTIK.erfassen(name, dauer_ms, werte)
+
+
+class _Stufe:
+    __slots__ = ("name", "werte", "_start")
+
+    def __init__(self, name, werte):
+        self.name = name
+        self.werte = werte
+
+    def setzen(self, **werte):
+        """
+        Werte nachtragen, die erst am Ende feststehen (Zeilen, Bytes).
+        """
+        self.werte.update(werte)
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        erfassen(self.name, (perf_counter() - self._start) * 1000, **self.werte)
+        return False
+
+
+def stufe(name, **werte):
+    """
+    with stufe("rendern", seiten=12) as s: ...; s.setzen(bytes=n)
+    """
+    return _Stufe(name, werte)
+
+
+# ============================================================
+# Profil je Anfrage
+# ============================================================
+
+PROFIL_ARTEN = ("cprofile", "tracemalloc")
+
+
+@contextmanager
+def profil_erstellen(art, zeilen=40):
+    """
+    Profiliert den Block mit cProfile oder tracemalloc.
+    Liefert eine Liste, in der nach dem Block der Bericht als Text steht.
+    """
+    bericht = []
+
+    if art == "cprofile":
+        profil = cProfile.Profile()
+        profil.enable()
+        try:
+            yield bericht
+        finally:
+            profil.disable()
+            ausgabe = io.StringIO()
+            pstats.Stats(profil, stream=ausgabe).sort_stats("cumulative").print_stats(zeilen)
+            bericht.append(ausgabe.getvalue())
+
+    elif art == "tracemalloc":
+        lief_schon = tracemalloc.is_tracing()
+        if not lief_schon:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        vorher = tracemalloc.take_snapshot()
+        try:
+            yield bericht
+        finally:
+            nachher = tracemalloc.take_snapshot()
+            aktuell, spitze = tracemalloc.get_traced_memory()
+            if not lief_schon:
+                tracemalloc.stop()
+
+            zeilen_text = [f"Aktuell {aktuell / 1024:.0f} KiB, Spitze {spitze / 1024:.0f} KiB", ""]
+            zeilen_text += [str(s) for s in nachher.compare_to(vorher, "lineno")[:zeilen]]
+            bericht.append("\n".join(zeilen_text))
+
+    else:
+        raise ValueError(f"Unbekannte Profil-Art {art!r}, erlaubt: {', '.join(PROFIL_ARTEN)}")